@@ -1,11 +1,30 @@
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html, get_swagger_ui_oauth2_redirect_html
 from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+import asyncio
 import logging
 import time
-from .routers import time_router, weather_router
-from .utils.exceptions import CityNotFoundException, WeatherServiceException, TimezoneNotFoundException
+from .routers import time_router, weather_router, feed_router
+from .utils.exceptions import (
+    CityNotFoundException, WeatherServiceException, TimezoneNotFoundException, DeadlineExceededException,
+    BulkheadFullException
+)
 from .utils.performance import performance_metrics
+from .utils.http_cache import response_cache
+from .utils.compression import CompressionMiddleware, compression_stats
+from .utils.cache_backends import get_cache_backend
+from .utils.deadline import DeadlineMiddleware, deadline_stats
+from .utils.loop_monitor import loop_lag_monitor
+from .utils.memory_profiler import GROUP_BY_PATTERN, buffer_sizes, memory_profiler
+from .utils.admission import AdaptiveLimit, AdmissionController, AdmissionMiddleware
+from .utils.config import settings
+from .services.time_service import TimeService, time_service
+from .services.weather_service import WeatherService, weather_service
+from .services.feed_service import feed_broadcaster
+from .services.weather_prefetcher import weather_prefetcher
+from .services.warmup import startup_warmup
 
 # Configure logging
 logging.basicConfig(
@@ -14,10 +33,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """بدء وإيقاف المهام الخلفية مع التطبيق"""
+    logger.info("🚀 Starting background tasks")
+    if settings.loop_lag_monitor:
+        loop_lag_monitor.start()
+    # التهيئة في الخلفية: /health يستجيب فوراً و /ready بعد اكتمالها
+    startup_warmup.start([
+        ("openapi", _openapi_entry),
+        # الاستجابات الثابتة تُرمّز وتُضغط مرة واحدة قبل أول طلب
+        ("static_responses", _prime_static_responses)
+    ])
+    weather_prefetcher.start()
+    yield
+    await startup_warmup.stop()
+    await weather_prefetcher.stop()
+    await loop_lag_monitor.stop()
+    logger.info("🛑 Background tasks stopped")
+
 app = FastAPI(
     title="Time & Weather API",
     description="API للحصول على معلومات الوقت والطقس للمدن",
-    version="1.0.0"
+    version="1.0.0",
+    # المخطط وصفحات التوثيق تُسجل أدناه حتى يُخدم المخطط مضغوطاً مسبقاً
+    openapi_url=None,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -29,6 +70,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Add compression middleware (brotli إن كانت مثبتة، وإلا gzip)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_min_size,
+    offload_size=settings.compression_offload_size
+)
+
+# Add deadline middleware (مهلة واحدة لكل طلب تُلغى المعالجة عند انتهائها أو انقطاع الاتصال)
+app.add_middleware(DeadlineMiddleware, timeout_seconds=settings.request_timeout)
+
 # Add logging middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -56,6 +107,23 @@ async def log_requests(request: Request, call_next):
     
     return response
 
+# Add admission control (الطبقة الخارجية: الرفض السريع قبل أي معالجة أخرى عند الحمل الزائد)
+admission_controller = AdmissionController(
+    AdaptiveLimit(
+        initial_limit=settings.admission_initial_limit,
+        min_limit=settings.admission_min_limit,
+        max_limit=settings.admission_max_limit,
+        target_latency=settings.admission_target_latency
+    ),
+    low_priority_share=settings.admission_low_priority_share,
+    max_queue_wait=settings.admission_max_queue_wait
+)
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission_controller,
+    low_priority_paths=("/metrics", "/debug", "/time/comparison/stream", "/time/comparison/series")
+)
+
 # Exception handlers - معالجات الاستثناءات العامة
 @app.exception_handler(CityNotFoundException)
 async def city_not_found_handler(request: Request, exc: CityNotFoundException):
@@ -96,6 +164,32 @@ async def timezone_not_found_handler(request: Request, exc: TimezoneNotFoundExce
         }
     )
 
+@app.exception_handler(DeadlineExceededException)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceededException):
+    """معالج استثناء انتهاء مهلة الطلب"""
+    logger.warning(f"⏰ Deadline exceeded: {str(exc)} - Path: {request.url.path}")
+    return JSONResponse(
+        status_code=504,
+        content={
+            "error": "deadline_exceeded",
+            "message": "انتهت المهلة المتاحة للطلب قبل اكتمال المعالجة"
+        }
+    )
+
+@app.exception_handler(BulkheadFullException)
+async def bulkhead_full_handler(request: Request, exc: BulkheadFullException):
+    """معالج امتلاء السعة المخصصة لخدمة خارجية"""
+    logger.warning(f"🚧 Bulkhead full: {exc.service_name} - Path: {request.url.path}")
+    return JSONResponse(
+        status_code=503,
+        content={
+            "error": "dependency_busy",
+            "message": "الخدمة المطلوبة مشغولة حالياً، يرجى المحاولة بعد قليل",
+            "dependency": exc.service_name
+        },
+        headers={"Retry-After": str(max(1, round(exc.retry_after)))}
+    )
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """معالج الاستثناءات العامة لـ HTTP"""
@@ -106,7 +200,8 @@ async def http_exception_handler(request: Request, exc: HTTPException):
             "error": "http_error",
             "message": exc.detail,
             "status_code": exc.status_code
-        }
+        },
+        headers=exc.headers
     )
 
 @app.exception_handler(Exception)
@@ -122,22 +217,71 @@ async def general_exception_handler(request: Request, exc: Exception):
         }
     )
 
+# مخطط OpenAPI المضغوط مسبقاً بدلاً من المسار الافتراضي الذي يعيد ترميزه مع كل طلب
+@app.get("/openapi.json", include_in_schema=False)
+async def openapi_schema(request: Request):
+    return response_cache.respond(request, _openapi_entry())
+
+@app.get("/docs", include_in_schema=False)
+async def swagger_ui():
+    return get_swagger_ui_html(
+        openapi_url="/openapi.json", title=f"{app.title} - Swagger UI",
+        oauth2_redirect_url="/docs/oauth2-redirect"
+    )
+
+@app.get("/docs/oauth2-redirect", include_in_schema=False)
+async def swagger_ui_redirect():
+    return get_swagger_ui_oauth2_redirect_html()
+
+@app.get("/redoc", include_in_schema=False)
+async def redoc():
+    return get_redoc_html(openapi_url="/openapi.json", title=f"{app.title} - ReDoc")
+
+def _openapi_entry():
+    entry = response_cache.get("openapi")
+    if entry is None:
+        entry = response_cache.put(
+            "openapi", app.openapi(), settings.static_cache_max_age,
+            precompress_min_size=settings.compression_min_size
+        )
+    return entry
+
 # Include routers
 app.include_router(time_router.router)
 app.include_router(weather_router.router)
+app.include_router(feed_router.router)
 
 @app.get("/")
-async def root():
+async def root(request: Request):
     """نقطة دخول التطبيق - رسالة ترحيب"""
     logger.info("🏠 Root endpoint accessed")
+    return response_cache.respond(request, _root_entry())
+
+def _root_entry():
+    entry = response_cache.get("root")
+    if entry is None:
+        entry = response_cache.put(
+            "root", _root_payload(), settings.static_cache_max_age,
+            precompress_min_size=settings.compression_min_size
+        )
+    return entry
+
+def _prime_static_responses():
+    _root_entry()
+    weather_router.supported_cities_entry()
+
+def _root_payload() -> dict:
     return {
         "message": "مرحباً بك في API الوقت والطقس",
         "version": "1.0.0",
         "status": "running",
         "endpoints": {
             "time_comparison": "/time/comparison?city1=Cairo&city2=London",
+            "time_at_location": "/time/at?lat=30.0444&lng=31.2357",
             "weather": "/weather/?city=Cairo",
             "supported_cities": "/weather/cities",
+            "live_feed": "/feed/stream?cities=Cairo,London",
+            "readiness": "/ready",
             "docs": "/docs",
             "redoc": "/redoc"
         },
@@ -163,16 +307,110 @@ async def health_check():
         }
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """جاهزية العامل لاستقبال الطلبات (بعد اكتمال التهيئة المسبقة)"""
+    if not startup_warmup.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "warming_up", "warmup": startup_warmup.stats()},
+            headers={"Retry-After": "1"}
+        )
+    return {"status": "ready", "warmup": startup_warmup.stats()}
+
 @app.get("/metrics")
 async def get_performance_metrics():
     """الحصول على مقاييس الأداء"""
     logger.info("📊 Performance metrics accessed")
     return {
         "performance": performance_metrics.get_metrics_summary(),
+        "geocoder": {
+            "rate_limiter": time_service.geocoder_limiter.stats(),
+            "negative_cache": time_service.negative_cache.stats()
+        },
+        "timezone_grid": time_service.timezone_grid.stats(),
+        "feed": feed_broadcaster.stats(),
+        "weather_prefetch": weather_prefetcher.stats(),
+        "http_cache": response_cache.stats(),
+        "compression": compression_stats(),
+        "warmup": startup_warmup.stats(),
+        "cache_backend": get_cache_backend().stats(),
+        "deadlines": deadline_stats(),
+        "hedging": {
+            "weather": weather_service.hedger.stats(),
+            "geocoder": time_service.geocode_hedger.stats()
+        },
+        "admission": admission_controller.stats(),
+        "bulkheads": {
+            "geocoder": time_service.geocode_bulkhead.stats(),
+            "timezone_lookup": time_service.timezone_bulkhead.stats(),
+            "weather": weather_service.bulkhead.stats()
+        },
+        "event_loop": loop_lag_monitor.stats(),
         "timestamp": time.time(),
         "status": "monitoring_active"
     }
 
+# تشخيص الذاكرة (معطل افتراضياً: MEMORY_DEBUG=true لتفعيله)
+def _require_memory_debug():
+    if not settings.memory_debug:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+def _internal_cache_sizes() -> dict:
+    """أحجام التخزين المؤقت الداخلي وحاويات المقاييس"""
+    return {
+        "cache_result": {
+            "geocode_entries": len(TimeService._geocode_timezone.entries()),
+            "weather_entries": len(WeatherService._fetch_weather_data.entries()),
+            "backend": get_cache_backend().stats()
+        },
+        "geocode_negative_cache": len(time_service.negative_cache),
+        "timezone_grid_cells": len(time_service.timezone_grid),
+        "http_response_cache": response_cache.stats()["entries"],
+        "weather_popularity": len(weather_service.popularity),
+        "metrics_buffers": {
+            "geocoder_rate_limiter": buffer_sizes(time_service.geocoder_limiter),
+            "hedging_weather": buffer_sizes(weather_service.hedger.latency),
+            "hedging_geocoder": buffer_sizes(time_service.geocode_hedger.latency),
+            "admission": buffer_sizes(admission_controller),
+            "bulkhead_geocoder": buffer_sizes(time_service.geocode_bulkhead),
+            "bulkhead_timezone_lookup": buffer_sizes(time_service.timezone_bulkhead),
+            "bulkhead_weather": buffer_sizes(weather_service.bulkhead),
+            "event_loop": buffer_sizes(loop_lag_monitor)
+        }
+    }
+
+@app.get("/debug/memory")
+async def memory_summary():
+    """الذاكرة المقيمة والمتتبعة وأحجام التخزين المؤقت الداخلي"""
+    _require_memory_debug()
+    return {**memory_profiler.summary(), "caches": _internal_cache_sizes()}
+
+@app.post("/debug/memory/snapshot")
+async def memory_snapshot(group_by: str = Query("lineno", pattern=GROUP_BY_PATTERN)):
+    """بدء tracemalloc وحفظ لقطة أساس مع أكبر مواضع التخصيص"""
+    _require_memory_debug()
+    logger.info("🧠 Memory snapshot requested")
+    # أخذ اللقطة يمر على كل التخصيصات؛ خارج حلقة الأحداث
+    report = await asyncio.to_thread(memory_profiler.snapshot, group_by)
+    return {**report, "caches": _internal_cache_sizes()}
+
+@app.get("/debug/memory/diff")
+async def memory_diff(group_by: str = Query("lineno", pattern=GROUP_BY_PATTERN)):
+    """مواضع التخصيص التي زادت منذ لقطة الأساس"""
+    _require_memory_debug()
+    report = await asyncio.to_thread(memory_profiler.diff, group_by)
+    if report is None:
+        raise HTTPException(status_code=409, detail="لا توجد لقطة أساس؛ أرسل POST /debug/memory/snapshot أولاً")
+    return {**report, "caches": _internal_cache_sizes()}
+
+@app.delete("/debug/memory/snapshot")
+async def memory_snapshot_delete():
+    """حذف لقطة الأساس وإيقاف tracemalloc"""
+    _require_memory_debug()
+    memory_profiler.stop()
+    return memory_profiler.summary()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -1,9 +1,11 @@
-from .time_models import TimeInfo, TimeComparisonResponse
+from .time_models import TimeInfo, TimeComparisonResponse, TimeComparisonSeriesResponse, TimeAtLocationResponse
 from .weather_models import WeatherResponse, WeatherData
 
 __all__ = [
     "TimeInfo",
     "TimeComparisonResponse", 
+    "TimeComparisonSeriesResponse",
+    "TimeAtLocationResponse",
     "WeatherResponse",
     "WeatherData"
 ]
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 
 class TimeInfo(BaseModel):
@@ -30,4 +30,55 @@ class TimeComparisonResponse(BaseModel):
                 "city2_timezone": "Europe/London",
                 "time_difference_hours": 2.0
             }
-        }
\ No newline at end of file
+        }
+
+class TimeComparisonSeriesResponse(BaseModel):
+    """سلسلة فروق التوقيت بين مدينتين عبر فترة زمنية (تشمل تغييرات التوقيت الصيفي)"""
+    city1: str
+    city1_timezone: str
+    city2: str
+    city2_timezone: str
+    start: str
+    end: str
+    step_seconds: int
+    timestamps: List[str]
+    city1_offset_hours: List[float]
+    city2_offset_hours: List[float]
+    time_difference_hours: List[float]
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "city1": "Cairo",
+                "city1_timezone": "Africa/Cairo",
+                "city2": "London",
+                "city2_timezone": "Europe/London",
+                "start": "2024-03-30T00:00:00Z",
+                "end": "2024-04-27T00:00:00Z",
+                "step_seconds": 604800,
+                "timestamps": ["2024-03-30T00:00:00Z", "2024-04-06T00:00:00Z"],
+                "city1_offset_hours": [2.0, 2.0],
+                "city2_offset_hours": [0.0, 1.0],
+                "time_difference_hours": [2.0, 1.0]
+            }
+        }
+
+
+class TimeAtLocationResponse(BaseModel):
+    """الوقت الحالي عند إحداثيات جغرافية"""
+    latitude: float
+    longitude: float
+    timezone: str
+    current_time: str
+    utc_offset_hours: float
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "latitude": 30.0444,
+                "longitude": 31.2357,
+                "timezone": "Africa/Cairo",
+                "current_time": "2024-01-15T14:30:00",
+                "utc_offset_hours": 2.0
+            }
+        }
@@ -1,5 +1,7 @@
-from . import time_router
+from . import time_router, weather_router, feed_router
 
 __all__ = [
-    "time_router"
+    "time_router",
+    "weather_router",
+    "feed_router"
 ]
\ No newline at end of file
@@ -0,0 +1,70 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from ..services.city_registry import city_registry
+from ..services.feed_service import feed_broadcaster
+from ..utils.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/feed",
+    tags=["Live Feed"],
+    responses={400: {"description": "مدينة غير مدعومة في البث المباشر"}}
+)
+
+
+@router.get(
+    "/stream",
+    summary="بث مباشر للوقت والطقس (Server-Sent Events)",
+    description="اشتراك في مجموعة مدن لاستقبال الوقت كل ثانية والطقس عند كل تحديث",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}}
+)
+async def stream_feed(
+    request: Request,
+    cities: str = Query(..., description="أسماء المدن مفصولة بفواصل", examples=["Cairo,London,طوكيو"])
+):
+    """
+    بث مباشر للوحات المتابعة بدلاً من استدعاء /time/comparison و /weather/ كل ثانية
+    
+    - **cities**: المدن المطلوبة مفصولة بفواصل (من المدن المعروفة في /weather/cities وقائمة المدن المدعومة)
+    
+    الأحداث: `time` كل ثانية و `weather` عند كل تحديث للطقس
+    """
+    names = [name.strip() for name in cities.split(",") if name.strip()]
+    if not names or len(names) > settings.feed_max_cities:
+        raise HTTPException(
+            status_code=422,
+            detail=f"حدد بين مدينة واحدة و {settings.feed_max_cities} مدينة"
+        )
+    
+    records = []
+    for name in names:
+        record = city_registry.match(name)
+        if record is None:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "City not supported",
+                    "message": f"المدينة '{name}' غير مدعومة في البث المباشر"
+                }
+            )
+        records.append(record)
+    
+    subscription = feed_broadcaster.subscribe(records)
+    logger.info(f"📡 اشتراك جديد في البث: {', '.join(record.name_en for record in records)}")
+    
+    async def events():
+        try:
+            while True:
+                frames = await subscription.next_frames()
+                yield b"".join(frames)
+        finally:
+            feed_broadcaster.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
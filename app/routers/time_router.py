@@ -1,12 +1,24 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from fastapi.responses import JSONResponse
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, List, Optional, Tuple, Union
 from ..services.time_service import time_service
-from ..models.time_models import TimeComparisonResponse
-from ..utils.exceptions import CityNotFoundException, TimezoneNotFoundException
+from ..models.time_models import TimeComparisonResponse, TimeComparisonSeriesResponse, TimeAtLocationResponse
+from ..utils.exceptions import (
+    CityNotFoundException, TimezoneNotFoundException, RateLimitExceededException, DeadlineExceededException
+)
+from ..utils.config import settings
+from ..utils.streaming import DuplexStreamingResponse, iter_line_batches
+import asyncio
+import json
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# وحدات الخطوة المدعومة في سلسلة فروق التوقيت
+STEP_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+
 router = APIRouter(
     prefix="/time",
     tags=["Time APIs"],
@@ -61,7 +73,9 @@ async def compare_times(
             )
         
         # الحصول على مقارنة الأوقات
-        result = time_service.calculate_time_difference(
+        result = await _call_time_service(
+            (city1.strip(), city2.strip()),
+            time_service.calculate_time_difference,
             city1.strip(), 
             city2.strip()
         )
@@ -95,6 +109,12 @@ async def compare_times(
             }
         )
     
+    except RateLimitExceededException as e:
+        raise _rate_limited_error(e)
+    
+    except DeadlineExceededException:
+        raise
+    
     except Exception as e:
         logger.error(f"خطأ غير متوقع في مقارنة الأوقات: {str(e)}")
         raise HTTPException(
@@ -103,4 +123,275 @@ async def compare_times(
                 "error": "Internal server error",
                 "message": "حدث خطأ غير متوقع، يرجى المحاولة مرة أخرى"
             }
-        )
\ No newline at end of file
+        )
+
+
+async def _call_time_service(cities: Tuple[str, ...], func, *args):
+    """
+    الحسابات المحلية تُنفذ مباشرة، وما قد يحتاج بحثاً جغرافياً يُنفذ في خيوط البحث
+    الجغرافي الخاصة حتى لا يعطل حلقة الأحداث أو خيوط الاعتماديات الأخرى
+    (مهلة الطلب تنتقل للخيط مع السياق)
+    """
+    if all(time_service.resolves_locally(city) for city in cities):
+        return func(*args)
+    return await time_service.geocode_bulkhead.run(func, *args)
+
+
+def _rate_limited_error(e: RateLimitExceededException) -> HTTPException:
+    """استجابة 503 سريعة عندما يكون طابور البحث الجغرافي ممتلئاً"""
+    logger.warning(f"تم رفض طلب البحث الجغرافي: {str(e)}")
+    return HTTPException(
+        status_code=503,
+        detail={
+            "error": "Geocoder busy",
+            "message": "خدمة البحث الجغرافي مشغولة حالياً، يرجى المحاولة بعد قليل"
+        },
+        headers={"Retry-After": str(max(1, round(e.retry_after)))}
+    )
+
+
+def _parse_step(step: str) -> int:
+    """تحويل الخطوة (مثل 30m أو 6h أو 1d أو 1w أو عدد ثوانٍ) إلى ثوانٍ"""
+    match = re.fullmatch(r"\s*(\d+)\s*([mhdw]?)\s*", step.lower())
+    if not match or int(match.group(1)) <= 0:
+        raise HTTPException(
+            status_code=422,
+            detail="صيغة الخطوة غير صحيحة، استخدم مثلاً 30m أو 6h أو 1d أو 1w"
+        )
+    return int(match.group(1)) * STEP_UNITS.get(match.group(2), 1)
+
+
+def _as_utc(moment: datetime) -> datetime:
+    """اعتبار التواريخ بدون منطقة زمنية بتوقيت UTC"""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+@router.get(
+    "/comparison/series",
+    response_model=TimeComparisonSeriesResponse,
+    summary="سلسلة فروق التوقيت بين مدينتين عبر فترة زمنية",
+    description="حساب فرق التوقيت لكل خطوة بين تاريخين، مع مراعاة تغييرات التوقيت الصيفي"
+)
+async def compare_times_series(
+    city1: str = Query(..., description="اسم المدينة الأولى", example="Cairo"),
+    city2: str = Query(..., description="اسم المدينة الثانية", example="London"),
+    start: Optional[datetime] = Query(
+        None, alias="from", description="بداية الفترة بصيغة ISO (الافتراضي: الآن، UTC)"
+    ),
+    end: Optional[datetime] = Query(
+        None, alias="to", description="نهاية الفترة بصيغة ISO (الافتراضي: بعد سنة من البداية)"
+    ),
+    step: str = Query("1d", description="الخطوة بين النقاط: 30m أو 6h أو 1d أو 1w", example="1d")
+):
+    """
+    سلسلة فروق التوقيت بين مدينتين
+    
+    - **city1**, **city2**: اسما المدينتين (مطلوبان)
+    - **from**, **to**: بداية ونهاية الفترة (اختياريان)
+    - **step**: الخطوة بين النقاط
+    
+    تُحسب كل النقاط دفعة واحدة من جداول انتقالات المناطق الزمنية
+    """
+    if not city1.strip() or not city2.strip():
+        raise HTTPException(status_code=422, detail="اسما المدينتين مطلوبان")
+    
+    step_seconds = _parse_step(step)
+    start = _as_utc(start) if start else datetime.now(timezone.utc).replace(microsecond=0)
+    end = _as_utc(end) if end else start + timedelta(days=365)
+    
+    if end < start:
+        raise HTTPException(status_code=422, detail="يجب أن تكون نهاية الفترة بعد بدايتها")
+    
+    points = int((end - start).total_seconds() // step_seconds) + 1
+    if points > settings.max_series_points:
+        raise HTTPException(
+            status_code=422,
+            detail=f"عدد النقاط ({points}) أكبر من الحد المسموح ({settings.max_series_points})، استخدم خطوة أكبر"
+        )
+    
+    try:
+        logger.info(f"طلب سلسلة فروق التوقيت بين {city1} و {city2} ({points} نقطة)")
+        return await _call_time_service(
+            (city1.strip(), city2.strip()),
+            time_service.calculate_time_difference_series,
+            city1.strip(), city2.strip(), start, end, step_seconds
+        )
+    except CityNotFoundException as e:
+        logger.warning(f"مدينة غير موجودة: {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "City not found",
+                "message": f"لم يتم العثور على المدينة '{str(e)}'. جرب اسم مدينة مختلف أو تأكد من الإملاء."
+            }
+        )
+    except TimezoneNotFoundException as e:
+        logger.error(f"خطأ في المنطقة الزمنية: {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Timezone error",
+                "message": str(e)
+            }
+        )
+    except RateLimitExceededException as e:
+        raise _rate_limited_error(e)
+
+
+@router.get(
+    "/at",
+    response_model=TimeAtLocationResponse,
+    summary="الوقت الحالي عند إحداثيات جغرافية",
+    description="تحديد المنطقة الزمنية من خط العرض وخط الطول (مثل مواقع GPS) وإرجاع الوقت الحالي"
+)
+async def get_time_at_location(
+    lat: float = Query(..., ge=-90, le=90, description="خط العرض", example=30.0444),
+    lng: float = Query(..., ge=-180, le=180, description="خط الطول", example=31.2357)
+):
+    """
+    الوقت الحالي عند إحداثيات جغرافية
+    
+    - **lat**: خط العرض بين -90 و 90
+    - **lng**: خط الطول بين -180 و 180
+    
+    الإحداثيات المتقاربة تُجاب من الذاكرة؛ النقاط القريبة من الحدود تُحسب بدقة
+    """
+    try:
+        if time_service.locates_locally(lat, lng):
+            return time_service.get_time_at_location(lat, lng)
+        # البحث في المضلعات يُنفذ في خيوطه الخاصة
+        return await time_service.timezone_bulkhead.run(time_service.get_time_at_location, lat, lng)
+    except TimezoneNotFoundException as e:
+        logger.warning(f"لا توجد منطقة زمنية للإحداثيات: {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Timezone error",
+                "message": f"لم يتم العثور على منطقة زمنية للإحداثيات ({lat}, {lng})"
+            }
+        )
+
+
+def _stream_record(line_number: int, **fields) -> bytes:
+    """سطر NDJSON واحد في استجابة التدفق"""
+    return (json.dumps({"line": line_number, **fields}, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _parse_pair(line_number: int, line: Optional[bytes]) -> Union[Tuple[str, str], bytes]:
+    """قراءة زوج المدن من سطر الطلب، أو سطر الخطأ المناسب"""
+    if line is None:
+        return _stream_record(
+            line_number, error="line_too_long",
+            message=f"السطر أطول من {settings.stream_max_line_bytes} بايت"
+        )
+    try:
+        pair = json.loads(line)
+        city1, city2 = pair["city1"].strip(), pair["city2"].strip()
+    except (ValueError, KeyError, TypeError, AttributeError):
+        city1 = city2 = ""
+    if not city1 or not city2:
+        return _stream_record(
+            line_number, error="invalid_request",
+            message='كل سطر يجب أن يكون كائن JSON مثل {"city1": "Cairo", "city2": "London"}'
+        )
+    return city1, city2
+
+
+def _compare_record(line_number: int, city1: str, city2: str) -> bytes:
+    """مقارنة زوج واحد وتحويل النتيجة أو الخطأ إلى سطر NDJSON"""
+    try:
+        result = time_service.calculate_time_difference(city1, city2)
+    except CityNotFoundException as e:
+        return _stream_record(line_number, error="city_not_found", message=str(e))
+    except TimezoneNotFoundException as e:
+        return _stream_record(line_number, error="timezone_error", message=str(e))
+    except RateLimitExceededException as e:
+        return _stream_record(line_number, error="rate_limited", message=str(e), retry_after=e.retry_after)
+    except DeadlineExceededException as e:
+        return _stream_record(line_number, error="deadline_exceeded", message=str(e))
+    return _stream_record(line_number, **result.model_dump())
+
+
+async def _compare_in_bulkhead(line_number: int, city1: str, city2: str) -> bytes:
+    """مقارنة زوج يحتاج بحثاً جغرافياً في خيوط البحث الجغرافي الخاصة"""
+    try:
+        return await time_service.geocode_bulkhead.run(_compare_record, line_number, city1, city2)
+    except RateLimitExceededException as e:
+        return _stream_record(line_number, error="rate_limited", message=str(e), retry_after=e.retry_after)
+
+
+async def _stream_comparisons(request: Request) -> AsyncIterator[bytes]:
+    """
+    مقارنة الأزواج أثناء قراءتها وكتابة النتائج فور جاهزيتها
+
+    الأزواج المعروفة محلياً تُحسب مباشرة، والتي تحتاج بحثاً جغرافياً تُنفذ في
+    خيوط البحث الجغرافي بحد أقصى stream_max_in_flight في نفس الوقت. عند امتلاء هذا
+    الحد يتوقف قراءة الطلب حتى تكتمل إحداها، وكتابة النتائج تنتظر العميل، فتبقى
+    الذاكرة محدودة مهما كان حجم المدخلات.
+    """
+    pending = set()
+    line_number = 0
+    
+    def completed() -> List[bytes]:
+        done = [task for task in pending if task.done()]
+        pending.difference_update(done)
+        return [task.result() for task in done]
+    
+    try:
+        async for lines in iter_line_batches(request.stream(), settings.stream_max_line_bytes):
+            output = []
+            for line in lines:
+                line_number += 1
+                if line is not None and not line.strip():
+                    continue
+                
+                parsed = _parse_pair(line_number, line)
+                if isinstance(parsed, bytes):
+                    output.append(parsed)
+                    continue
+                
+                city1, city2 = parsed
+                if time_service.resolves_locally(city1) and time_service.resolves_locally(city2):
+                    output.append(_compare_record(line_number, city1, city2))
+                    continue
+                
+                if len(pending) >= settings.stream_max_in_flight:
+                    await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    # إخراج ما اكتمل فوراً حتى يبقى الحد صحيحاً داخل نفس الدفعة
+                    output.extend(completed())
+                pending.add(asyncio.ensure_future(_compare_in_bulkhead(line_number, city1, city2)))
+            
+            output.extend(completed())
+            if output:
+                yield b"".join(output)
+        
+        while pending:
+            await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            yield b"".join(completed())
+    finally:
+        # انقطاع الاتصال: إلغاء ما لم يبدأ بعد
+        for task in pending:
+            task.cancel()
+
+
+@router.post(
+    "/comparison/stream",
+    summary="مقارنة الأوقات لعدد كبير من أزواج المدن (NDJSON)",
+    description="جسم الطلب سطر JSON لكل زوج مدن، والاستجابة سطر JSON لكل نتيجة فور جاهزيتها",
+    response_class=DuplexStreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}}
+)
+async def compare_times_stream(request: Request):
+    """
+    مقارنة الأوقات بالجملة عبر NDJSON
+    
+    - كل سطر في الطلب: `{"city1": "Cairo", "city2": "London"}`
+    - كل سطر في الاستجابة: حقول TimeComparisonResponse مع `line` (رقم سطر الطلب)،
+      أو `line` و `error` و `message` عند فشل ذلك السطر
+    
+    النتائج تُكتب بترتيب اكتمالها وليس بالضرورة بترتيب الطلب
+    """
+    logger.info("طلب مقارنة أوقات متدفق (NDJSON)")
+    return DuplexStreamingResponse(_stream_comparisons(request), media_type="application/x-ndjson")
@@ -1,8 +1,13 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import Annotated
 from ..services.weather_service import weather_service
+from ..services.city_registry import city_registry
+from ..utils.http_cache import response_cache
+from ..utils.config import settings
 from ..models.weather_models import WeatherResponse
-from ..utils.exceptions import CityNotFoundException, WeatherServiceException
+from ..utils.exceptions import (
+    CityNotFoundException, WeatherServiceException, DeadlineExceededException, BulkheadFullException
+)
 
 router = APIRouter(
     prefix="/weather",
@@ -13,6 +18,7 @@ router = APIRouter(
 
 @router.get("/", response_model=WeatherResponse)
 async def get_weather(
+    request: Request,
     city: Annotated[str, Query(
         description="اسم المدينة للحصول على معلومات الطقس",
         example="القاهرة"
@@ -27,6 +33,9 @@ async def get_weather(
     - القاهرة / Cairo
     - الرياض / Riyadh  
     - لندن / London
+    
+    الاستجابة تحمل ETag و Cache-Control حسب صلاحية بيانات الطقس المخزنة. ما دامت
+    الاستجابة المخزنة صالحة تُعاد (أو 304 مع If-None-Match مطابق) دون استدعاء خدمة الطقس
     """
     # التحقق من صحة معامل المدينة
     if not city or not city.strip():
@@ -35,11 +44,25 @@ async def get_weather(
             detail="يجب تحديد اسم المدينة"
         )
     
+    record = city_registry.match(city.strip())
+    cache_key = f"weather:{record.city_id}" if record is not None else None
+    
+    # استجابة مخزنة صالحة: 304 أو نفس البايتات المرمّزة دون استدعاء الخدمة
+    entry = response_cache.get(cache_key) if cache_key else None
+    if entry is not None:
+        weather_service.popularity.record(record.city_id)
+        return response_cache.respond(request, entry)
+    
     try:
         
         # الحصول على معلومات الطقس
         weather_info = await weather_service.get_weather(city.strip())
-        return weather_info
+        if cache_key is None:
+            return weather_info
+        
+        ttl = weather_service.cache_expires_in(record.city_id) or settings.weather_cache_ttl
+        entry = response_cache.put(cache_key, weather_info, ttl)
+        return response_cache.respond(request, entry)
         
     except CityNotFoundException as e:
         raise HTTPException(
@@ -51,6 +74,8 @@ async def get_weather(
             status_code=503,
             detail=f"خطأ في خدمة الطقس: {str(e)}"
         )
+    except (DeadlineExceededException, BulkheadFullException):
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -59,15 +84,29 @@ async def get_weather(
 
 
 @router.get("/cities", response_model=dict)
-async def get_supported_cities():
+async def get_supported_cities(request: Request):
     """
     الحصول على قائمة المدن المدعومة
     """
+    return response_cache.respond(request, supported_cities_entry())
+
+
+def supported_cities_entry():
+    """استجابة قائمة المدن المرمّزة والمضغوطة مسبقاً"""
+    entry = response_cache.get("weather:cities")
+    if entry is None:
+        entry = response_cache.put(
+            "weather:cities", _supported_cities_payload(), settings.static_cache_max_age,
+            precompress_min_size=settings.compression_min_size
+        )
+    return entry
+
+
+def _supported_cities_payload() -> dict:
     return {
         "supported_cities": [
-            {"arabic": "القاهرة", "english": "Cairo"},
-            {"arabic": "الرياض", "english": "Riyadh"},
-            {"arabic": "لندن", "english": "London"}
+            {"arabic": record.name_ar, "english": record.name_en}
+            for record in weather_service.get_supported_cities()
         ],
         "message": "يمكنك استخدام الأسماء العربية أو الإنجليزية للمدن"
     }
\ No newline at end of file
@@ -1,7 +1,11 @@
+from .city_registry import CityRegistry, CityRecord, city_registry
 from .time_service import TimeService, time_service
 from .weather_service import WeatherService, weather_service
 
 __all__ = [
+    "CityRegistry",
+    "CityRecord",
+    "city_registry",
     "TimeService",
     "time_service",
     "WeatherService", 
@@ -0,0 +1,104 @@
+"""
+سجل موحد للمدن المعروفة تشترك فيه خدمتا الوقت والطقس
+
+كل مدينة سجل مضغوط واحد بمعرّف ثابت (interned)، وكل أسمائها المستعارة
+تُطبَّع مرة واحدة عند بدء التشغيل وتُربط بنفس السجل، فيكون البحث في كل
+المسارات تطبيعاً واحداً ثم بحثاً واحداً في قاموس.
+"""
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..utils.city_matching import FuzzyCityIndex, normalize_city_name
+
+
+class CityRecord:
+    """بيانات مدينة واحدة في السجل"""
+
+    __slots__ = ("city_id", "name_en", "name_ar", "timezone", "aliases")
+
+    def __init__(self, name_en: str, name_ar: str, timezone: str, aliases: Tuple[str, ...] = ()):
+        self.city_id = sys.intern(normalize_city_name(name_en))
+        self.name_en = name_en
+        self.name_ar = name_ar
+        self.timezone = timezone
+        self.aliases = (name_en, name_ar) + tuple(aliases)
+
+    def __repr__(self) -> str:
+        return f"CityRecord({self.city_id!r}, {self.timezone!r})"
+
+
+# (الاسم الإنجليزي، الاسم العربي، المنطقة الزمنية، أسماء مستعارة إضافية)
+KNOWN_CITIES = [
+    # مدن عربية
+    ("Cairo", "القاهرة", "Africa/Cairo", ()),
+    ("Riyadh", "الرياض", "Asia/Riyadh", ()),
+    ("Dubai", "دبي", "Asia/Dubai", ()),
+    ("Beirut", "بيروت", "Asia/Beirut", ()),
+    ("Baghdad", "بغداد", "Asia/Baghdad", ()),
+    ("Damascus", "دمشق", "Asia/Damascus", ()),
+    ("Amman", "عمان", "Asia/Amman", ()),
+
+    # مدن عالمية
+    ("London", "لندن", "Europe/London", ()),
+    ("Paris", "باريس", "Europe/Paris", ()),
+    ("New York", "نيويورك", "America/New_York", ("NYC",)),
+    ("Tokyo", "طوكيو", "Asia/Tokyo", ()),
+    ("Moscow", "موسكو", "Europe/Moscow", ()),
+    ("Sydney", "سيدني", "Australia/Sydney", ()),
+]
+
+
+class CityRegistry:
+    """
+    سجل المدن: كل الأسماء المستعارة المطبّعة ← سجل المدينة
+
+    - lookup: مطابقة تامة بعد التطبيع (O(1))
+    - match: المطابقة التامة ثم التقريبية للأخطاء الإملائية
+    """
+
+    def __init__(self, records: Iterable[CityRecord]):
+        self._by_id: Dict[str, CityRecord] = {}
+        self._by_alias: Dict[str, CityRecord] = {}
+
+        for record in records:
+            self._by_id[record.city_id] = record
+            for alias in record.aliases:
+                key = normalize_city_name(alias)
+                if key:
+                    self._by_alias.setdefault(sys.intern(key), record)
+
+        self._fuzzy_index = FuzzyCityIndex(
+            {alias: record.city_id for alias, record in self._by_alias.items()}
+        )
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, city_id: str) -> Optional[CityRecord]:
+        """الحصول على سجل المدينة من معرّفها"""
+        return self._by_id.get(city_id)
+
+    def lookup(self, name: str) -> Optional[CityRecord]:
+        """المطابقة التامة بعد التطبيع"""
+        return self._by_alias.get(normalize_city_name(name))
+
+    def match(self, name: str) -> Optional[CityRecord]:
+        """المطابقة التامة ثم التقريبية (None إذا لم يوجد تطابق أو كان ملتبساً)"""
+        key = normalize_city_name(name)
+        record = self._by_alias.get(key)
+        if record is not None:
+            return record
+
+        city_id = self._fuzzy_index.match(name)
+        return self._by_id.get(city_id) if city_id is not None else None
+
+    def records(self) -> List[CityRecord]:
+        """كل المدن بترتيب إضافتها"""
+        return list(self._by_id.values())
+
+
+# إنشاء سجل واحد تشترك فيه كل الخدمات
+city_registry = CityRegistry(
+    CityRecord(name_en, name_ar, timezone, aliases)
+    for name_en, name_ar, timezone, aliases in KNOWN_CITIES
+)
@@ -0,0 +1,188 @@
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+import pytz
+
+from .city_registry import CityRecord, city_registry
+from .weather_service import weather_service
+from ..utils.exceptions import (
+    CityNotFoundException, WeatherServiceException, RateLimitExceededException, DeadlineExceededException
+)
+from ..utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def encode_event(event: str, payload: dict) -> bytes:
+    """ترميز حدث Server-Sent Events جاهز للإرسال"""
+    data = json.dumps(payload, ensure_ascii=False)
+    return f"event: {event}\ndata: {data}\n\n".encode("utf-8")
+
+
+class Subscription:
+    """
+    اشتراك عميل واحد في مجموعة مدن
+
+    الأحداث تنتظر في طابور محدود؛ إذا تأخر العميل تُحذف أقدمها بدلاً من
+    إبطاء البث لباقي المشتركين.
+    """
+
+    __slots__ = ("city_ids", "frames", "dropped", "_event")
+
+    def __init__(self, city_ids: Iterable[str], max_pending: int):
+        self.city_ids = frozenset(city_ids)
+        self.frames = deque(maxlen=max_pending)
+        self.dropped = 0
+        self._event = asyncio.Event()
+
+    def push(self, frame: bytes) -> None:
+        if len(self.frames) == self.frames.maxlen:
+            self.dropped += 1
+        self.frames.append(frame)
+        self._event.set()
+
+    async def next_frames(self) -> List[bytes]:
+        """انتظار الأحداث الجديدة وإرجاعها كلها"""
+        await self._event.wait()
+        self._event.clear()
+        frames = list(self.frames)
+        self.frames.clear()
+        return frames
+
+
+class FeedBroadcaster:
+    """
+    بث الوقت والطقس للوحات المتابعة
+
+    كل تحديث (الوقت كل tick_seconds والطقس كل weather_refresh_seconds) يُحسب
+    ويُرمّز مرة واحدة لكل مدينة، ثم يُرسل نفس الحدث المرمّز لكل المشتركين في
+    تلك المدينة مهما كان عددهم. البث يعمل فقط طالما يوجد مشتركون. تحديث الطقس
+    يعمل في مهمة منفصلة حتى لا تؤخر خدمة طقس بطيئة أحداث الوقت.
+    """
+
+    def __init__(
+        self,
+        tick_seconds: float = 1.0,
+        weather_refresh_seconds: float = 60.0,
+        max_pending_frames: int = 100
+    ):
+        self.tick_seconds = tick_seconds
+        self.weather_refresh_seconds = weather_refresh_seconds
+        self.max_pending_frames = max_pending_frames
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._latest: Dict[str, Dict[str, bytes]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._weather_task: Optional[asyncio.Task] = None
+        self._weather_due_at = 0.0
+
+        # مقاييس
+        self.frames_encoded = 0
+        self.frames_sent = 0
+
+    def subscribe(self, records: Iterable[CityRecord]) -> Subscription:
+        """تسجيل مشترك جديد وإرسال آخر الأحداث المعروفة لمدنه فوراً"""
+        subscription = Subscription((record.city_id for record in records), self.max_pending_frames)
+        for city_id in subscription.city_ids:
+            self._subscribers.setdefault(city_id, set()).add(subscription)
+            latest = self._latest.get(city_id, {})
+            for frame in latest.values():
+                subscription.push(frame)
+            if "weather" not in latest:
+                # مدينة جديدة في البث: تحديث الطقس في الـ tick التالي بدلاً من انتظار الدورة
+                self._weather_due_at = 0.0
+
+        if self._task is None or self._task.done() or self._task.get_loop() is not asyncio.get_running_loop():
+            self._task = asyncio.create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for city_id in subscription.city_ids:
+            subscribers = self._subscribers.get(city_id)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[city_id]
+                self._latest.pop(city_id, None)
+
+    def _broadcast(self, city_id: str, event: str, frame: bytes) -> None:
+        self.frames_encoded += 1
+        self._latest.setdefault(city_id, {})[event] = frame
+        for subscription in self._subscribers.get(city_id, ()):
+            subscription.push(frame)
+            self.frames_sent += 1
+
+    def publish_time(self) -> None:
+        """حساب الوقت الحالي مرة واحدة لكل مدينة مشترك فيها وبثه"""
+        for city_id in list(self._subscribers):
+            record = city_registry.get(city_id)
+            current_time = datetime.now(pytz.timezone(record.timezone))
+            self._broadcast(city_id, "time", encode_event("time", {
+                "city": record.name_en,
+                "city_ar": record.name_ar,
+                "timezone": record.timezone,
+                "current_time": current_time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "utc_offset_hours": current_time.utcoffset().total_seconds() / 3600
+            }))
+
+    async def _publish_city_weather(self, city_id: str) -> None:
+        record = city_registry.get(city_id)
+        try:
+            weather = await weather_service.get_weather(record.name_en)
+        except (CityNotFoundException, WeatherServiceException, RateLimitExceededException, DeadlineExceededException):
+            return
+        if city_id in self._subscribers:
+            self._broadcast(city_id, "weather", encode_event("weather", weather.model_dump()))
+
+    async def publish_weather(self) -> None:
+        """تحديث الطقس لكل مدينة مشترك فيها بالتوازي وبثه، بحد أقصى دورة تحديث واحدة"""
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(self._publish_city_weather(city_id) for city_id in list(self._subscribers))),
+                timeout=self.weather_refresh_seconds
+            )
+        except asyncio.TimeoutError:
+            logger.warning("⏰ Feed weather refresh timed out")
+
+    async def _run(self) -> None:
+        logger.info("📡 Feed broadcaster started")
+        try:
+            while self._subscribers:
+                self.publish_time()
+                weather_idle = self._weather_task is None or self._weather_task.done()
+                if weather_idle and time.monotonic() >= self._weather_due_at:
+                    self._weather_task = asyncio.create_task(self.publish_weather())
+                    self._weather_due_at = time.monotonic() + self.weather_refresh_seconds
+
+                # بداية كل tick على حدود الثواني حتى تتزامن ساعات كل العملاء
+                await asyncio.sleep(self.tick_seconds - time.time() % self.tick_seconds)
+        finally:
+            if self._weather_task is not None:
+                self._weather_task.cancel()
+                self._weather_task = None
+            self._weather_due_at = 0.0
+            logger.info("📡 Feed broadcaster stopped")
+
+    def stats(self) -> Dict[str, int]:
+        """مقاييس البث"""
+        subscriptions = {subscription for subscribers in self._subscribers.values() for subscription in subscribers}
+        return {
+            "subscribers": len(subscriptions),
+            "cities": len(self._subscribers),
+            "frames_encoded": self.frames_encoded,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": sum(subscription.dropped for subscription in subscriptions)
+        }
+
+
+# إنشاء مثيل واحد من خدمة البث
+feed_broadcaster = FeedBroadcaster(
+    tick_seconds=settings.feed_tick_seconds,
+    weather_refresh_seconds=settings.feed_weather_refresh_seconds,
+    max_pending_frames=settings.feed_max_pending_frames
+)
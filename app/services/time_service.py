@@ -1,76 +1,158 @@
 from datetime import datetime
+import uuid
+import numpy as np
 import pytz
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 from geopy.geocoders import Nominatim
 from timezonefinder import TimezoneFinder
-from ..utils.exceptions import CityNotFoundException, TimezoneNotFoundException
-from ..models.time_models import TimeInfo, TimeComparisonResponse
+from ..utils.exceptions import (
+    CityNotFoundException, TimezoneNotFoundException, RateLimitExceededException, DeadlineExceededException
+)
+from ..models.time_models import (
+    TimeInfo, TimeComparisonResponse, TimeComparisonSeriesResponse, TimeAtLocationResponse
+)
+from ..utils.timezone_tables import utc_offsets_at
+from ..utils.timezone_grid import QuantizedTimezoneCache
+from ..utils.negative_cache import NegativeCache
+from ..utils.rate_limiter import RateLimitedQueue
+from ..utils.hedging import Hedger
+from ..utils.bulkhead import Bulkhead
+from ..utils.performance import cache_result
+from ..utils.deadline import check_deadline, deadline_at, time_left
+from ..utils.config import settings
+from .city_registry import city_registry
 
 
 class TimeService:
     """خدمة الوقت والمناطق الزمنية"""
     
-    def __init__(self):
+    def __init__(self, cache_namespace: Optional[str] = None):
+        # يمثّل الخدمة في مفاتيح التخزين المؤقت؛ المثيل المشترك له اسم ثابت حتى
+        # تتشارك كل العمليات نتائجه، وأي مثيل آخر له تخزينه الخاص
+        self.cache_namespace = cache_namespace or f"time-{uuid.uuid4().hex}"
+        
         # إعداد أدوات البحث الجغرافي
         self.geolocator = Nominatim(user_agent="fastapi-time-weather")
         self.tf = TimezoneFinder()
         
-        # قاموس المدن الشائعة للبحث السريع (اختياري)
-        self.city_timezones = {
-            # مدن عربية
-            "cairo": "Africa/Cairo",
-            "القاهرة": "Africa/Cairo",
-            "riyadh": "Asia/Riyadh", 
-            "الرياض": "Asia/Riyadh",
-            "dubai": "Asia/Dubai",
-            "دبي": "Asia/Dubai",
-            "beirut": "Asia/Beirut",
-            "بيروت": "Asia/Beirut",
-            "baghdad": "Asia/Baghdad",
-            "بغداد": "Asia/Baghdad",
-            "damascus": "Asia/Damascus",
-            "دمشق": "Asia/Damascus",
-            "amman": "Asia/Amman",
-            "عمان": "Asia/Amman",
-            
-            # مدن عالمية
-            "london": "Europe/London",
-            "لندن": "Europe/London",
-            "paris": "Europe/Paris",
-            "باريس": "Europe/Paris",
-            "new york": "America/New_York",
-            "نيويورك": "America/New_York",
-            "tokyo": "Asia/Tokyo",
-            "طوكيو": "Asia/Tokyo",
-            "moscow": "Europe/Moscow",
-            "موسكو": "Europe/Moscow",
-            "sydney": "Australia/Sydney",
-            "سيدني": "Australia/Sydney"
-        }
+        # نتائج TimezoneFinder للإحداثيات المتقاربة تُخزن على شبكة مكمّمة
+        self.timezone_grid = QuantizedTimezoneCache(
+            self.tf,
+            cell_degrees=settings.timezone_grid_cell_degrees,
+            max_cells=settings.timezone_grid_max_cells
+        )
+        
+        # سجل المدن المعروفة (مشترك مع خدمة الطقس) مع المطابقة التقريبية محلياً
+        self.city_registry = city_registry
+        
+        # الأسماء التي لم يجدها البحث الجغرافي تُرفض مباشرة حتى تنتهي صلاحيتها
+        self.negative_cache = NegativeCache(
+            ttl_seconds=settings.negative_cache_ttl,
+            max_entries=settings.negative_cache_max_entries
+        )
+        
+        # Nominatim العام يسمح بطلب واحد في الثانية تقريباً
+        self.geocoder_limiter = RateLimitedQueue(
+            "nominatim",
+            rate=settings.geocoder_rate_per_second,
+            burst=settings.geocoder_burst,
+            max_queue=settings.geocoder_max_queue
+        )
+        
+        # تحوّط طلبات البحث الجغرافي البطيئة (اختياري؛ المحاولة الثانية تخضع لنفس حد المعدل)
+        self.geocode_hedger = Hedger(
+            "geocoder",
+            budget_ratio=settings.hedge_budget_ratio,
+            min_samples=settings.hedge_min_samples,
+            enabled=settings.geocoder_hedging
+        )
+        
+        # سعة معزولة لكل اعتمادية: تعطل Nominatim لا يستهلك خيوط البحث في المضلعات أو غيرها
+        self.geocode_bulkhead = Bulkhead(
+            "geocoder",
+            max_concurrent=settings.geocoder_bulkhead_size,
+            max_queue=settings.geocoder_bulkhead_queue,
+            max_wait=settings.bulkhead_max_wait
+        )
+        self.timezone_bulkhead = Bulkhead(
+            "timezone_lookup",
+            max_concurrent=settings.timezone_bulkhead_size,
+            max_queue=settings.timezone_bulkhead_queue,
+            max_wait=settings.bulkhead_max_wait
+        )
     
     def get_city_timezone(self, city_name: str) -> str:
         """الحصول على المنطقة الزمنية للمدينة - يدعم أي مدينة في العالم"""
-        city_lower = city_name.lower().strip()
+        # أولاً: سجل المدن المعروفة - مطابقة تامة بعد التطبيع ثم تقريبية
+        # (أخطاء إملائية، أ/إ/ا، ة/ه، "ال") قبل أي طلب شبكة
+        record = self.city_registry.match(city_name)
+        if record is not None:
+            return record.timezone
         
-        # أولاً: جرب البحث في القاموس السريع للمدن الشائعة
-        if city_lower in self.city_timezones:
-            return self.city_timezones[city_lower]
+        # ثانياً: رفض الأسماء التي ثبت مؤخراً أنها غير موجودة دون طلب شبكة
+        if self.negative_cache.contains(city_name):
+            raise CityNotFoundException(city_name)
         
-        # ثانياً: ابحث عن المدينة جغرافياً
+        # ثالثاً: ابحث عن المدينة جغرافياً
+        return self._geocode_timezone(city_name)
+    
+    def resolves_locally(self, city_name: str) -> bool:
+        """هل يمكن تحديد المنطقة الزمنية للمدينة دون طلب شبكة؟"""
+        return self.city_registry.match(city_name) is not None
+    
+    def locates_locally(self, latitude: float, longitude: float) -> bool:
+        """هل المنطقة الزمنية للإحداثيات مخزنة دون بحث في المضلعات؟"""
+        return self.timezone_grid.is_cached(latitude, longitude)
+    
+    @cache_result(ttl_seconds=settings.geocode_cache_ttl)
+    def _geocode_timezone(self, city_name: str) -> str:
+        """البحث الجغرافي عبر Nominatim ضمن حدود المعدل المسموح (النتائج الناجحة تُخزن مؤقتاً)"""
+        # انتظار الدور في الطابور أو الرفض السريع إذا لن يأتي الدور في الوقت المناسب
+        # (ضمن المتبقي من مهلة الطلب)
+        self.geocoder_limiter.acquire(deadline=deadline_at(settings.geocoder_max_wait))
+        
+        timeout = time_left(10, "geocode")
         try:
-            location = self.geolocator.geocode(city_name, timeout=10)
-            if location is None:
-                raise CityNotFoundException(city_name)
-            
-            # احصل على المنطقة الزمنية من الإحداثيات
-            timezone_str = self.tf.timezone_at(lat=location.latitude, lng=location.longitude)
-            if timezone_str is None:
-                raise CityNotFoundException(city_name)
-                
-            return timezone_str
-            
+            location = self.geocode_hedger.call(
+                lambda: self.geolocator.geocode(city_name, timeout=timeout),
+                hedge=lambda: self._hedged_geocode(city_name, timeout)
+            )
+        except DeadlineExceededException:
+            raise
         except Exception as e:
+            # أخطاء الشبكة مؤقتة فلا تُسجل في التخزين السلبي
+            check_deadline("geocode")
+            raise CityNotFoundException(city_name)
+        
+        if location is None:
+            self.negative_cache.add(city_name)
             raise CityNotFoundException(city_name)
+        
+        # احصل على المنطقة الزمنية من الإحداثيات
+        timezone_str = self.tf.timezone_at(lat=location.latitude, lng=location.longitude)
+        if timezone_str is None:
+            self.negative_cache.add(city_name)
+            raise CityNotFoundException(city_name)
+        
+        return timezone_str
+    
+    def _hedged_geocode(self, city_name: str, timeout: float):
+        """المحاولة الثانية تُرسل فقط إذا توفر رمز في محدد المعدل فوراً، دون انتظار دور"""
+        if not self.geocoder_limiter.try_acquire():
+            raise RateLimitExceededException(self.geocoder_limiter.name)
+        return self.geolocator.geocode(city_name, timeout=timeout)
+    
+    def geocode_snapshot(self) -> Dict[str, str]:
+        """نتائج البحث الجغرافي المخزنة حالياً (اسم المدينة ← المنطقة الزمنية)"""
+        return {
+            args[1]: timezone_name
+            for args, _, timezone_name in TimeService._geocode_timezone.entries()
+            if len(args) == 2 and args[0] == self.cache_namespace
+        }
+    
+    def prime_geocode(self, city_name: str, timezone_name: str) -> None:
+        """تخزين نتيجة بحث جغرافي معروفة مسبقاً دون طلب شبكة"""
+        TimeService._geocode_timezone.prime(timezone_name, self, city_name)
     
     def get_current_time_in_city(self, city_name: str) -> TimeInfo:
         """الحصول على الوقت الحالي في مدينة معينة"""
@@ -84,11 +166,26 @@ class TimeService:
                 current_time=current_time.strftime("%Y-%m-%dT%H:%M:%S"),
                 timezone=timezone_name
             )
-        except CityNotFoundException:
+        except (CityNotFoundException, RateLimitExceededException, DeadlineExceededException):
             raise
         except Exception as e:
             raise TimezoneNotFoundException(city_name)
     
+    def get_time_at_location(self, latitude: float, longitude: float) -> TimeAtLocationResponse:
+        """الحصول على الوقت الحالي عند إحداثيات جغرافية"""
+        timezone_name = self.timezone_grid.timezone_at(latitude, longitude)
+        if timezone_name is None:
+            raise TimezoneNotFoundException(f"{latitude}, {longitude}")
+        
+        current_time = datetime.now(pytz.timezone(timezone_name))
+        return TimeAtLocationResponse(
+            latitude=latitude,
+            longitude=longitude,
+            timezone=timezone_name,
+            current_time=current_time.strftime("%Y-%m-%dT%H:%M:%S"),
+            utc_offset_hours=current_time.utcoffset().total_seconds() / 3600
+        )
+    
     def calculate_time_difference(self, city1: str, city2: str) -> TimeComparisonResponse:
         """حساب فرق التوقيت بين مدينتين"""
         try:
@@ -115,11 +212,46 @@ class TimeService:
                 city2_timezone=time_info2.timezone,
                 time_difference_hours=round(time_diff, 1)
             )
-        except (CityNotFoundException, TimezoneNotFoundException):
+        except (CityNotFoundException, TimezoneNotFoundException, RateLimitExceededException, DeadlineExceededException):
             raise
         except Exception as e:
             raise TimezoneNotFoundException(f"{city1} أو {city2}")
 
+    
+    def calculate_time_difference_series(
+        self, city1: str, city2: str, start: datetime, end: datetime, step_seconds: int
+    ) -> TimeComparisonSeriesResponse:
+        """حساب فرق التوقيت بين مدينتين لكل خطوة في فترة زمنية دفعة واحدة"""
+        timezone1 = self.get_city_timezone(city1)
+        timezone2 = self.get_city_timezone(city2)
+        
+        try:
+            # كل اللحظات بثواني UTC ثم الإزاحات من جداول الانتقالات المحسوبة مسبقاً
+            timestamps = np.arange(
+                int(start.timestamp()), int(end.timestamp()) + 1, step_seconds, dtype=np.int64
+            )
+            offsets1 = utc_offsets_at(timezone1, timestamps)
+            offsets2 = utc_offsets_at(timezone2, timestamps)
+            difference = np.round((offsets1 - offsets2) / 3600, 2)
+            
+            iso_times = np.datetime_as_string(timestamps.astype("datetime64[s]"), timezone="UTC")
+        except Exception as e:
+            raise TimezoneNotFoundException(f"{city1} أو {city2}")
+        
+        return TimeComparisonSeriesResponse(
+            city1=city1,
+            city1_timezone=timezone1,
+            city2=city2,
+            city2_timezone=timezone2,
+            start=iso_times[0] if len(iso_times) else "",
+            end=iso_times[-1] if len(iso_times) else "",
+            step_seconds=step_seconds,
+            timestamps=iso_times.tolist(),
+            city1_offset_hours=(offsets1 / 3600).tolist(),
+            city2_offset_hours=(offsets2 / 3600).tolist(),
+            time_difference_hours=difference.tolist()
+        )
+
 
 # إنشاء مثيل واحد من الخدمة
-time_service = TimeService()
\ No newline at end of file
+time_service = TimeService(cache_namespace="time_service")
\ No newline at end of file
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import pytz
+
+from .city_registry import city_registry
+from .time_service import time_service
+from .weather_service import weather_service
+from ..utils.timezone_tables import get_transition_table
+from ..utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+# نقاط موزعة على القارات لتحميل بيانات TimezoneFinder في الذاكرة قبل أول طلب
+_SAMPLE_LOCATIONS = (
+    (30.0444, 31.2357),    # القاهرة
+    (51.5074, -0.1278),    # لندن
+    (40.7128, -74.0060),   # نيويورك
+    (-23.5505, -46.6333),  # ساو باولو
+    (35.6762, 139.6503),   # طوكيو
+    (-33.8688, 151.2093),  # سيدني
+    (-1.2921, 36.8219),    # نيروبي
+    (55.7558, 37.6173),    # موسكو
+)
+
+
+class StartupWarmup:
+    """
+    تهيئة مسبقة لكل عامل بعد بدء التشغيل وقبل اعتباره جاهزاً
+
+    الخطوات (بالترتيب): تحميل المناطق الزمنية لمدن السجل وجداول انتقالاتها،
+    تحميل بيانات TimezoneFinder، تعبئة تخزين البحث الجغرافي والطقس من لقطة
+    محفوظة، ثم أي خطوات إضافية من التطبيق (مثل مخطط OpenAPI). تُسجل مدة كل
+    خطوة، وفشل أي خطوة لا يمنع الجاهزية لأن التهيئة تحسين وليست شرطاً.
+    عند الإيقاف تُحفظ لقطة جديدة ليستخدمها العامل التالي.
+    """
+
+    def __init__(self, snapshot_path: Optional[str] = None, weather_cities: int = 20):
+        self.snapshot_path = snapshot_path
+        self.weather_cities = weather_cities
+        self.ready = False
+        self._task: Optional[asyncio.Task] = None
+
+        # مقاييس
+        self.durations: Dict[str, float] = {}
+        self.failures: Dict[str, str] = {}
+        self.primed = {"geocode": 0, "weather": 0}
+        self.total_seconds: Optional[float] = None
+
+    def load_timezones(self) -> int:
+        """تحليل المناطق الزمنية لمدن السجل وبناء جداول انتقالاتها"""
+        timezones = {record.timezone for record in city_registry.records()}
+        for timezone_name in timezones:
+            pytz.timezone(timezone_name)
+            get_transition_table(timezone_name)
+        return len(timezones)
+
+    def load_timezone_finder(self) -> None:
+        """بحث في نقاط موزعة حتى تُقرأ بيانات TimezoneFinder من القرص، وبناء فهرس شبكة الإحداثيات"""
+        for latitude, longitude in _SAMPLE_LOCATIONS:
+            time_service.tf.timezone_at(lat=latitude, lng=longitude)
+        time_service.timezone_grid.prepare()
+
+    def read_snapshot(self) -> Optional[Dict[str, Any]]:
+        """قراءة اللقطة المحفوظة (None إذا لم تكن موجودة أو كانت تالفة)"""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as snapshot_file:
+                return json.load(snapshot_file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Ignoring unreadable warmup snapshot {self.snapshot_path}: {str(e)}")
+            return None
+
+    def prime_geocode(self, snapshot: Dict[str, Any]) -> int:
+        """تعبئة تخزين البحث الجغرافي من اللقطة إذا لم تنتهِ صلاحيتها"""
+        if time.time() - snapshot.get("saved_at", 0) >= settings.geocode_cache_ttl:
+            return 0
+        geocode = snapshot.get("geocode", {})
+        for city_name, timezone_name in geocode.items():
+            time_service.prime_geocode(city_name, timezone_name)
+        self.primed["geocode"] = len(geocode)
+        return len(geocode)
+
+    async def prime_weather(self, snapshot: Dict[str, Any]) -> int:
+        """جلب الطقس مسبقاً لأكثر المدن طلباً في اللقطة"""
+        primed = 0
+        for city_id in snapshot.get("weather", [])[:self.weather_cities]:
+            if city_registry.get(city_id) is None or city_id not in weather_service.mock_weather_data:
+                continue
+            await weather_service.refresh_city(city_id)
+            # تسجيل المدينة حتى يستمر التحديث المسبق في تحديثها
+            weather_service.popularity.record(city_id)
+            primed += 1
+        self.primed["weather"] = primed
+        return primed
+
+    def save_snapshot(self) -> bool:
+        """حفظ لقطة التخزين المؤقت الحالية (كتابة ذرية حتى لا يقرأ عامل آخر لقطة ناقصة)"""
+        if not self.snapshot_path:
+            return False
+        snapshot = {
+            "saved_at": time.time(),
+            "geocode": time_service.geocode_snapshot(),
+            "weather": weather_service.popular_cities(self.weather_cities)
+        }
+        directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+        try:
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, suffix=".tmp", delete=False) as snapshot_file:
+                json.dump(snapshot, snapshot_file, ensure_ascii=False)
+            os.replace(snapshot_file.name, self.snapshot_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not save warmup snapshot {self.snapshot_path}: {str(e)}")
+            return False
+        return True
+
+    async def _run_step(self, name: str, step: Callable[[], Any]) -> None:
+        start = time.perf_counter()
+        try:
+            if asyncio.iscoroutinefunction(step):
+                await step()
+            else:
+                # الخطوات المتزامنة ثقيلة على المعالج فتُنفذ خارج حلقة الأحداث
+                await asyncio.to_thread(step)
+        except Exception as e:
+            self.failures[name] = str(e)
+            logger.warning(f"⚠️ Warmup step {name} failed: {str(e)}")
+        finally:
+            self.durations[name] = round(time.perf_counter() - start, 4)
+
+    async def run(self, extra_steps: Iterable[Tuple[str, Callable[[], Any]]] = ()) -> None:
+        """تنفيذ كل خطوات التهيئة ثم إعلان الجاهزية"""
+        start = time.perf_counter()
+        await self._run_step("timezones", self.load_timezones)
+        await self._run_step("timezone_finder", self.load_timezone_finder)
+
+        snapshot = await asyncio.to_thread(self.read_snapshot)
+        if snapshot is not None:
+            await self._run_step("geocode_snapshot", partial(self.prime_geocode, snapshot))
+            await self._run_step("weather_snapshot", partial(self.prime_weather, snapshot))
+
+        for name, step in extra_steps:
+            await self._run_step(name, step)
+
+        self.total_seconds = round(time.perf_counter() - start, 4)
+        self.ready = True
+        logger.info(f"✅ Warmup completed in {self.total_seconds:.3f}s")
+
+    def start(self, extra_steps: Iterable[Tuple[str, Callable[[], Any]]] = ()) -> None:
+        """بدء التهيئة في الخلفية حتى يستجيب /health فوراً"""
+        if self._task is None or self._task.done():
+            self.ready = False
+            self._task = asyncio.create_task(self.run(list(extra_steps)))
+            logger.info("🔥 Warmup started")
+
+    async def stop(self) -> None:
+        """إيقاف التهيئة إن لم تكتمل وحفظ لقطة للعامل التالي"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.save_snapshot():
+            logger.info(f"💾 Warmup snapshot saved to {self.snapshot_path}")
+
+    def stats(self) -> Dict[str, Any]:
+        """مقاييس التهيئة المسبقة"""
+        return {
+            "ready": self.ready,
+            "total_seconds": self.total_seconds,
+            "steps_seconds": dict(self.durations),
+            "failed_steps": dict(self.failures),
+            "primed": dict(self.primed)
+        }
+
+
+# إنشاء مثيل واحد من خدمة التهيئة المسبقة
+startup_warmup = StartupWarmup(
+    snapshot_path=settings.warmup_snapshot_path,
+    weather_cities=settings.warmup_weather_cities
+)
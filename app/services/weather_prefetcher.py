@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from .weather_service import WeatherService, weather_service
+from ..utils.cache_backends import CacheBackend, get_cache_backend
+from ..utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherPrefetcher:
+    """
+    تحديث مسبق لبيانات الطقس للمدن الأكثر طلباً
+
+    كل interval_seconds تُفحص أكثر top_k مدن طلباً (حسب PopularityTracker في
+    خدمة الطقس)، وأي مدينة ستنتهي صلاحية بياناتها خلال refresh_ahead_seconds
+    (أو غير مخزنة) تُجلب من المصدر مسبقاً، فلا يصل طلب مستخدم لمدينة شائعة
+    إلى تخزين مؤقت فارغ. عدد طلبات التحديث للمصدر محدود بـ budget_per_minute
+    حتى لا يستهلك التحديث المسبق حصة المستخدمين.
+
+    الحصة وأقفال المدن عدادات في مخزن التخزين المؤقت نفسه، فمع مخزن مشترك
+    (sqlite أو redis) تكون الحصة لكل العمال معاً ولا يحدّث نفس المدينة إلا عامل
+    واحد؛ مع مخزن memory تكون لكل عامل حصته.
+    """
+
+    def __init__(
+        self,
+        service: WeatherService,
+        top_k: int = 20,
+        refresh_ahead_seconds: float = 90.0,
+        interval_seconds: float = 15.0,
+        budget_per_minute: int = 30,
+        backend: Optional[CacheBackend] = None
+    ):
+        self.service = service
+        self.top_k = top_k
+        self.refresh_ahead_seconds = refresh_ahead_seconds
+        self.interval_seconds = interval_seconds
+        self.budget_per_minute = budget_per_minute
+        self.backend = backend
+        self._task: Optional[asyncio.Task] = None
+
+        # مقاييس
+        self.runs = 0
+        self.refreshed = 0
+        self.failed = 0
+        self.skipped_budget = 0
+        self.skipped_locked = 0
+
+    async def _shared(self, operation: str, *args):
+        """عملية على المخزن المشترك (في خيط منفصل إذا كان المخزن ملفاً أو شبكة)"""
+        backend = self.backend if self.backend is not None else get_cache_backend()
+        method = getattr(backend, operation)
+        if backend.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def run_once(self) -> int:
+        """
+        دورة تحديث واحدة
+
+        Returns:
+            عدد المدن التي حُدّثت
+        """
+        self.runs += 1
+        refreshed = 0
+        for city_id, _ in self.service.popularity.hottest(self.top_k):
+            remaining = self.service.cache_expires_in(city_id)
+            if remaining is not None and remaining > self.refresh_ahead_seconds:
+                continue
+
+            # عامل واحد يحدّث المدينة؛ القفل ينتهي قبل الدورة التالية إذا فشل التحديث
+            lock_key = f"weather-prefetch:lock:{city_id}"
+            if await self._shared("increment", lock_key, self.interval_seconds) != 1:
+                self.skipped_locked += 1
+                continue
+
+            window = int(time.time() // 60)
+            used = await self._shared("increment", f"weather-prefetch:budget:{window}", 60)
+            if used is None or used > self.budget_per_minute:
+                # انتهت حصة التحديث؛ المدن الأقل شعبية تنتظر الدورة التالية
+                await self._shared("delete", lock_key)
+                self.skipped_budget += 1
+                break
+
+            try:
+                await self.service.refresh_city(city_id)
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"⚠️ Weather prefetch failed for {city_id}: {str(e)}")
+                continue
+            refreshed += 1
+
+        self.refreshed += refreshed
+        return refreshed
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"❌ Weather prefetch cycle failed: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        """بدء التحديث المسبق في الخلفية"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("🔄 Weather prefetcher started")
+
+    async def stop(self) -> None:
+        """إيقاف التحديث المسبق"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("🔄 Weather prefetcher stopped")
+
+    def stats(self) -> Dict[str, float]:
+        """مقاييس التحديث المسبق والتخزين المؤقت للطقس"""
+        cache_stats = WeatherService._fetch_weather_data.cache_stats
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "tracked_cities": len(self.service.popularity),
+            "runs": self.runs,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "skipped_budget": self.skipped_budget,
+            "skipped_locked": self.skipped_locked,
+            "cache_hits": cache_stats["hits"],
+            "cache_misses": cache_stats["misses"]
+        }
+
+
+# إنشاء مثيل واحد من خدمة التحديث المسبق
+weather_prefetcher = WeatherPrefetcher(
+    weather_service,
+    top_k=settings.weather_prefetch_top_k,
+    refresh_ahead_seconds=settings.weather_prefetch_refresh_ahead,
+    interval_seconds=settings.weather_prefetch_interval,
+    budget_per_minute=settings.weather_prefetch_budget_per_minute
+)
@@ -1,15 +1,26 @@
 import httpx
 import asyncio
-from typing import Dict, Any
-from ..utils.exceptions import CityNotFoundException, WeatherServiceException
+import uuid
+from typing import Dict, Any, List, Optional
+from ..utils.exceptions import (
+    CityNotFoundException, WeatherServiceException, DeadlineExceededException, RateLimitExceededException
+)
 from ..models.weather_models import WeatherResponse, WeatherData
 from ..utils.config import settings
+from ..utils.performance import cache_result
+from ..utils.deadline import check_deadline
+from ..utils.popularity import PopularityTracker
+from ..utils.hedging import Hedger
+from ..utils.bulkhead import Bulkhead
+from .city_registry import city_registry, CityRecord
 
 
 class WeatherService:
     """خدمة الطقس للحصول على معلومات الطقس من API خارجي"""
     
-    def __init__(self, api_key: str = None, base_url: str = None):
+    def __init__(self, api_key: str = None, base_url: str = None, cache_namespace: Optional[str] = None):
+        # يمثّل الخدمة في مفاتيح التخزين المؤقت (انظر TimeService)
+        self.cache_namespace = cache_namespace or f"weather-{uuid.uuid4().hex}"
         self.api_key = api_key or settings.weather_api_key
         self.base_url = base_url or settings.weather_api_url
         self.timeout = 5.0  # مهلة زمنية محسنة للطلبات (5 ثوان)
@@ -32,70 +43,101 @@ class WeatherService:
             "moderate rain": "مطر متوسط",
             "heavy rain": "مطر غزير"
         }
-    
-    async def get_weather_data(self, city_name: str) -> WeatherData:
-        """الحصول على بيانات الطقس - حالياً ترجع بيانات ثابتة"""
         
-        # قاموس البيانات الثابتة للمدن المختلفة
-        mock_weather_data = {
-            "cairo": {
-                "main": {"temp": 28.5, "feels_like": 31.2, "humidity": 60},
-                "weather": [{"description": "clear sky", "main": "Clear"}],
-                "name": "Cairo",
-                "cod": 200
-            },
-            "القاهرة": {
-                "main": {"temp": 28.5, "feels_like": 31.2, "humidity": 60},
-                "weather": [{"description": "clear sky", "main": "Clear"}],
-                "name": "Cairo", 
-                "cod": 200
-            },
-            "london": {
-                "main": {"temp": 15.3, "feels_like": 14.1, "humidity": 78},
-                "weather": [{"description": "overcast clouds", "main": "Clouds"}],
-                "name": "London",
-                "cod": 200
-            },
-            "لندن": {
-                "main": {"temp": 15.3, "feels_like": 14.1, "humidity": 78},
-                "weather": [{"description": "overcast clouds", "main": "Clouds"}],
-                "name": "London",
-                "cod": 200
-            },
-            "riyadh": {
-                "main": {"temp": 35.2, "feels_like": 38.5, "humidity": 25},
-                "weather": [{"description": "clear sky", "main": "Clear"}],
-                "name": "Riyadh",
-                "cod": 200
-            },
-            "الرياض": {
-                "main": {"temp": 35.2, "feels_like": 38.5, "humidity": 25},
-                "weather": [{"description": "clear sky", "main": "Clear"}],
-                "name": "Riyadh",
-                "cod": 200
-            }
-        }
+        # تحوّط الطلبات البطيئة لمصدر الطقس (اختياري)
+        self.hedger = Hedger(
+            "weather",
+            budget_ratio=settings.hedge_budget_ratio,
+            min_samples=settings.hedge_min_samples,
+            enabled=settings.weather_hedging
+        )
+        
+        # سعة معزولة لطلبات مصدر الطقس (تشمل المحاولات الإضافية للتحوّط)
+        self.bulkhead = Bulkhead(
+            "weather",
+            max_concurrent=settings.weather_bulkhead_size,
+            max_queue=settings.weather_bulkhead_queue,
+            max_wait=settings.bulkhead_max_wait
+        )
         
-        city_lower = city_name.lower().strip()
+        # شعبية المدن لجدولة التحديث المسبق
+        self.popularity = PopularityTracker(
+            half_life_seconds=settings.weather_popularity_half_life
+        )
         
-        if city_lower not in mock_weather_data:
+        # البيانات الثابتة تُبنى مرة واحدة وتُفهرس بمعرّف المدينة في سجل المدن
+        self.mock_weather_data: Dict[str, WeatherData] = {
+            "cairo": WeatherData(
+                main={"temp": 28.5, "feels_like": 31.2, "humidity": 60},
+                weather=[{"description": "clear sky", "main": "Clear"}],
+                name="Cairo",
+                cod=200
+            ),
+            "london": WeatherData(
+                main={"temp": 15.3, "feels_like": 14.1, "humidity": 78},
+                weather=[{"description": "overcast clouds", "main": "Clouds"}],
+                name="London",
+                cod=200
+            ),
+            "riyadh": WeatherData(
+                main={"temp": 35.2, "feels_like": 38.5, "humidity": 25},
+                weather=[{"description": "clear sky", "main": "Clear"}],
+                name="Riyadh",
+                cod=200
+            )
+        }
+    
+    async def get_weather_data(self, city_name: str) -> WeatherData:
+        """الحصول على بيانات الطقس - حالياً ترجع بيانات ثابتة"""
+        record = city_registry.match(city_name)
+        if record is None or record.city_id not in self.mock_weather_data:
             raise CityNotFoundException(city_name)
         
+        # تسجيل الطلب لجدولة التحديث المسبق للمدن الأكثر طلباً
+        self.popularity.record(record.city_id)
+        return await self._fetch_weather_data(record.city_id)
+    
+    @cache_result(ttl_seconds=settings.weather_cache_ttl)
+    async def _fetch_weather_data(self, city_id: str) -> WeatherData:
+        """جلب بيانات الطقس من المصدر لمدينة معروفة (النتائج تُخزن مؤقتاً)"""
+        check_deadline("weather")
+        
+        # محاولة ثانية إذا تأخر المصدر أكثر من p95 المرصود (ضمن حصة التحوّط)
+        return await self.hedger.run(lambda: self.bulkhead.run_async(lambda: self._request_weather(city_id)))
+    
+    async def _request_weather(self, city_id: str) -> WeatherData:
+        """طلب واحد لمصدر بيانات الطقس"""
         # إرجاع البيانات الثابتة
-        data = mock_weather_data[city_lower]
-        return WeatherData(**data)
+        return self.mock_weather_data[city_id]
         
         # TODO: عند الاشتراك في خدمة الطقس، استبدل الكود أعلاه بالكود التالي:
         # params = {
-        #     "q": city_name,
+        #     "q": city_registry.get(city_id).name_en,
         #     "appid": self.api_key,
         #     "units": "metric",
         #     "lang": "en"
         # }
-        # async with httpx.AsyncClient(timeout=self.timeout) as client:
+        # مهلة الطلب للمصدر لا تتجاوز المتبقي من مهلة طلب المستخدم
+        # async with httpx.AsyncClient(timeout=time_left(self.timeout, "weather")) as client:
         #     response = await client.get(self.base_url, params=params)
         #     # معالجة الاستجابة...
     
+    def cache_expires_in(self, city_id: str) -> Optional[float]:
+        """الثواني المتبقية قبل انتهاء صلاحية بيانات المدينة المخزنة (None إذا لم تكن مخزنة)"""
+        return WeatherService._fetch_weather_data.expires_in(self, city_id)
+    
+    async def refresh_city(self, city_id: str) -> WeatherData:
+        """جلب بيانات المدينة من المصدر وتحديث التخزين المؤقت قبل انتهاء صلاحيته"""
+        return await WeatherService._fetch_weather_data.refresh(self, city_id)
+    
+    def popular_cities(self, count: int) -> List[str]:
+        """معرّفات المدن الأكثر طلباً حالياً"""
+        return [city_id for city_id, _ in self.popularity.hottest(count)]
+    
+    def get_supported_cities(self) -> List[CityRecord]:
+        """المدن التي تتوفر لها بيانات طقس"""
+        return [record for record in city_registry.records() if record.city_id in self.mock_weather_data]
+    
     def format_weather_response(self, raw_data: WeatherData) -> WeatherResponse:
         """تنسيق استجابة الطقس وترجمة الأوصاف"""
         try:
@@ -125,11 +167,14 @@ class WeatherService:
         try:
             raw_data = await self.get_weather_data(city_name)
             return self.format_weather_response(raw_data)
-        except (CityNotFoundException, WeatherServiceException):
+        except (CityNotFoundException, WeatherServiceException, DeadlineExceededException):
+            raise
+        except RateLimitExceededException:
+            # امتلاء السعة (BulkheadFullException) يصل للمعالج كـ 503 مع Retry-After
             raise
         except Exception as e:
             raise WeatherServiceException(f"خطأ في الحصول على بيانات الطقس: {str(e)}")
 
 
 # إنشاء مثيل واحد من خدمة الطقس
-weather_service = WeatherService()
\ No newline at end of file
+weather_service = WeatherService(cache_namespace="weather_service")
\ No newline at end of file
@@ -1,7 +1,10 @@
 from .exceptions import (
     CityNotFoundException,
     WeatherServiceException,
-    TimezoneNotFoundException
+    TimezoneNotFoundException,
+    RateLimitExceededException,
+    BulkheadFullException,
+    DeadlineExceededException
 )
 from .config import settings
 
@@ -9,5 +12,8 @@ __all__ = [
     "CityNotFoundException",
     "WeatherServiceException", 
     "TimezoneNotFoundException",
+    "RateLimitExceededException",
+    "BulkheadFullException",
+    "DeadlineExceededException",
     "settings"
 ]
\ No newline at end of file
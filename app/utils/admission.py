@@ -0,0 +1,237 @@
+"""
+التحكم التكيفي في قبول الطلبات وإسقاط الحمل الزائد (AIMD)
+
+عدد الطلبات قيد المعالجة محدود بحد يتكيف مع زمن الاستجابة المقاس: يزيد
+تدريجياً (+1 لكل limit طلب) طالما الزمن أقل من الهدف والحد مستغل، وينقص
+بنسبة ثابتة عندما يتجاوز الزمن الهدف. عند بلوغ الحد تُرفض الطلبات الأقل أولوية
+أولاً (/metrics ومسارات المعالجة بالجملة) بـ 503 سريع مع Retry-After، والطلبات
+التفاعلية تنتظر مكاناً لمدة قصيرة ثم تُرفض بدلاً من الانتظار حتى انتهاء مهلتها.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, Tuple
+
+# أولويات الطلبات
+EXEMPT, NORMAL, LOW = "exempt", "normal", "low"
+
+
+class AdaptiveLimit:
+    """
+    حد التزامن المتكيف (زيادة جمعية ونقص ضربي)
+
+    Args:
+        target_latency: الزمن المستهدف حتى بدء الاستجابة (ثوانٍ)
+        backoff: معامل النقص عند تجاوز الهدف
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 64,
+        min_limit: int = 4,
+        max_limit: int = 1024,
+        target_latency: float = 0.5,
+        backoff: float = 0.9
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self._last_decrease = 0.0
+
+    def on_sample(self, latency: float, in_flight: int, now: float) -> None:
+        """تحديث الحد بعد اكتمال طلب"""
+        if latency > self.target_latency:
+            # نقص واحد لكل فترة بطول الهدف، حتى لا تُحتسب موجة واحدة من الطلبات البطيئة عدة مرات
+            if now - self._last_decrease >= self.target_latency:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+        elif in_flight >= self.limit * 0.8:
+            # الزيادة فقط عندما يكون الحد مستغلاً، وإلا يكبر بلا معنى أثناء الهدوء
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+
+class AdmissionController:
+    """
+    قبول الطلبات حسب أولويتها والحد المتكيف
+
+    Args:
+        low_priority_share: نسبة الحد المتاحة للطلبات منخفضة الأولوية
+        max_queue_wait: أقصى انتظار للطلبات التفاعلية حتى يتوفر مكان (ثوانٍ)
+    """
+
+    def __init__(self, limit: AdaptiveLimit, low_priority_share: float = 0.5, max_queue_wait: float = 0.1):
+        self.limit = limit
+        self.low_priority_share = low_priority_share
+        self.max_queue_wait = max_queue_wait
+        self.in_flight = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+        # مقاييس
+        self.admitted = 0
+        self.shed = {NORMAL: 0, LOW: 0}
+        self._queue_waits = deque(maxlen=1000)
+
+    def _has_room(self, priority: str) -> bool:
+        if priority == EXEMPT:
+            return True
+        capacity = self.limit.limit * (self.low_priority_share if priority == LOW else 1.0)
+        return self.in_flight < capacity
+
+    def _admit(self) -> None:
+        self.in_flight += 1
+        self.admitted += 1
+
+    async def acquire(self, priority: str) -> bool:
+        """
+        محاولة قبول طلب
+
+        Returns:
+            True إذا قُبل (ويجب استدعاء release لاحقاً)، False إذا يجب رفضه
+        """
+        with self._lock:
+            if self._has_room(priority) and (priority != NORMAL or not self._waiters):
+                self._admit()
+                return True
+            if priority == LOW or len(self._waiters) >= self.limit.limit:
+                self.shed[priority] += 1
+                return False
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+
+        started = time.monotonic()
+        try:
+            # release يُكمل الانتظار بعد أن يحجز المكان لهذا الطلب
+            await asyncio.wait_for(asyncio.shield(waiter[1]), timeout=self.max_queue_wait)
+            self._queue_waits.append(time.monotonic() - started)
+            return True
+        except asyncio.TimeoutError:
+            with self._lock:
+                if waiter[1].done():
+                    # حُجز المكان في نفس اللحظة
+                    self._queue_waits.append(time.monotonic() - started)
+                    return True
+                self._waiters.remove(waiter)
+                self.shed[NORMAL] += 1
+            return False
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter[1].done():
+                    self._release_locked()
+                else:
+                    self._waiters.remove(waiter)
+            raise
+
+    def release(self, latency: float) -> None:
+        """إنهاء طلب مقبول وتسجيل زمنه"""
+        with self._lock:
+            self.limit.on_sample(latency, self.in_flight, time.monotonic())
+            self._release_locked()
+
+    def _release_locked(self) -> None:
+        self.in_flight -= 1
+        # تسليم الأماكن المتاحة للمنتظرين بالترتيب
+        while self._waiters and self._has_room(NORMAL):
+            loop, future = self._waiters.popleft()
+            self._admit()
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def stats(self) -> Dict[str, float]:
+        """مقاييس القبول والإسقاط"""
+        waits = sorted(self._queue_waits)
+        return {
+            "limit": round(self.limit.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "shed_normal": self.shed[NORMAL],
+            "shed_low": self.shed[LOW],
+            "target_latency_seconds": self.limit.target_latency,
+            "p95_queue_wait_seconds": round(waits[int(len(waits) * 0.95)], 4) if waits else 0.0
+        }
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class AdmissionMiddleware:
+    """
+    Middleware (ASGI) يطبق AdmissionController على كل طلب HTTP
+
+    الطلب يشغل مكاناً حتى تبدأ استجابته، فلا تحجز الاستجابات المتدفقة الطويلة
+    (SSE و NDJSON) أماكن الطلبات الأخرى طوال مدتها.
+    """
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        exempt_paths: Iterable[str] = ("/health", "/ready"),
+        low_priority_paths: Iterable[str] = ("/metrics",),
+        retry_after_seconds: int = 1
+    ):
+        self.app = app
+        self.controller = controller
+        self.exempt_paths = tuple(exempt_paths)
+        self.low_priority_paths = tuple(low_priority_paths)
+        self.retry_after_seconds = retry_after_seconds
+
+    def priority(self, path: str) -> str:
+        if path in self.exempt_paths:
+            return EXEMPT
+        if path.startswith(self.low_priority_paths):
+            return LOW
+        return NORMAL
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        priority = self.priority(scope["path"])
+        if priority == EXEMPT:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.monotonic()
+        if not await self.controller.acquire(priority):
+            await self._reject(send)
+            return
+
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                self.controller.release(time.monotonic() - started)
+
+        async def send_tracked(message) -> None:
+            if message["type"] == "http.response.start":
+                release()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_tracked)
+        finally:
+            release()
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({
+            "error": "overloaded",
+            "message": "الخادم مشغول حالياً، يرجى المحاولة بعد قليل"
+        }, ensure_ascii=False).encode("utf-8")
+        headers: Tuple = (
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"retry-after", str(self.retry_after_seconds).encode("latin-1"))
+        )
+        await send({"type": "http.response.start", "status": 503, "headers": list(headers)})
+        await send({"type": "http.response.body", "body": body})
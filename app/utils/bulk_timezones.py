@@ -0,0 +1,225 @@
+"""
+تحديد المناطق الزمنية لأعداد كبيرة من الإحداثيات عبر مجموعة عمليات
+
+تُقسم الإحداثيات إلى دفعات تُوزع على عمليات منفصلة، وتُعاد النتائج بنفس
+ترتيب المدخلات فور جاهزية كل دفعة. كل عملية تفتح ملفات مضلعات
+TimezoneFinder عبر memory mapping (in_memory=False)، فتشترك كل العمليات
+في نفس صفحات الذاكرة من ذاكرة نظام التشغيل بدلاً من نسخة لكل عملية.
+
+مثال:
+    python -m app.utils.bulk_timezones sensors.csv --output zones.csv --workers 8
+"""
+import argparse
+import csv
+import itertools
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .timezone_grid import QuantizedTimezoneCache
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+# أقل من هذا العدد تكلفة تشغيل العمليات أكبر من الفائدة
+PARALLEL_THRESHOLD = 20_000
+
+# كائن البحث في كل عملية (يُنشأ مرة واحدة عند بدء العملية)
+_worker_cache = None
+
+
+def _create_cache(cell_degrees: Optional[float]):
+    from timezonefinder import TimezoneFinder
+
+    finder = TimezoneFinder(in_memory=False)
+    if cell_degrees is None:
+        return finder
+    return QuantizedTimezoneCache(finder, cell_degrees=cell_degrees)
+
+
+def _init_worker(cell_degrees: Optional[float]) -> None:
+    global _worker_cache
+    _worker_cache = _create_cache(cell_degrees)
+
+
+def _lookup(cache, latitudes: np.ndarray, longitudes: np.ndarray) -> List[Optional[str]]:
+    if isinstance(cache, QuantizedTimezoneCache):
+        return [cache.timezone_at(lat, lng) for lat, lng in zip(latitudes.tolist(), longitudes.tolist())]
+    return [cache.timezone_at(lat=lat, lng=lng) for lat, lng in zip(latitudes.tolist(), longitudes.tolist())]
+
+
+def _resolve_chunk(latitudes: np.ndarray, longitudes: np.ndarray) -> List[Optional[str]]:
+    """دالة العامل: المناطق الزمنية لدفعة واحدة"""
+    return _lookup(_worker_cache, latitudes, longitudes)
+
+
+def _validate(latitudes: np.ndarray, longitudes: np.ndarray) -> None:
+    if latitudes.shape != longitudes.shape:
+        raise ValueError("يجب أن يتساوى عدد خطوط العرض وخطوط الطول")
+    if latitudes.size and (np.abs(latitudes).max() > 90 or np.abs(longitudes).max() > 180):
+        raise ValueError("إحداثيات خارج النطاق: خط العرض بين -90 و 90 وخط الطول بين -180 و 180")
+
+
+def iter_resolve(
+    chunks: Iterable[Tuple[np.ndarray, np.ndarray]],
+    workers: Optional[int] = None,
+    cell_degrees: Optional[float] = None,
+    max_pending: Optional[int] = None
+) -> Iterator[List[Optional[str]]]:
+    """
+    تحديد المناطق الزمنية لسلسلة دفعات من الإحداثيات
+
+    Args:
+        chunks: دفعات (خطوط العرض، خطوط الطول) كمصفوفات NumPy
+        workers: عدد العمليات (الافتراضي عدد المعالجات، 1 للتنفيذ في نفس العملية)
+        cell_degrees: حجم خلية التخزين المؤقت في كل عملية (الافتراضي None: البحث الدقيق لكل نقطة)
+        max_pending: أقصى عدد دفعات قيد المعالجة (الافتراضي ضعف عدد العمليات)
+
+    Yields:
+        قائمة المناطق الزمنية لكل دفعة بنفس ترتيب المدخلات
+        (None للنقاط التي لا تتبع أي منطقة)
+    """
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        cache = _create_cache(cell_degrees)
+        for latitudes, longitudes in chunks:
+            latitudes, longitudes = np.asarray(latitudes, dtype=np.float64), np.asarray(longitudes, dtype=np.float64)
+            _validate(latitudes, longitudes)
+            yield _lookup(cache, latitudes, longitudes)
+        return
+
+    # عدد محدود من الدفعات قيد المعالجة حتى لا تُقرأ المدخلات كلها في الذاكرة
+    max_pending = max_pending or 2 * workers
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(cell_degrees,)) as executor:
+        pending = deque()
+        for latitudes, longitudes in chunks:
+            latitudes, longitudes = np.asarray(latitudes, dtype=np.float64), np.asarray(longitudes, dtype=np.float64)
+            _validate(latitudes, longitudes)
+            pending.append(executor.submit(_resolve_chunk, latitudes, longitudes))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def resolve_timezones(
+    latitudes,
+    longitudes,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cell_degrees: Optional[float] = None
+) -> np.ndarray:
+    """
+    المناطق الزمنية لمصفوفتي إحداثيات
+
+    Returns:
+        مصفوفة NumPy (dtype=object) بنفس طول المدخلات
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    _validate(latitudes, longitudes)
+
+    if len(latitudes) < PARALLEL_THRESHOLD:
+        workers = 1
+    chunks = (
+        (latitudes[start:start + chunk_size], longitudes[start:start + chunk_size])
+        for start in range(0, len(latitudes), chunk_size)
+    )
+
+    result = np.empty(len(latitudes), dtype=object)
+    position = 0
+    for zones in iter_resolve(chunks, workers=workers, cell_degrees=cell_degrees):
+        result[position:position + len(zones)] = zones
+        position += len(zones)
+    return result
+
+
+def _read_csv_chunks(reader, lat_column: int, lng_column: int, chunk_size: int, rows_out: deque):
+    """قراءة ملف CSV على دفعات؛ الصفوف الأصلية تُحفظ في rows_out لكتابتها مع النتائج"""
+    while True:
+        rows = list(itertools.islice(reader, chunk_size))
+        if not rows:
+            return
+        rows_out.append(rows)
+        yield (
+            np.array([float(row[lat_column]) for row in rows]),
+            np.array([float(row[lng_column]) for row in rows]),
+        )
+
+
+def resolve_csv(
+    input_file,
+    output_file,
+    lat_column: str = "lat",
+    lng_column: str = "lng",
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cell_degrees: Optional[float] = None
+) -> int:
+    """
+    قراءة CSV يحتوي أعمدة الإحداثيات وكتابته مع عمود timezone إضافي
+
+    الملف يُقرأ ويُكتب على دفعات فلا يُحمّل كاملاً في الذاكرة.
+
+    Returns:
+        عدد الصفوف المكتوبة
+    """
+    reader = csv.reader(input_file)
+    writer = csv.writer(output_file)
+    header = next(reader)
+    try:
+        lat_index, lng_index = header.index(lat_column), header.index(lng_column)
+    except ValueError:
+        raise ValueError(f"الأعمدة المطلوبة غير موجودة: {lat_column}, {lng_column}")
+    writer.writerow(header + ["timezone"])
+
+    rows_out = deque()
+    written = 0
+    chunks = _read_csv_chunks(reader, lat_index, lng_index, chunk_size, rows_out)
+    for zones in iter_resolve(chunks, workers=workers, cell_degrees=cell_degrees):
+        rows = rows_out.popleft()
+        writer.writerows(row + [zone or ""] for row, zone in zip(rows, zones))
+        written += len(rows)
+    return written
+
+
+def main(argv=None):
+    """واجهة سطر الأوامر لتحديد المناطق الزمنية لملف CSV"""
+    parser = argparse.ArgumentParser(description="تحديد المناطق الزمنية لعدد كبير من الإحداثيات")
+    parser.add_argument("input", help="ملف CSV المدخل (- للقراءة من stdin)")
+    parser.add_argument("--output", default=None, help="ملف الناتج (الافتراضي stdout)")
+    parser.add_argument("--lat-column", default="lat")
+    parser.add_argument("--lng-column", default="lng")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--cell-degrees", type=float, default=None,
+                        help="حجم خلية التخزين المؤقت مثل 0.01 (الافتراضي البحث الدقيق لكل نقطة)")
+    args = parser.parse_args(argv)
+
+    input_file = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    output_file = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        written = resolve_csv(
+            input_file, output_file,
+            lat_column=args.lat_column,
+            lng_column=args.lng_column,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            cell_degrees=args.cell_degrees or None,
+        )
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    print(f"تمت معالجة {written} صف", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+حواجز العزل (bulkheads) بين الخدمات الخارجية
+
+لكل خدمة (البحث الجغرافي، البحث في مضلعات المناطق الزمنية، مصدر الطقس) سعة
+خاصة بها: عدد محدود من العمليات المتزامنة وطابور انتظار محدود، وللعمليات المتزامنة
+(sync) خيوط خاصة بدلاً من خيوط asyncio.to_thread المشتركة. إذا تعطلت خدمة تمتلئ سعتها
+وحدها وتُرفض طلباتها الجديدة فوراً، وتبقى بقية المسارات تعمل.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from .deadline import time_left
+from .exceptions import BulkheadFullException
+
+T = TypeVar("T")
+
+
+class Bulkhead:
+    """
+    سعة معزولة لخدمة واحدة
+
+    Args:
+        max_concurrent: أقصى عدد عمليات قيد التنفيذ (وعدد الخيوط للعمليات المتزامنة)
+        max_queue: أقصى عدد عمليات تنتظر مكاناً؛ بعده تُرفض العمليات الجديدة فوراً
+        max_wait: أقصى انتظار لمكان (ضمن المتبقي من مهلة الطلب)
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait: float = 5.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # مقاييس
+        self.completed = 0
+        self.peak_active = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self._queue_waits = deque(maxlen=1000)
+
+    async def _enter(self) -> None:
+        """حجز مكان أو الانتظار في الطابور أو الرفض"""
+        timeout = time_left(self.max_wait, self.name)
+        with self._lock:
+            if self.active < self.max_concurrent:
+                self._occupy()
+                return
+            if len(self._waiters) >= self.max_queue:
+                self.rejected_full += 1
+                raise BulkheadFullException(self.name, retry_after=self._retry_after())
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+
+        started = time.monotonic()
+        try:
+            # _exit يحجز المكان للمنتظر قبل إكمال انتظاره
+            await asyncio.wait_for(asyncio.shield(waiter[1]), timeout=timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                if not waiter[1].done():
+                    self._waiters.remove(waiter)
+                    self.rejected_timeout += 1
+                    raise BulkheadFullException(self.name, retry_after=self._retry_after())
+        except BaseException:
+            with self._lock:
+                if waiter[1].done():
+                    self._exit_locked()
+                else:
+                    self._waiters.remove(waiter)
+            raise
+        self._queue_waits.append(time.monotonic() - started)
+
+    def _occupy(self) -> None:
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+
+    def _exit(self) -> None:
+        with self._lock:
+            self.completed += 1
+            self._exit_locked()
+
+    def _exit_locked(self) -> None:
+        self.active -= 1
+        if self._waiters and self.active < self.max_concurrent:
+            loop, future = self._waiters.popleft()
+            self._occupy()
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def _retry_after(self) -> float:
+        waits = self._queue_waits
+        return max(1.0, max(waits)) if waits else 1.0
+
+    async def run_async(self, operation: Callable[[], Awaitable[T]]) -> T:
+        """تنفيذ عملية غير متزامنة ضمن سعة الخدمة"""
+        await self._enter()
+        try:
+            return await operation()
+        finally:
+            self._exit()
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        تنفيذ عملية متزامنة في خيوط الخدمة الخاصة
+
+        إذا أُلغي الطلب (انتهت مهلته) يبقى المكان محجوزاً حتى ينتهي الخيط فعلاً،
+        فالعمليات المعلقة تُحتسب في السعة ولا تتراكم خيوط بلا حد.
+        """
+        await self._enter()
+        try:
+            # الخيط يأخذ نسخة من السياق (ومنه مهلة الطلب)
+            future = self._get_executor().submit(contextvars.copy_context().run, func, *args)
+        except BaseException:
+            self._exit()
+            raise
+        future.add_done_callback(lambda _: self._exit())
+        return await asyncio.wrap_future(future)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_concurrent, thread_name_prefix=f"bulkhead-{self.name}"
+                )
+            return self._executor
+
+    def stats(self) -> Dict[str, Any]:
+        """مقاييس الإشباع"""
+        waits = sorted(self._queue_waits)
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "saturation": round(self.active / self.max_concurrent, 3),
+            "peak_active": self.peak_active,
+            "completed": self.completed,
+            "rejected_full": self.rejected_full,
+            "rejected_timeout": self.rejected_timeout,
+            "p95_queue_wait_seconds": round(waits[int(len(waits) * 0.95)], 4) if waits else 0.0
+        }
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,485 @@
+"""
+مخازن التخزين المؤقت لـ cache_result
+
+- memory: قاموس داخل العملية (الافتراضي، بدون ترميز)
+- sqlite: ملف SQLite بوضع WAL تتشاركه كل عمليات uvicorn على نفس الجهاز
+- redis: أي خادم يتحدث بروتوكول Redis (RESP) تتشاركه كل الأجهزة
+
+المخازن المشتركة ترمّز القيم بـ pickle (أسرع وأصغر من JSON لنماذج Pydantic)،
+لذلك يجب ألا يكتب فيها إلا التطبيق نفسه. أخطاء المخزن والترميز لا تُفشل الطلب:
+تُسجل وتُعامل القراءة كإخفاق والكتابة كأنها لم تحدث. المفاتيح تحمل وسم نسخة
+(انظر schema_tag) حتى لا تُقرأ بعد التحديث قيم مخزنة بنماذج تغيرت.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, get_args, get_type_hints
+from urllib.parse import urlparse
+
+from pydantic import BaseModel
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# حذف المفاتيح المنتهية الصلاحية مرة كل عدد من عمليات الكتابة بدلاً من كل كتابة
+_PRUNE_EVERY = 256
+
+
+# تُزاد عند تغيير شكل القيم المخزنة بطريقة لا تظهر في نماذج Pydantic
+CACHE_SCHEMA_VERSION = 1
+
+# أخطاء ترميز القيم: قيمة لا تُرمّز، أو قيمة مخزنة تالفة أو من نسخة قديمة من الكود
+SERIALIZATION_ERRORS = (pickle.PickleError, AttributeError, EOFError, ImportError, TypeError, ValueError)
+
+
+def serialize(value: Any) -> bytes:
+    return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def deserialize(data: bytes) -> Any:
+    return pickle.loads(data)
+
+
+def schema_tag(func: Callable) -> str:
+    """وسم نسخة القيم المخزنة لدالة: CACHE_SCHEMA_VERSION وبصمة نماذج Pydantic التي ترجعها"""
+    try:
+        returns = get_type_hints(func).get("return")
+    except Exception:
+        returns = None
+    models = [
+        model for model in (returns, *get_args(returns))
+        if isinstance(model, type) and issubclass(model, BaseModel)
+    ]
+    if not models:
+        return f"v{CACHE_SCHEMA_VERSION}"
+    schemas = json.dumps([model.model_json_schema() for model in models], sort_keys=True)
+    return f"v{CACHE_SCHEMA_VERSION}-{hashlib.sha1(schemas.encode('utf-8')).hexdigest()[:8]}"
+
+
+class CacheBackend(ABC):
+    """الواجهة المشتركة لكل المخازن"""
+
+    name = "base"
+    # العمليات تنتظر ملفاً أو شبكة: الكود غير المتزامن ينفذها في خيط منفصل
+    blocking = True
+
+    def __init__(self):
+        self.errors = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """القيمة المخزنة إذا كانت صالحة، وإلا None"""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        """تخزين قيمة لمدة ttl_seconds"""
+
+    @abstractmethod
+    def ttl(self, key: str) -> Optional[float]:
+        """الثواني المتبقية قبل انتهاء صلاحية المفتاح، أو None"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """حذف المفتاح إن وجد"""
+
+    @abstractmethod
+    def scan(self, prefix: str) -> Iterator[Tuple[str, Any]]:
+        """كل المفاتيح الصالحة التي تبدأ بـ prefix مع قيمها"""
+
+    @abstractmethod
+    def increment(self, key: str, ttl_seconds: float) -> Optional[int]:
+        """
+        زيادة عداد ذري مشترك وإرجاع قيمته الجديدة (None عند تعطل المخزن)
+
+        العداد يبدأ من 1 وتنتهي صلاحيته بعد ttl_seconds من إنشائه، فيصلح حصةً لكل
+        نافذة زمنية أو قفلاً قصيراً (من حصل على 1 يملك القفل).
+        """
+
+    def _decode(self, operation: str, data: bytes) -> Optional[Any]:
+        try:
+            return deserialize(data)
+        except SERIALIZATION_ERRORS as e:
+            self._failed(operation, e)
+            return None
+
+    def _encode(self, value: Any) -> Optional[bytes]:
+        try:
+            return serialize(value)
+        except SERIALIZATION_ERRORS as e:
+            self._failed("set", e)
+            return None
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        self.errors += 1
+        logger.warning(f"⚠️ Cache backend {self.name} {operation} failed: {str(error)}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "errors": self.errors}
+
+
+class MemoryBackend(CacheBackend):
+    """
+    قاموس داخل العملية: أسرع مخزن، لكن لكل عامل نسخته الخاصة
+
+    Args:
+        max_entries: أقصى عدد مفاتيح؛ عند تجاوزه تُحذف الأقدم كتابةً
+    """
+
+    name = "memory"
+    blocking = False
+
+    def __init__(self, max_entries: int = 10000):
+        super().__init__()
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry[0]
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        now = time.time()
+        self._entries[key] = (value, now + ttl_seconds)
+        self._entries.move_to_end(key)
+        self._writes += 1
+        if self._writes % _PRUNE_EVERY == 0:
+            for expired in [key for key, (_, expires_at) in list(self._entries.items()) if expires_at <= now]:
+                self._entries.pop(expired, None)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def ttl(self, key: str) -> Optional[float]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        remaining = entry[1] - time.time()
+        return remaining if remaining > 0 else None
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def scan(self, prefix: str) -> Iterator[Tuple[str, Any]]:
+        now = time.time()
+        for key, (value, expires_at) in list(self._entries.items()):
+            if key.startswith(prefix) and expires_at > now:
+                yield key, value
+
+    def increment(self, key: str, ttl_seconds: float) -> Optional[int]:
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is None or entry[1] <= now:
+            entry = (0, now + ttl_seconds)
+        count = entry[0] + 1
+        self._entries[key] = (count, entry[1])
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "entries": len(self._entries)}
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    ملف SQLite مشترك بين عمليات الجهاز الواحد
+
+    وضع WAL يسمح بقراءات متزامنة من كل العمليات أثناء الكتابة، ولكل خيط
+    اتصاله الخاص (يُعاد فتحه بعد fork).
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL"
+                ") WITHOUT ROWID"
+            )
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            row = self._connection().execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._failed("get", e)
+            return None
+        return self._decode("get", row[0]) if row is not None else None
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        data = self._encode(value)
+        if data is None:
+            return
+        now = time.time()
+        try:
+            connection = self._connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, data, now + ttl_seconds)
+            )
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                connection.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        except sqlite3.Error as e:
+            self._failed("set", e)
+
+    def ttl(self, key: str) -> Optional[float]:
+        try:
+            row = self._connection().execute(
+                "SELECT expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._failed("ttl", e)
+            return None
+        if row is None:
+            return None
+        remaining = row[0] - time.time()
+        return remaining if remaining > 0 else None
+
+    def delete(self, key: str) -> None:
+        try:
+            self._connection().execute("DELETE FROM cache WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            self._failed("delete", e)
+
+    def scan(self, prefix: str) -> Iterator[Tuple[str, Any]]:
+        try:
+            # نطاق مفاتيح بدلاً من LIKE حتى يُستخدم فهرس المفتاح الأساسي
+            rows = self._connection().execute(
+                "SELECT key, value FROM cache WHERE key >= ? AND key < ? AND expires_at > ?",
+                (prefix, prefix + "\U0010ffff", time.time())
+            ).fetchall()
+        except sqlite3.Error as e:
+            self._failed("scan", e)
+            return
+        for key, data in rows:
+            value = self._decode("scan", data)
+            if value is not None:
+                yield key, value
+
+    def increment(self, key: str, ttl_seconds: float) -> Optional[int]:
+        now = time.time()
+        try:
+            # العداد يُخزن كرقم وليس pickle؛ المفتاح المنتهي يبدأ من جديد
+            row = self._connection().execute(
+                "INSERT INTO cache (key, value, expires_at) VALUES (?, 1, ?) "
+                "ON CONFLICT(key) DO UPDATE SET "
+                "value = CASE WHEN expires_at > ? THEN value + 1 ELSE 1 END, "
+                "expires_at = CASE WHEN expires_at > ? THEN expires_at ELSE excluded.expires_at END "
+                "RETURNING value",
+                (key, now + ttl_seconds, now, now)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._failed("increment", e)
+            return None
+        return int(row[0])
+
+
+class RespError(Exception):
+    """رد خطأ من خادم RESP"""
+
+
+class RespClient:
+    """
+    عميل مصغّر لبروتوكول Redis (RESP2) فوق اتصال TCP واحد
+
+    يكفي لأوامر التخزين المؤقت فقط؛ الاتصال محمي بقفل ويُعاد فتحه بعد أي خطأ.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, timeout: float = 1.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._socket: Optional[socket.socket] = None
+        self._reader = None
+
+    @staticmethod
+    def encode_command(*parts: Any) -> bytes:
+        encoded = [part if isinstance(part, bytes) else str(part).encode("utf-8") for part in parts]
+        chunks = [b"*%d\r\n" % len(encoded)]
+        for part in encoded:
+            chunks.append(b"$%d\r\n%s\r\n" % (len(part), part))
+        return b"".join(chunks)
+
+    def _read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("connection closed by cache server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode("utf-8")
+        if kind == b"-":
+            raise RespError(payload.decode("utf-8"))
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise ConnectionError(f"unexpected reply from cache server: {line!r}")
+
+    def _connect(self) -> None:
+        self._socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._socket.makefile("rb")
+        if self.db:
+            self._socket.sendall(self.encode_command("SELECT", self.db))
+            self._read_reply()
+
+    def close(self) -> None:
+        if self._socket is not None:
+            self._reader.close()
+            self._socket.close()
+        self._socket = self._reader = None
+
+    def execute(self, *parts: Any) -> Any:
+        """إرسال أمر واحد وانتظار رده"""
+        with self._lock:
+            try:
+                if self._socket is None:
+                    self._connect()
+                self._socket.sendall(self.encode_command(*parts))
+                return self._read_reply()
+            except (OSError, ConnectionError):
+                self.close()
+                raise
+
+
+class RedisBackend(CacheBackend):
+    """خادم Redis (أو أي خادم متوافق مع RESP) مشترك بين كل العمليات والأجهزة"""
+
+    name = "redis"
+
+    def __init__(self, url: str = "redis://localhost:6379/0", timeout: float = 1.0):
+        super().__init__()
+        parsed = urlparse(url)
+        db = parsed.path.strip("/")
+        self.client = RespClient(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(db) if db else 0,
+            timeout=timeout
+        )
+
+    def _execute(self, operation: str, *parts: Any) -> Any:
+        try:
+            return self.client.execute(*parts)
+        except (OSError, ConnectionError, RespError) as e:
+            self._failed(operation, e)
+            return None
+
+    def get(self, key: str) -> Optional[Any]:
+        data = self._execute("get", "GET", key)
+        return self._decode("get", data) if data is not None else None
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        data = self._encode(value)
+        if data is not None:
+            self._execute("set", "SET", key, data, "PX", max(1, int(ttl_seconds * 1000)))
+
+    def ttl(self, key: str) -> Optional[float]:
+        remaining = self._execute("ttl", "PTTL", key)
+        # PTTL يرجع -2 للمفتاح غير الموجود و -1 للمفتاح بلا صلاحية
+        return remaining / 1000 if remaining is not None and remaining > 0 else None
+
+    def delete(self, key: str) -> None:
+        self._execute("delete", "DEL", key)
+
+    def scan(self, prefix: str) -> Iterator[Tuple[str, Any]]:
+        pattern = "".join("\\" + char if char in "*?[]\\" else char for char in prefix) + "*"
+        cursor = b"0"
+        while True:
+            reply = self._execute("scan", "SCAN", cursor, "MATCH", pattern, "COUNT", 500)
+            if reply is None:
+                return
+            cursor, keys = reply
+            if keys:
+                values = self._execute("scan", "MGET", *keys) or []
+                for key, data in zip(keys, values):
+                    value = self._decode("scan", data) if data is not None else None
+                    if value is not None:
+                        yield key.decode("utf-8"), value
+            if cursor == b"0":
+                return
+
+    def increment(self, key: str, ttl_seconds: float) -> Optional[int]:
+        # الصلاحية تُحدد عند إنشاء العداد فقط (NX)، و INCR يحتفظ بها
+        self._execute("increment", "SET", key, 0, "PX", max(1, int(ttl_seconds * 1000)), "NX")
+        return self._execute("increment", "INCR", key)
+
+
+def create_cache_backend(
+    kind: str,
+    sqlite_path: Optional[str] = None,
+    redis_url: Optional[str] = None,
+    memory_max_entries: int = 10000
+) -> CacheBackend:
+    """
+    إنشاء مخزن حسب نوعه
+
+    Args:
+        kind: memory أو sqlite أو redis
+    """
+    if kind == "memory":
+        return MemoryBackend(max_entries=memory_max_entries)
+    if kind == "sqlite":
+        return SQLiteBackend(sqlite_path or os.path.join(tempfile.gettempdir(), "time-weather-cache.sqlite3"))
+    if kind == "redis":
+        return RedisBackend(redis_url or "redis://localhost:6379/0")
+    raise ValueError(f"Unknown cache backend: {kind}")
+
+
+_default_backend: Optional[CacheBackend] = None
+_default_lock = threading.Lock()
+
+
+def get_cache_backend() -> CacheBackend:
+    """المخزن الافتراضي حسب الإعدادات (يُنشأ عند أول استخدام)"""
+    global _default_backend
+    if _default_backend is None:
+        with _default_lock:
+            if _default_backend is None:
+                _default_backend = create_cache_backend(
+                    settings.cache_backend,
+                    sqlite_path=settings.cache_sqlite_path,
+                    redis_url=settings.cache_redis_url,
+                    memory_max_entries=settings.cache_memory_max_entries
+                )
+    return _default_backend
+
+
+def set_cache_backend(backend: CacheBackend) -> None:
+    """استبدال المخزن الافتراضي"""
+    global _default_backend
+    _default_backend = backend
@@ -0,0 +1,190 @@
+"""
+مطابقة أسماء المدن محلياً مع تطبيع النص العربي والتسامح مع الأخطاء الإملائية
+"""
+import re
+import unicodedata
+from typing import Dict, Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# أشكال الحروف العربية التي تُكتب بأكثر من طريقة
+_ARABIC_LETTER_VARIANTS = str.maketrans({
+    "ة": "ه",  # التاء المربوطة
+    "ى": "ي",  # الألف المقصورة
+    "ٱ": "ا",  # ألف الوصل
+    "ـ": None,  # التطويل
+})
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_city_name(name: str) -> str:
+    """
+    تطبيع اسم المدينة للمقارنة
+
+    - توحيد حالة الأحرف والمسافات وإزالة علامات الترقيم
+    - إزالة التشكيل وتوحيد أشكال الألف (أ إ آ ← ا) والهمزات (ؤ ← و، ئ ← ي)
+    - توحيد التاء المربوطة (ة ← ه) والألف المقصورة (ى ← ي)
+    - إزالة "ال" التعريف من بداية الاسم
+    """
+    # NFKD يفصل الهمزات والمدة والتشكيل والنبرات اللاتينية عن الحرف الأساسي
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    text = _NON_WORD.sub(" ", stripped.translate(_ARABIC_LETTER_VARIANTS)).strip()
+
+    if text.startswith("ال") and len(text) > 4:
+        text = text[2:]
+    return text
+
+
+def _pattern_masks(pattern: str) -> Dict[str, int]:
+    """أقنعة البتات لكل حرف في النص (لخوارزمية Myers)"""
+    masks: Dict[str, int] = {}
+    for position, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << position)
+    return masks
+
+
+def levenshtein_distance(text: str, pattern: str, masks: Optional[Dict[str, int]] = None) -> int:
+    """
+    مسافة التحرير (Levenshtein) بين نصين
+
+    تستخدم خوارزمية Myers المتوازية على البتات: عمود كامل من جدول المسافات
+    يُحدَّث بعمليات قليلة على عدد صحيح واحد لكل حرف بدلاً من حلقة داخلية.
+
+    Args:
+        text: النص الأول
+        pattern: النص الثاني
+        masks: أقنعة pattern المحسوبة مسبقاً (اختياري)
+    """
+    length = len(pattern)
+    if length == 0:
+        return len(text)
+
+    masks = masks if masks is not None else _pattern_masks(pattern)
+    full = (1 << length) - 1
+    high_bit = 1 << (length - 1)
+    positive, negative = full, 0
+    score = length
+
+    for char in text:
+        equal = masks.get(char, 0)
+        vertical = equal | negative
+        horizontal = (((equal & positive) + positive) ^ positive) | equal
+        horizontal_positive = negative | ~(horizontal | positive)
+        horizontal_negative = positive & horizontal
+
+        if horizontal_positive & high_bit:
+            score += 1
+        elif horizontal_negative & high_bit:
+            score -= 1
+
+        horizontal_positive = (horizontal_positive << 1) | 1
+        horizontal_negative <<= 1
+        positive = (horizontal_negative | ~(vertical | horizontal_positive)) & full
+        negative = horizontal_positive & vertical & full
+
+    return score
+
+
+def max_typo_distance(name: str) -> int:
+    """عدد الأخطاء المسموح بها حسب طول الاسم"""
+    if len(name) <= 3:
+        return 0
+    if len(name) <= 6:
+        return 1
+    return 2
+
+
+class _BKNode:
+    __slots__ = ("key", "masks", "children")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.masks = _pattern_masks(key)
+        self.children: Dict[int, "_BKNode"] = {}
+
+
+class FuzzyCityIndex(Generic[T]):
+    """
+    فهرس محلي لأسماء المدن: مطابقة تامة بعد التطبيع ثم مطابقة تقريبية عبر BK-tree
+
+    BK-tree يرتب الأسماء حسب مسافة التحرير فيستبعد معظم الأسماء دون مقارنتها
+    """
+
+    def __init__(self, entries: Dict[str, T]):
+        self._values: Dict[str, T] = {}
+        self._root: Optional[_BKNode] = None
+
+        for alias, value in entries.items():
+            self.add(alias, value)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def add(self, alias: str, value: T) -> None:
+        """إضافة اسم مستعار للفهرس"""
+        key = normalize_city_name(alias)
+        if not key or key in self._values:
+            return
+        self._values[key] = value
+
+        if self._root is None:
+            self._root = _BKNode(key)
+            return
+
+        node = self._root
+        while True:
+            distance = levenshtein_distance(key, node.key, node.masks)
+            child = node.children.get(distance)
+            if child is None:
+                node.children[distance] = _BKNode(key)
+                return
+            node = child
+
+    def exact(self, name: str) -> Optional[T]:
+        """المطابقة التامة بعد التطبيع"""
+        return self._values.get(normalize_city_name(name))
+
+    def candidates(self, name: str, max_distance: int) -> List[Tuple[int, str]]:
+        """كل الأسماء ضمن مسافة max_distance مرتبة حسب المسافة"""
+        return self._search(normalize_city_name(name), max_distance)
+
+    def _search(self, key: str, max_distance: int) -> List[Tuple[int, str]]:
+        results = []
+        stack = [self._root] if self._root else []
+
+        while stack:
+            node = stack.pop()
+            distance = levenshtein_distance(key, node.key, node.masks)
+            if distance <= max_distance:
+                results.append((distance, node.key))
+            # متباينة المثلث: الأبناء المفيدون فقط ضمن [d - k, d + k]
+            for child_distance, child in node.children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+
+        return sorted(results)
+
+    def match(self, name: str) -> Optional[T]:
+        """
+        المطابقة التامة ثم التقريبية
+
+        Returns:
+            القيمة المطابقة، أو None إذا لم يوجد تطابق أو كان التطابق ملتبساً
+            (أقرب الأسماء تشير إلى قيم مختلفة)
+        """
+        key = normalize_city_name(name)
+        value = self._values.get(key)
+        if value is not None:
+            return value
+
+        matches = self._search(key, max_typo_distance(key))
+        if not matches:
+            return None
+
+        best_distance = matches[0][0]
+        best_values = {self._values[alias] for distance, alias in matches if distance == best_distance}
+        if len(best_values) != 1:
+            return None
+        return best_values.pop()
@@ -0,0 +1,167 @@
+"""
+ضغط الاستجابات حسب Accept-Encoding (brotli أو gzip)
+
+- الاستجابات الأصغر من الحد الأدنى أو غير النصية تُرسل كما هي
+- الاستجابات الكبيرة تُضغط في خيط منفصل حتى لا تعطل حلقة الأحداث
+- الاستجابات المتدفقة (NDJSON و SSE) لا تُجمع في الذاكرة وتُرسل كما هي
+- brotli اختياري: يُستخدم فقط إذا كانت الحزمة مثبتة
+"""
+import asyncio
+import gzip
+from typing import Dict, Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli اختياري
+    brotli = None
+
+# الترتيب يحدد الأفضلية عند تساوي q
+AVAILABLE_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+# مقاييس مشتركة لكل نسخ الـ middleware
+_stats = {"compressed_responses": 0, "offloaded_responses": 0}
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Iterable[str] = AVAILABLE_ENCODINGS) -> Optional[str]:
+    """
+    اختيار الترميز المناسب من Accept-Encoding
+
+    Returns:
+        "br" أو "gzip"، أو None إذا لم يقبل العميل أياً منهما
+    """
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """ضغط المحتوى بالترميز المطلوب (level: مستوى gzip أو جودة brotli)"""
+    if encoding == "br":
+        return brotli.compress(body, quality=5 if level is None else level)
+    return gzip.compress(body, compresslevel=6 if level is None else level, mtime=0)
+
+
+def precompress(body: bytes, minimum_size: int = 0) -> Dict[str, bytes]:
+    """
+    ضغط المحتوى مسبقاً بكل الترميزات المتاحة بأعلى مستوى
+
+    يُستخدم للاستجابات التي نادراً ما تتغير، فتكلفة الضغط الأعلى تُدفع مرة واحدة
+    """
+    if len(body) < minimum_size:
+        return {}
+    levels = {"br": 11, "gzip": 9}
+    variants = {encoding: compress(body, encoding, levels[encoding]) for encoding in AVAILABLE_ENCODINGS}
+    return {encoding: data for encoding, data in variants.items() if len(data) < len(body)}
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag خاص بكل ترميز حتى لا تتشارك النسخة المضغوطة وغير المضغوطة نفس ETag"""
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+
+
+def strip_encoding_suffix(etag: str) -> str:
+    """إزالة لاحقة الترميز من ETag للمقارنة مع الأصل"""
+    for encoding in ("br", "gzip"):
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+class CompressionMiddleware:
+    """
+    Middleware (ASGI) لضغط الاستجابات المكتملة حسب ترميز يقبله العميل
+
+    Args:
+        minimum_size: أقل حجم (بايت) يستحق الضغط
+        offload_size: الاستجابات الأكبر من هذا الحجم تُضغط في خيط منفصل
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, offload_size: int = 65536,
+                 gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.offload_size = offload_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality}
+
+    def _should_compress(self, headers: MutableHeaders, size: int) -> bool:
+        if size < self.minimum_size or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(_COMPRESSIBLE_TYPES) and content_type != "text/event-stream"
+
+    async def _compress(self, body: bytes, encoding: str) -> bytes:
+        if len(body) >= self.offload_size:
+            _stats["offloaded_responses"] += 1
+            return await asyncio.to_thread(compress, body, encoding, self.levels[encoding])
+        return compress(body, encoding, self.levels[encoding])
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_compressed(message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # تأجيل الترويسات حتى نعرف حجم المحتوى
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._should_compress(headers, len(body)):
+                await send(start)
+                await send(message)
+                return
+
+            compressed = await self._compress(body, encoding)
+            _stats["compressed_responses"] += 1
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers:
+                headers["ETag"] = encoded_etag(headers["etag"], encoding)
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def compression_stats() -> Dict[str, object]:
+    """مقاييس الضغط"""
+    return {"encodings": list(AVAILABLE_ENCODINGS), **_stats}
@@ -7,6 +7,59 @@ class Settings(BaseSettings):
     weather_api_key: str = "your_api_key_here"
     weather_api_url: str = "https://api.openweathermap.org/data/2.5/weather"
     log_level: str = "INFO"
+    max_series_points: int = 20000  # أقصى عدد نقاط في سلسلة فروق التوقيت
+    negative_cache_ttl: int = 600  # مدة تذكر المدن غير الموجودة (ثوانٍ)
+    negative_cache_max_entries: int = 10000
+    geocoder_rate_per_second: float = 1.0  # حد Nominatim العام: طلب واحد في الثانية
+    geocoder_burst: int = 1
+    geocoder_max_queue: int = 50
+    geocoder_max_wait: float = 10.0  # أقصى انتظار في الطابور (ثوانٍ)
+    geocode_cache_ttl: int = 86400
+    timezone_grid_cell_degrees: float = 0.01  # حجم خلية شبكة الإحداثيات (≈ 1.1 كم)
+    timezone_grid_max_cells: int = 100000
+    stream_max_in_flight: int = 64  # أقصى عدد أزواج قيد المعالجة في التدفق الواحد
+    stream_max_line_bytes: int = 4096
+    feed_tick_seconds: float = 1.0
+    feed_weather_refresh_seconds: float = 60.0
+    feed_max_pending_frames: int = 100  # أقصى أحداث تنتظر عميلاً بطيئاً قبل حذف أقدمها
+    feed_max_cities: int = 20
+    weather_cache_ttl: int = 600  # صلاحية بيانات الطقس المخزنة (ثوانٍ)
+    weather_popularity_half_life: float = 600.0
+    weather_prefetch_interval: float = 15.0
+    weather_prefetch_top_k: int = 20  # عدد المدن الأكثر طلباً التي تُحدّث مسبقاً
+    weather_prefetch_refresh_ahead: float = 90.0  # التحديث قبل انتهاء الصلاحية بهذه المدة
+    weather_prefetch_budget_per_minute: int = 30  # أقصى طلبات تحديث مسبق للمصدر في الدقيقة
+    static_cache_max_age: int = 3600  # صلاحية الاستجابات الثابتة (قائمة المدن والصفحة الرئيسية)
+    compression_min_size: int = 1024  # أقل حجم استجابة (بايت) يستحق الضغط
+    compression_offload_size: int = 65536  # الاستجابات الأكبر تُضغط خارج حلقة الأحداث
+    warmup_snapshot_path: Optional[str] = None  # لقطة التخزين المؤقت للتهيئة المسبقة (لا لقطة إذا لم تُحدد)
+    warmup_weather_cities: int = 20  # عدد المدن الأكثر طلباً في لقطة الطقس
+    cache_backend: str = "memory"  # memory أو sqlite (مشترك بين عمليات الجهاز) أو redis
+    cache_sqlite_path: Optional[str] = None  # الافتراضي ملف في المجلد المؤقت للنظام
+    cache_redis_url: str = "redis://localhost:6379/0"
+    cache_memory_max_entries: int = 10000  # أقصى عدد نتائج في مخزن memory (تُحذف الأقدم)
+    request_timeout: float = 15.0  # أقصى مدة لمعالجة الطلب قبل بدء الاستجابة (ثوانٍ)
+    weather_hedging: bool = False  # محاولة ثانية لمصدر الطقس إذا تأخر أكثر من p95
+    geocoder_hedging: bool = False
+    hedge_budget_ratio: float = 0.05  # أقصى نسبة محاولات إضافية من كل الطلبات
+    hedge_min_samples: int = 20  # لا تحوّط قبل رصد هذا العدد من الأزمنة
+    admission_initial_limit: int = 64  # الحد الابتدائي للطلبات المتزامنة (يتكيف مع زمن الاستجابة)
+    admission_min_limit: int = 8
+    admission_max_limit: int = 1024
+    admission_target_latency: float = 1.0  # الزمن المستهدف حتى بدء الاستجابة (ثوانٍ)
+    admission_max_queue_wait: float = 0.1  # أقصى انتظار لمكان قبل الرفض بـ 503
+    admission_low_priority_share: float = 0.5  # نسبة الحد المتاحة لـ /metrics ومسارات المعالجة بالجملة
+    geocoder_bulkhead_size: int = 16  # العمليات المتزامنة لكل خدمة خارجية (وخيوطها الخاصة)
+    geocoder_bulkhead_queue: int = 64  # أقصى عمليات تنتظر مكاناً قبل الرفض بـ 503
+    timezone_bulkhead_size: int = 4
+    timezone_bulkhead_queue: int = 32
+    weather_bulkhead_size: int = 32
+    weather_bulkhead_queue: int = 64
+    bulkhead_max_wait: float = 5.0  # أقصى انتظار لمكان (ضمن مهلة الطلب)
+    loop_lag_monitor: bool = True  # قياس تأخر حلقة الأحداث والتقاط مكدس الكود الذي يعطلها
+    loop_lag_interval: float = 0.05  # الفترة بين نبضات القياس (ثوانٍ)
+    loop_lag_threshold: float = 0.1  # التأخر الذي يُلتقط عنده المكدس (ثوانٍ)
+    memory_debug: bool = False  # مسارات /debug/memory (لقطات tracemalloc)
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,221 @@
+"""
+مهلة واحدة لكل طلب تُمرر عبر كل الاستدعاءات (contextvars)
+
+الـ middleware يحدد المهلة عند وصول الطلب، وكل عملية صادرة (البحث الجغرافي،
+خدمة الطقس) تأخذ من المهلة المتبقية بدلاً من مهلتها الثابتة. عند انتهاء المهلة
+أو انقطاع اتصال العميل تُلغى معالجة الطلب، والعمليات الجارية في خيوط منفصلة
+(asyncio.to_thread ينقل السياق) تتوقف عند أول فحص للمهلة قبل طلب الشبكة التالي.
+"""
+import asyncio
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers
+
+from .exceptions import DeadlineExceededException
+
+logger = logging.getLogger(__name__)
+
+# العميل يمكنه تقصير المهلة (وليس إطالتها) بهذه الترويسة بالثواني
+TIMEOUT_HEADER = "x-request-timeout"
+
+# مقاييس مشتركة لكل نسخ الـ middleware
+_stats = {"timed_out": 0, "client_disconnects": 0}
+
+
+class Deadline:
+    """مهلة طلب واحد: لحظة انتهاء (time.monotonic) وحالة إلغاء"""
+
+    __slots__ = ("expires_at", "cancelled")
+
+    def __init__(self, expires_at: Optional[float]):
+        self.expires_at = expires_at
+        self.cancelled = False
+
+    def remaining(self) -> Optional[float]:
+        """الثواني المتبقية (None إذا لم تكن هناك مهلة)"""
+        if self.cancelled:
+            return 0.0
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def cancel(self) -> None:
+        """إلغاء الطلب (انقطع اتصال العميل أو انتهت المهلة)"""
+        self.cancelled = True
+
+    def disarm(self) -> None:
+        """إيقاف المهلة بعد بدء الاستجابة (الاستجابات المتدفقة قد تستمر طويلاً)"""
+        self.expires_at = None
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """مهلة الطلب الحالي، أو None خارج الطلبات"""
+    return _current.get()
+
+
+def check_deadline(operation: str = "") -> None:
+    """
+    التأكد من بقاء وقت في مهلة الطلب قبل بدء عملية مكلفة
+
+    Raises:
+        DeadlineExceededException: إذا انتهت المهلة أو أُلغي الطلب
+    """
+    deadline = _current.get()
+    if deadline is not None and deadline.expired:
+        raise DeadlineExceededException(operation)
+
+
+def time_left(default: float, operation: str = "") -> float:
+    """
+    المهلة المناسبة لعملية صادرة: مهلتها الافتراضية أو المتبقي من مهلة الطلب أيهما أقل
+
+    Raises:
+        DeadlineExceededException: إذا لم يبقَ وقت
+    """
+    check_deadline(operation)
+    deadline = _current.get()
+    remaining = deadline.remaining() if deadline is not None else None
+    return default if remaining is None else min(default, remaining)
+
+
+def deadline_at(default_seconds: float) -> float:
+    """آخر لحظة (time.monotonic) لعملية مهلتها الافتراضية default_seconds ضمن مهلة الطلب"""
+    return time.monotonic() + time_left(default_seconds)
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]):
+    """تحديد مهلة خارج HTTP (مثلاً في المهام الخلفية أو الاختبارات)"""
+    deadline = Deadline(time.monotonic() + seconds if seconds is not None else None)
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+class DeadlineMiddleware:
+    """
+    Middleware (ASGI) يحدد مهلة كل طلب ويلغي معالجته عند انتهائها أو انقطاع الاتصال
+
+    - الطلب الذي لم تبدأ استجابته قبل انتهاء المهلة يُلغى ويُجاب بـ 504
+    - انقطاع اتصال العميل قبل اكتمال الاستجابة يلغي المعالجة فوراً
+    - بعد بدء الاستجابة تتوقف المهلة (الاستجابات المتدفقة) ويبقى الإلغاء عند الانقطاع
+
+    Args:
+        timeout_seconds: المهلة الافتراضية والقصوى لكل طلب
+        max_buffered_messages: أقصى أجزاء من جسم الطلب تُقرأ مسبقاً قبل أن يطلبها التطبيق
+    """
+
+    def __init__(self, app, timeout_seconds: float = 15.0, max_buffered_messages: int = 8):
+        self.app = app
+        self.timeout_seconds = timeout_seconds
+        self.max_buffered_messages = max_buffered_messages
+
+    def _budget(self, scope) -> float:
+        requested = Headers(scope=scope).get(TIMEOUT_HEADER)
+        try:
+            requested = float(requested) if requested is not None else None
+        except ValueError:
+            requested = None
+        if requested is None or requested <= 0:
+            return self.timeout_seconds
+        return min(requested, self.timeout_seconds)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        deadline = Deadline(time.monotonic() + self._budget(scope))
+        messages: asyncio.Queue = asyncio.Queue(maxsize=self.max_buffered_messages)
+        response_started = False
+        response_complete = False
+
+        async def send_tracked(message) -> None:
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+                deadline.disarm()
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        token = _current.set(deadline)
+        try:
+            # مهمة التطبيق تنسخ السياق الحالي فترى نفس المهلة
+            app_task = asyncio.create_task(self.app(scope, messages.get, send_tracked))
+        finally:
+            _current.reset(token)
+
+        async def watch_client() -> None:
+            # القارئ الوحيد لـ receive؛ التطبيق يقرأ من الطابور
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect" and not response_complete:
+                    _stats["client_disconnects"] += 1
+                    deadline.cancel()
+                    app_task.cancel()
+                    return
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        watcher = asyncio.create_task(watch_client())
+        try:
+            while not app_task.done():
+                await asyncio.wait({app_task}, timeout=deadline.remaining())
+                if not app_task.done() and deadline.expired:
+                    await self._timed_out(scope, deadline, app_task, send, response_started)
+                    return
+            if not app_task.cancelled():
+                app_task.result()
+        except asyncio.CancelledError:
+            app_task.cancel()
+            raise
+        finally:
+            watcher.cancel()
+
+    async def _timed_out(self, scope, deadline: Deadline, app_task: asyncio.Task, send, response_started: bool) -> None:
+        _stats["timed_out"] += 1
+        deadline.cancel()
+        app_task.cancel()
+        try:
+            await app_task
+        except (asyncio.CancelledError, Exception):
+            pass
+        logger.warning(f"⏰ Request deadline exceeded: {scope['method']} {scope['path']}")
+        if response_started:
+            return
+
+        body = json.dumps({
+            "error": "deadline_exceeded",
+            "message": "انتهت المهلة المتاحة للطلب قبل اكتمال المعالجة"
+        }, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 504,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1"))
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def deadline_stats() -> Dict[str, int]:
+    """مقاييس المهل"""
+    return dict(_stats)
@@ -16,4 +16,26 @@ class TimezoneNotFoundException(Exception):
     """استثناء عندما لا يتم العثور على المنطقة الزمنية للمدينة"""
     def __init__(self, city_name: str):
         self.city_name = city_name
-        super().__init__(f"لا يمكن تحديد المنطقة الزمنية للمدينة '{city_name}'")
\ No newline at end of file
+        super().__init__(f"لا يمكن تحديد المنطقة الزمنية للمدينة '{city_name}'")
+
+
+class RateLimitExceededException(Exception):
+    """استثناء عندما يُرفض طلب صادر لخدمة خارجية بسبب تجاوز المعدل المسموح"""
+    def __init__(self, service_name: str, retry_after: float = 1.0):
+        self.service_name = service_name
+        self.retry_after = retry_after
+        super().__init__(f"تم تجاوز معدل الطلبات المسموح لخدمة '{service_name}'")
+
+
+class BulkheadFullException(RateLimitExceededException):
+    """استثناء عندما تمتلئ السعة المخصصة لخدمة خارجية (العمليات المتزامنة وطابور الانتظار)"""
+    def __init__(self, service_name: str, retry_after: float = 1.0):
+        self.service_name = service_name
+        self.retry_after = retry_after
+        Exception.__init__(self, f"السعة المخصصة لخدمة '{service_name}' ممتلئة حالياً")
+
+class DeadlineExceededException(Exception):
+    """استثناء عندما تنتهي المهلة المتاحة للطلب أو يقطع العميل الاتصال قبل اكتماله"""
+    def __init__(self, operation: str = ""):
+        self.operation = operation
+        super().__init__(f"انتهت المهلة المتاحة للطلب قبل تنفيذ '{operation}'" if operation else "انتهت المهلة المتاحة للطلب")
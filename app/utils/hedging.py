@@ -0,0 +1,203 @@
+"""
+تحوّط الطلبات الصادرة (hedged requests) لتقليل زمن الاستجابة في الذيل (p99)
+
+إذا لم تصل إجابة المحاولة الأولى خلال p95 من الأزمنة المرصودة تُرسل محاولة
+ثانية مطابقة، وأول إجابة ناجحة تُستخدم وتُلغى الأخرى. عدد المحاولات الإضافية
+محدود بنسبة من كل الطلبات (budget_ratio) حتى لا يتضاعف الحمل على المصدر عندما
+يكون بطيئاً للجميع.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """آخر window زمن استجابة مع حساب النسب المئوية عند الطلب"""
+
+    def __init__(self, window: int = 1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """النسبة المئوية (مثلاً 0.95)، أو None بدون عينات"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+class Hedger:
+    """
+    تحوّط طلبات مصدر خارجي واحد
+
+    Args:
+        budget_ratio: أقصى نسبة محاولات إضافية من كل الطلبات (0.05 = 5%)
+        min_samples: لا تحوّط قبل رصد هذا العدد من الأزمنة (p95 غير موثوق قبلها)
+        min_delay: أقل انتظار قبل المحاولة الثانية مهما كان p95 صغيراً
+        enabled: عند False تُنفذ المحاولة الأولى فقط
+    """
+
+    def __init__(
+        self,
+        name: str,
+        budget_ratio: float = 0.05,
+        min_samples: int = 20,
+        min_delay: float = 0.02,
+        percentile: float = 0.95,
+        enabled: bool = True,
+        max_workers: int = 16
+    ):
+        self.name = name
+        self.budget_ratio = budget_ratio
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.percentile = percentile
+        self.enabled = enabled
+        self.max_workers = max_workers
+        self.latency = LatencyTracker()
+        self._credits = 0.0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # مقاييس
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.skipped_budget = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """الانتظار قبل المحاولة الثانية، أو None إذا لم يكن التحوّط ممكناً بعد"""
+        if not self.enabled or len(self.latency) < self.min_samples:
+            return None
+        return max(self.min_delay, self.latency.percentile(self.percentile))
+
+    def _start_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+            # كل طلب يضيف جزءاً من محاولة، وكل محاولة إضافية تستهلك محاولة كاملة
+            self._credits = min(10.0, self._credits + self.budget_ratio)
+
+    def _take_hedge_credit(self) -> bool:
+        with self._lock:
+            # هامش صغير لأخطاء التقريب في الأعداد العشرية
+            if self._credits < 1.0 - 1e-9:
+                self.skipped_budget += 1
+                return False
+            self._credits = max(0.0, self._credits - 1.0)
+            self.hedged += 1
+            return True
+
+    async def run(self, attempt: Callable[[], Awaitable[T]], hedge: Optional[Callable[[], Awaitable[T]]] = None) -> T:
+        """
+        تنفيذ طلب غير متزامن مع التحوّط
+
+        Args:
+            attempt: تُنشئ المحاولة (تُستدعى مرة لكل محاولة)
+            hedge: محاولة ثانية مختلفة إن لزم (الافتراضي attempt نفسها)
+        """
+        self._start_call()
+        delay = self.hedge_delay()
+        started = time.monotonic()
+        primary = asyncio.ensure_future(attempt())
+        tasks = {primary}
+        try:
+            if delay is not None:
+                await asyncio.wait(tasks, timeout=delay)
+                if not primary.done() and self._take_hedge_credit():
+                    tasks.add(asyncio.ensure_future((hedge or attempt)()))
+
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self._record(task is primary, started)
+                        return task.result()
+                    if error is None or task is primary:
+                        error = task.exception()
+            raise error
+        finally:
+            # المحاولة الخاسرة تُلغى
+            for task in tasks:
+                task.cancel()
+            if tasks and primary in tasks:
+                # زمن المحاولة الأولى الملغاة حد أدنى لزمنها الحقيقي؛ تسجيله يمنع انحياز p95 للأسرع
+                self.latency.record(time.monotonic() - started)
+
+    def call(self, attempt: Callable[[], T], hedge: Optional[Callable[[], T]] = None) -> T:
+        """
+        تنفيذ طلب متزامن (مكتبة بدون async) مع التحوّط في خيوط منفصلة
+
+        الخيط الخاسر لا يمكن إيقافه: نتيجته تُهمل، ويُلغى إن لم يبدأ بعد.
+        """
+        self._start_call()
+        delay = self.hedge_delay()
+        if delay is None:
+            started = time.monotonic()
+            result = attempt()
+            self._record(True, started)
+            return result
+
+        executor = self._get_executor()
+        started = time.monotonic()
+        # كل محاولة تأخذ نسخة من السياق (ومنه مهلة الطلب)
+        primary = executor.submit(contextvars.copy_context().run, attempt)
+        futures = {primary}
+        try:
+            done, _ = wait(futures, timeout=delay)
+            if not done and self._take_hedge_credit():
+                futures.add(executor.submit(contextvars.copy_context().run, hedge or attempt))
+
+            error = None
+            while futures:
+                done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        self._record(future is primary, started)
+                        return future.result()
+                    if error is None or future is primary:
+                        error = future.exception()
+            raise error
+        finally:
+            for future in futures:
+                future.cancel()
+            if futures and primary in futures:
+                self.latency.record(time.monotonic() - started)
+
+    def _record(self, primary_won: bool, started: float) -> None:
+        self.latency.record(time.monotonic() - started)
+        if not primary_won:
+            self.hedge_wins += 1
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"hedge-{self.name}")
+            return self._executor
+
+    def stats(self) -> Dict[str, Any]:
+        """مقاييس التحوّط"""
+        p95 = self.latency.percentile(0.95)
+        return {
+            "enabled": self.enabled,
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "skipped_budget": self.skipped_budget,
+            "latency_samples": len(self.latency),
+            "p95_seconds": round(p95, 4) if p95 is not None else None
+        }
@@ -0,0 +1,159 @@
+"""
+التخزين المؤقت لاستجابات HTTP المرمّزة مع ETag والطلبات الشرطية (304)
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from .compression import encoded_etag, negotiate_encoding, precompress, strip_encoding_suffix
+
+
+def make_etag(body: bytes) -> str:
+    """ETag قوي مشتق من محتوى الاستجابة"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """مقارنة If-None-Match مع ETag (المقارنة الضعيفة كما في RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        strip_encoding_suffix(tag.strip().removeprefix("W/")) == etag
+        for tag in if_none_match.split(",")
+    )
+
+
+def encode_json(payload: Any) -> bytes:
+    """ترميز JSON بنفس صيغة JSONResponse في FastAPI"""
+    if isinstance(payload, BaseModel):
+        payload = payload.model_dump(mode="json")
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class CachedResponse:
+    """
+    استجابة مرمّزة مسبقاً مع ETag ومدة صلاحية
+
+    variants: نسخ مضغوطة مسبقاً لكل ترميز (للاستجابات التي نادراً ما تتغير)
+    """
+
+    __slots__ = ("body", "etag", "expires_at", "media_type", "variants")
+
+    def __init__(self, body: bytes, ttl_seconds: float, media_type: str = "application/json",
+                 variants: Optional[Dict[str, bytes]] = None):
+        self.body = body
+        self.etag = make_etag(body)
+        self.expires_at = time.monotonic() + ttl_seconds
+        self.media_type = media_type
+        self.variants = variants or {}
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    @property
+    def max_age(self) -> int:
+        return max(0, int(self.expires_at - time.monotonic()))
+
+    def headers(self, encoding: Optional[str] = None) -> Dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": f"public, max-age={self.max_age}"}
+        if self.variants:
+            headers["Vary"] = "Accept-Encoding"
+        if encoding is not None:
+            headers["ETag"] = encoded_etag(self.etag, encoding)
+            headers["Content-Encoding"] = encoding
+        return headers
+
+    def is_not_modified(self, request: Request) -> bool:
+        return etag_matches(request.headers.get("if-none-match"), self.etag)
+
+    def respond(self, request: Request) -> Response:
+        """304 إذا كانت نسخة العميل مطابقة، وإلا الاستجابة الكاملة (المضغوطة مسبقاً إن وجدت)"""
+        encoding = None
+        if self.variants:
+            encoding = negotiate_encoding(request.headers.get("accept-encoding"), self.variants)
+
+        if self.is_not_modified(request):
+            headers = self.headers(encoding)
+            headers.pop("Content-Encoding", None)
+            return Response(status_code=304, headers=headers)
+
+        body = self.variants[encoding] if encoding is not None else self.body
+        return Response(content=body, media_type=self.media_type, headers=self.headers(encoding))
+
+
+class ResponseCache:
+    """
+    مخزن محدود الحجم (LRU) للاستجابات المرمّزة لكل مفتاح
+
+    الاستجابة تُرمّز ويُحسب ETag لها مرة واحدة، ثم تُستخدم لكل الطلبات حتى
+    تنتهي صلاحيتها، فلا يُعاد الترميز ولا حساب ETag مع كل طلب.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.not_modified = 0
+        self.encoded = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """الاستجابة المخزنة إذا كانت صالحة"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if not entry.fresh:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, payload: Any, ttl_seconds: float, precompress_min_size: Optional[int] = None) -> CachedResponse:
+        """
+        ترميز الاستجابة وتخزينها
+
+        Args:
+            precompress_min_size: ضغط الاستجابة مسبقاً بكل الترميزات إذا لم يقل حجمها عن هذا الحد
+        """
+        body = encode_json(payload)
+        variants = precompress(body, precompress_min_size) if precompress_min_size is not None else None
+        entry = CachedResponse(body, ttl_seconds, variants=variants)
+        with self._lock:
+            self.encoded += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def respond(self, request: Request, entry: CachedResponse) -> Response:
+        response = entry.respond(request)
+        if response.status_code == 304:
+            self.not_modified += 1
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        """إحصائيات الاستجابات المخزنة"""
+        return {
+            "entries": len(self._entries),
+            "encoded": self.encoded,
+            "not_modified": self.not_modified
+        }
+
+
+# مخزن واحد مشترك لكل المسارات
+response_cache = ResponseCache()
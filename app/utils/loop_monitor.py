@@ -0,0 +1,182 @@
+"""
+مراقبة تأخر حلقة الأحداث (event loop lag) وتحديد الكود الذي يعطلها
+
+مهمة نبض في الحلقة تنام interval ثانية وتقيس تأخر استيقاظها عن الموعد المتوقع؛
+هذا التأخر هو ما ينتظره كل طلب آخر قبل أن يُنفذ. خيط مراقبة منفصل يلاحظ توقف
+النبض أثناء حدوثه، فإذا تجاوز التوقف العتبة يلتقط مكدس خيط الحلقة
+(sys._current_frames) ليظهر الكود المتزامن الذي يحجزها (مثل طلب شبكة متزامن داخل
+دالة async). الأزمنة تُجمع في مدرج تكراري، ومواضع التعطيل تُجمع حسب موضعها في الكود.
+"""
+import asyncio
+import bisect
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# حدود فئات المدرج التكراري بالميلي ثانية (الفئة الأخيرة لما فوقها)
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# ملفات التطبيق تُفضل عند تحديد موضع التعطيل على ملفات المكتبات
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LoopLagMonitor:
+    """
+    مراقب تأخر حلقة الأحداث
+
+    Args:
+        interval: الفترة بين نبضات القياس (ثوانٍ)
+        threshold: التأخر الذي يُعتبر تعطيلاً ويُلتقط مكدسه (ثوانٍ)
+        max_sites: أقصى عدد مواضع تعطيل محفوظة
+        stack_depth: عدد الإطارات المحفوظة من كل مكدس
+    """
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, max_sites: int = 20, stack_depth: int = 12):
+        self.interval = interval
+        self.threshold = threshold
+        self.max_sites = max_sites
+        self.stack_depth = stack_depth
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._beat: Optional[float] = None
+        self._capture: Optional[Tuple[float, str, List[str]]] = None
+        self._lock = threading.Lock()
+
+        # مقاييس
+        self.samples = 0
+        self.stalls = 0
+        self.max_lag = 0.0
+        self._histogram = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self._recent = deque(maxlen=1000)
+        self._sites: Dict[str, Dict[str, Any]] = {}
+
+    def start(self) -> None:
+        """بدء المراقبة (يُستدعى من داخل حلقة الأحداث)"""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info("🩺 Event loop lag monitor started")
+
+    async def stop(self) -> None:
+        """إيقاف المراقبة"""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._beat = None
+        logger.info("🩺 Event loop lag monitor stopped")
+
+    async def _heartbeat(self) -> None:
+        while True:
+            started = time.monotonic()
+            self._beat = started
+            await asyncio.sleep(self.interval)
+            self._record(max(0.0, time.monotonic() - started - self.interval), started)
+
+    def _watch(self) -> None:
+        """خيط المراقبة: التقاط المكدس أثناء التعطيل (الحلقة نفسها لا تستطيع ذلك)"""
+        poll = min(self.interval, self.threshold) / 2
+        while not self._stopped.wait(poll):
+            beat = self._beat
+            if beat is None or time.monotonic() - beat - self.interval <= self.threshold:
+                continue
+            capture = self._capture
+            if capture is not None and capture[0] == beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                site, stack = self._describe(frame)
+                self._capture = (beat, site, stack)
+
+    def _describe(self, frame) -> Tuple[str, List[str]]:
+        """موضع التعطيل (أعمق إطار من كود التطبيق) والمكدس المختصر"""
+        frames = traceback.extract_stack(frame)[-self.stack_depth:]
+        stack = [f"{self._short_path(f.filename)}:{f.lineno} in {f.name}" for f in frames]
+        for index in range(len(frames) - 1, -1, -1):
+            if frames[index].filename.startswith(_APP_ROOT) and frames[index].filename != __file__:
+                return stack[index], stack
+        return stack[-1], stack
+
+    @staticmethod
+    def _short_path(path: str) -> str:
+        root = os.path.dirname(_APP_ROOT)
+        return os.path.relpath(path, root) if path.startswith(root) else path
+
+    def _record(self, lag: float, beat: float) -> None:
+        lag_ms = lag * 1000
+        with self._lock:
+            self.samples += 1
+            self.max_lag = max(self.max_lag, lag)
+            self._histogram[bisect.bisect_left(LAG_BUCKETS_MS, lag_ms)] += 1
+            self._recent.append(lag)
+            if lag <= self.threshold:
+                return
+
+            self.stalls += 1
+            capture = self._capture
+            site, stack = (capture[1], capture[2]) if capture is not None and capture[0] == beat else ("unknown", [])
+            entry = self._sites.get(site)
+            if entry is None:
+                if len(self._sites) >= self.max_sites:
+                    # استبدال الموضع الأقل تكراراً
+                    del self._sites[min(self._sites, key=lambda key: self._sites[key]["count"])]
+                entry = self._sites[site] = {"count": 0, "total_lag": 0.0, "max_lag": 0.0, "stack": stack}
+            entry["count"] += 1
+            entry["total_lag"] += lag
+            entry["max_lag"] = max(entry["max_lag"], lag)
+            if stack:
+                entry["stack"] = stack
+        logger.warning(f"🐢 Event loop blocked for {lag_ms:.0f}ms at {site}")
+
+    def stats(self) -> Dict[str, Any]:
+        """المدرج التكراري للتأخر ومواضع التعطيل الأكثر تكراراً"""
+        with self._lock:
+            recent = sorted(self._recent)
+            labels = [f"<={bound}" for bound in LAG_BUCKETS_MS] + [f">{LAG_BUCKETS_MS[-1]}"]
+            offenders = sorted(self._sites.items(), key=lambda item: item[1]["count"], reverse=True)
+            return {
+                "running": self._task is not None and not self._task.done(),
+                "interval_seconds": self.interval,
+                "threshold_seconds": self.threshold,
+                "samples": self.samples,
+                "stalls": self.stalls,
+                "max_lag_ms": round(self.max_lag * 1000, 2),
+                "p99_lag_ms": round(recent[int(len(recent) * 0.99)] * 1000, 2) if recent else 0.0,
+                "histogram_ms": dict(zip(labels, self._histogram)),
+                "offenders": [
+                    {
+                        "site": site,
+                        "count": entry["count"],
+                        "max_lag_ms": round(entry["max_lag"] * 1000, 2),
+                        "average_lag_ms": round(entry["total_lag"] / entry["count"] * 1000, 2),
+                        "stack": list(entry["stack"])
+                    }
+                    for site, entry in offenders
+                ]
+            }
+
+
+# إنشاء مثيل واحد من المراقب
+loop_lag_monitor = LoopLagMonitor(
+    interval=settings.loop_lag_interval,
+    threshold=settings.loop_lag_threshold
+)
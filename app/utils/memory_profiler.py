@@ -0,0 +1,136 @@
+"""
+تشخيص الذاكرة: لقطات tracemalloc والمقارنة بينها وحجم الذاكرة المقيمة (RSS)
+
+tracemalloc يبطئ كل عملية تخصيص، لذلك لا يعمل إلا بعد طلب أول لقطة ويتوقف عند
+حذفها. المقارنة بين لقطتين تُظهر مواضع الكود التي تزيد الذاكرة بينهما، وأحجام
+التخزين المؤقت الداخلية تُظهر إن كانت الزيادة في بيانات محدودة الحجم أصلاً.
+"""
+import os
+import threading
+import tracemalloc
+from collections import deque
+from typing import Any, Dict, Optional
+
+# ما يخصصه tracemalloc نفسه ونظام الاستيراد لا يهم عند البحث عن تسريب
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# طرق تجميع مواضع التخصيص في التقارير
+GROUP_BY_PATTERN = "^(lineno|filename|traceback)$"
+
+
+def rss_bytes() -> Optional[int]:
+    """الذاكرة المقيمة للعملية من /proc/self/statm (None خارج Linux)"""
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def buffer_sizes(owner: Any) -> Dict[str, int]:
+    """عدد العناصر في كل حاوية (deque أو dict أو list) يحتفظ بها كائن مقاييس أو تخزين مؤقت"""
+    return {
+        name.lstrip("_"): len(value)
+        for name, value in vars(owner).items()
+        if isinstance(value, (deque, dict, list))
+    }
+
+
+def _short_path(path: str) -> str:
+    return os.path.relpath(path, _PROJECT_ROOT) if path.startswith(_PROJECT_ROOT) else path
+
+
+class MemoryProfiler:
+    """
+    لقطة أساس من tracemalloc ومقارنة الذاكرة الحالية بها
+
+    Args:
+        top_n: عدد مواضع التخصيص في كل تقرير
+        frames: عدد الإطارات المحفوظة لكل تخصيص (لتجميع traceback)
+    """
+
+    def __init__(self, top_n: int = 20, frames: int = 10):
+        self.top_n = top_n
+        self.frames = frames
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._started_tracing = False
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def _take(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+    def snapshot(self, group_by: str = "lineno") -> Dict[str, Any]:
+        """بدء التتبع إن لم يكن يعمل وحفظ لقطة أساس جديدة مع أكبر مواضع التخصيص فيها"""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+                self._started_tracing = True
+            self._baseline = self._take()
+            statistics = self._baseline.statistics(group_by)
+        return {
+            **self.summary(),
+            "top": [self._format(stat, group_by) for stat in statistics[:self.top_n]]
+        }
+
+    def diff(self, group_by: str = "lineno") -> Optional[Dict[str, Any]]:
+        """المواضع التي زادت (أو نقصت) ذاكرتها منذ لقطة الأساس، أو None بدون لقطة"""
+        with self._lock:
+            if self._baseline is None or not tracemalloc.is_tracing():
+                return None
+            statistics = self._take().compare_to(self._baseline, group_by)
+        return {
+            **self.summary(),
+            "growth_bytes": sum(stat.size_diff for stat in statistics),
+            "top": [self._format(stat, group_by) for stat in statistics[:self.top_n]]
+        }
+
+    def stop(self) -> None:
+        """حذف لقطة الأساس وإيقاف التتبع إذا كان قد بدأ من هنا"""
+        with self._lock:
+            self._baseline = None
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    def summary(self) -> Dict[str, Any]:
+        """الذاكرة المقيمة وحجم الذاكرة المتتبعة"""
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "rss_bytes": rss_bytes(),
+            "tracing": tracemalloc.is_tracing(),
+            "has_baseline": self._baseline is not None,
+            "traced_current_bytes": current,
+            "traced_peak_bytes": peak
+        }
+
+    @staticmethod
+    def _format(stat, group_by: str) -> Dict[str, Any]:
+        # الإطارات مرتبة من الأقدم للأحدث؛ الأخير هو موضع التخصيص نفسه
+        frame = stat.traceback[-1]
+        entry: Dict[str, Any] = {
+            "site": _short_path(frame.filename) if group_by == "filename" else f"{_short_path(frame.filename)}:{frame.lineno}",
+            "size_bytes": stat.size,
+            "count": stat.count
+        }
+        if hasattr(stat, "size_diff"):
+            entry["size_diff_bytes"] = stat.size_diff
+            entry["count_diff"] = stat.count_diff
+        if group_by == "traceback":
+            entry["traceback"] = [f"{_short_path(f.filename)}:{f.lineno}" for f in stat.traceback]
+        return entry
+
+
+# مثيل واحد للعملية (tracemalloc عام للعملية كلها)
+memory_profiler = MemoryProfiler()
@@ -0,0 +1,125 @@
+"""
+تخزين مؤقت سلبي لأسماء المدن غير الموجودة، مع Bloom filter في المقدمة
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict
+
+from .city_matching import normalize_city_name
+
+
+class BloomFilter:
+    """
+    Bloom filter مضغوط: "غير موجود" مؤكدة دائماً، و"موجود" محتملة فقط
+
+    يُستخدم لرفض معظم الأسماء (الصحيحة) دون البحث في القاموس
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        # الحجم الأمثل: m = -n ln(p) / (ln 2)^2 و k = (m / n) ln 2
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        # Double hashing: h_i = h1 + i * h2
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def fill_ratio(self) -> float:
+        """نسبة البتات المفعلة"""
+        return sum(bin(byte).count("1") for byte in self.bits) / self.size
+
+
+class NegativeCache:
+    """
+    تخزين مؤقت محدود المدة والحجم لأسماء المدن التي لم يجدها البحث الجغرافي
+
+    الأسماء تُطبَّع قبل التخزين، فتشترك الكتابات المختلفة لنفس الاسم في نفس
+    المدخل. Bloom filter لا يدعم الحذف، لذلك يُعاد بناؤه من المدخلات الحية
+    عندما تتراكم فيه مدخلات منتهية الصلاحية.
+    """
+
+    def __init__(self, ttl_seconds: int = 600, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._bloom = BloomFilter(max_entries)
+        self._bloom_insertions = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.bloom_rejections = 0
+
+    def contains(self, city_name: str) -> bool:
+        """هل الاسم مسجل كمدينة غير موجودة ولم تنتهِ صلاحيته؟"""
+        key = normalize_city_name(city_name)
+        if key not in self._bloom:
+            self.bloom_rejections += 1
+            return False
+
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return False
+            self.hits += 1
+            return True
+
+    def add(self, city_name: str) -> None:
+        """تسجيل اسم مدينة غير موجودة"""
+        key = normalize_city_name(city_name)
+        with self._lock:
+            self._entries[key] = time.monotonic() + self.ttl_seconds
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            self._bloom.add(key)
+            self._bloom_insertions += 1
+            if self._bloom_insertions > 2 * self.max_entries:
+                self._rebuild_bloom()
+
+    def _rebuild_bloom(self) -> None:
+        """إعادة بناء Bloom filter من المدخلات الحية فقط"""
+        now = time.monotonic()
+        for key in [key for key, expires_at in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+
+        bloom = BloomFilter(self.max_entries)
+        for key in self._entries:
+            bloom.add(key)
+        self._bloom = bloom
+        self._bloom_insertions = len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bloom = BloomFilter(self.max_entries)
+            self._bloom_insertions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, float]:
+        """إحصائيات التخزين السلبي"""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "bloom_rejections": self.bloom_rejections,
+            "bloom_fill_ratio": round(self._bloom.fill_ratio(), 4),
+            "bloom_size_bytes": len(self._bloom.bits)
+        }
@@ -4,9 +4,12 @@
 import time
 import asyncio
 from functools import wraps
-from typing import Callable, Any
+from typing import Callable, Any, List, Optional, Tuple
 import logging
 
+from .cache_backends import CacheBackend, get_cache_backend, schema_tag
+from .deadline import check_deadline, time_left
+
 logger = logging.getLogger(__name__)
 
 
@@ -119,17 +122,21 @@ performance_metrics = PerformanceMetrics()
 def timeout_handler(timeout_seconds: float = 5.0):
     """
     Decorator لإضافة timeout للوظائف غير المتزامنة
+    
+    المهلة لا تتجاوز المتبقي من مهلة الطلب الحالي (انظر deadline)
     """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         async def wrapper(*args, **kwargs) -> Any:
+            timeout = time_left(timeout_seconds, func.__name__)
             try:
                 return await asyncio.wait_for(
                     func(*args, **kwargs), 
-                    timeout=timeout_seconds
+                    timeout=timeout
                 )
             except asyncio.TimeoutError:
-                logger.error(f"⏰ Function {func.__name__} timed out after {timeout_seconds}s")
+                logger.error(f"⏰ Function {func.__name__} timed out after {timeout:.3f}s")
+                check_deadline(func.__name__)
                 raise TimeoutError(f"Operation timed out after {timeout_seconds} seconds")
         
         return wrapper
@@ -137,67 +144,125 @@ def timeout_handler(timeout_seconds: float = 5.0):
     return decorator
 
 
-def cache_result(ttl_seconds: int = 300):
+def cache_result(ttl_seconds: int = 300, backend: Optional[CacheBackend] = None):
     """
     Decorator بسيط للتخزين المؤقت (Cache)
+    
+    النتائج تُحفظ في مخزن قابل للاستبدال (cache_backends): الافتراضي حسب
+    الإعدادات، فيمكن أن تتشارك كل عمليات uvicorn نفس النتائج؛ في الدوال غير
+    المتزامنة تُنفذ عمليات المخازن المشتركة في خيط منفصل. الكائنات التي
+    تعرّف cache_namespace (مثل الخدمات) تُمثَّل في المفتاح به بدلاً من عنوانها
+    في الذاكرة حتى يكون المفتاح نفسه في كل العمليات، والمفتاح يبدأ بوسم نسخة
+    القيم (schema_tag) فلا تُقرأ بعد التحديث نتائج خُزنت بنموذج مختلف.
+    
+    الدالة الناتجة توفر أيضاً (لجدولة التحديث المسبق):
+    - expires_in(*args, **kwargs): الثواني المتبقية قبل انتهاء صلاحية النتيجة، أو None
+    - refresh(*args, **kwargs): إعادة حساب النتيجة وتخزينها حتى لو كانت صالحة
+    - prime(result, *args, **kwargs): تخزين نتيجة معروفة مسبقاً (مثلاً من لقطة عند بدء التشغيل)
+    - entries(): النتائج الصالحة مع معاملاتها (args, kwargs, result)
+    - cache_stats: عدد مرات الإصابة والإخفاق
     """
-    cache = {}
+    stats = {"hits": 0, "misses": 0}
     
     def decorator(func: Callable) -> Callable:
+        # وسم النسخة في المفتاح: القيم المخزنة قبل تغيير النموذج لا تُقرأ بعده
+        prefix = f"{schema_tag(func)}:{func.__module__}.{func.__qualname__}:"
+        
+        def get_backend() -> CacheBackend:
+            return backend if backend is not None else get_cache_backend()
+        
+        def key_args(args: tuple) -> tuple:
+            return tuple(getattr(arg, "cache_namespace", arg) for arg in args)
+        
+        def make_key(args, kwargs) -> str:
+            return f"{prefix}{str(key_args(args))}:{str(kwargs)}"
+        
+        def found_in(entry) -> Tuple[bool, Any]:
+            if entry is not None:
+                stats["hits"] += 1
+                logger.debug(f"🎯 Cache hit for {func.__name__}")
+                return True, entry[0]
+            stats["misses"] += 1
+            return False, None
+        
+        def lookup(cache_key: str) -> Tuple[bool, Any]:
+            return found_in(get_backend().get(cache_key))
+        
+        async def lookup_async(cache_key: str) -> Tuple[bool, Any]:
+            cache = get_backend()
+            if not cache.blocking:
+                return found_in(cache.get(cache_key))
+            # SQLite المقفل أو Redis البطيء لا يحجز حلقة الأحداث
+            return found_in(await asyncio.to_thread(cache.get, cache_key))
+        
+        def store(cache_key: str, result: Any, args: tuple, kwargs: dict) -> None:
+            # المعاملات تُخزن مع النتيجة حتى يمكن استعادتها في entries()
+            get_backend().set(cache_key, (result, key_args(args), kwargs), ttl_seconds)
+            logger.debug(f"💾 Cached result for {func.__name__}")
+        
+        async def store_async(cache_key: str, result: Any, args: tuple, kwargs: dict) -> None:
+            cache = get_backend()
+            if not cache.blocking:
+                store(cache_key, result, args, kwargs)
+                return
+            await asyncio.to_thread(cache.set, cache_key, (result, key_args(args), kwargs), ttl_seconds)
+            logger.debug(f"💾 Cached result for {func.__name__}")
+        
+        def expires_in(*args, **kwargs) -> Optional[float]:
+            return get_backend().ttl(make_key(args, kwargs))
+        
+        def prime(result: Any, *args, **kwargs) -> None:
+            store(make_key(args, kwargs), result, args, kwargs)
+        
+        def entries() -> List[Tuple[tuple, dict, Any]]:
+            return [(args, kwargs, result) for _, (result, args, kwargs) in get_backend().scan(prefix)]
+        
         @wraps(func)
         async def async_wrapper(*args, **kwargs) -> Any:
             # إنشاء مفتاح التخزين المؤقت
-            cache_key = f"{func.__name__}:{str(args)}:{str(kwargs)}"
-            current_time = time.time()
+            cache_key = make_key(args, kwargs)
             
             # التحقق من وجود النتيجة في التخزين المؤقت
-            if cache_key in cache:
-                cached_result, cached_time = cache[cache_key]
-                if current_time - cached_time < ttl_seconds:
-                    logger.debug(f"🎯 Cache hit for {func.__name__}")
-                    return cached_result
+            found, cached_result = await lookup_async(cache_key)
+            if found:
+                return cached_result
             
             # تنفيذ الوظيفة وحفظ النتيجة
             result = await func(*args, **kwargs)
-            cache[cache_key] = (result, current_time)
-            
-            # تنظيف التخزين المؤقت من النتائج المنتهية الصلاحية
-            expired_keys = [
-                key for key, (_, cached_time) in cache.items()
-                if current_time - cached_time >= ttl_seconds
-            ]
-            for key in expired_keys:
-                del cache[key]
-            
-            logger.debug(f"💾 Cached result for {func.__name__}")
+            await store_async(cache_key, result, args, kwargs)
+            return result
+        
+        async def async_refresh(*args, **kwargs) -> Any:
+            result = await func(*args, **kwargs)
+            await store_async(make_key(args, kwargs), result, args, kwargs)
             return result
         
         @wraps(func)
         def sync_wrapper(*args, **kwargs) -> Any:
             # نفس المنطق للوظائف المتزامنة
-            cache_key = f"{func.__name__}:{str(args)}:{str(kwargs)}"
-            current_time = time.time()
+            cache_key = make_key(args, kwargs)
             
-            if cache_key in cache:
-                cached_result, cached_time = cache[cache_key]
-                if current_time - cached_time < ttl_seconds:
-                    logger.debug(f"🎯 Cache hit for {func.__name__}")
-                    return cached_result
+            found, cached_result = lookup(cache_key)
+            if found:
+                return cached_result
             
             result = func(*args, **kwargs)
-            cache[cache_key] = (result, current_time)
-            
-            # تنظيف التخزين المؤقت
-            expired_keys = [
-                key for key, (_, cached_time) in cache.items()
-                if current_time - cached_time >= ttl_seconds
-            ]
-            for key in expired_keys:
-                del cache[key]
-            
-            logger.debug(f"💾 Cached result for {func.__name__}")
+            store(cache_key, result, args, kwargs)
             return result
         
-        return async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
+        def sync_refresh(*args, **kwargs) -> Any:
+            result = func(*args, **kwargs)
+            store(make_key(args, kwargs), result, args, kwargs)
+            return result
+        
+        if asyncio.iscoroutinefunction(func):
+            wrapper, wrapper.refresh = async_wrapper, async_refresh
+        else:
+            wrapper, wrapper.refresh = sync_wrapper, sync_refresh
+        wrapper.expires_in = expires_in
+        wrapper.prime = prime
+        wrapper.entries = entries
+        wrapper.cache_stats = stats
+        return wrapper
     
-    return decorator
\ No newline at end of file
+    return decorator
@@ -0,0 +1,54 @@
+"""
+تتبع شعبية المفاتيح (مثل المدن) بعداد يتناقص مع الزمن
+"""
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class PopularityTracker:
+    """
+    عداد وصول لكل مفتاح يتناقص للنصف كل half_life_seconds
+
+    المدن التي طُلبت كثيراً مؤخراً تتصدر القائمة، والمدن التي توقف الطلب
+    عليها تتراجع تدريجياً ثم تُحذف، فيبقى عدد المفاتيح المتتبعة محدوداً.
+    """
+
+    def __init__(self, half_life_seconds: float = 600.0, max_keys: int = 1000):
+        self.half_life_seconds = half_life_seconds
+        self.max_keys = max_keys
+        self._decay = math.log(2) / half_life_seconds
+        self._scores: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _score_at(self, key: str, now: float) -> float:
+        score, updated_at = self._scores[key]
+        return score * math.exp(-self._decay * (now - updated_at))
+
+    def record(self, key: str, now: Optional[float] = None) -> None:
+        """تسجيل وصول للمفتاح"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            score = self._score_at(key, now) if key in self._scores else 0.0
+            self._scores[key] = (score + 1.0, now)
+            if len(self._scores) > self.max_keys:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        # حذف الربع الأقل شعبية دفعة واحدة بدلاً من مفتاح مع كل تسجيل
+        ranked = sorted(self._scores, key=lambda key: self._score_at(key, now))
+        for key in ranked[:max(1, len(ranked) // 4)]:
+            del self._scores[key]
+
+    def hottest(self, count: int, now: Optional[float] = None, min_score: float = 0.5) -> List[Tuple[str, float]]:
+        """أكثر المفاتيح شعبية الآن مرتبة تنازلياً مع درجاتها"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            scored = [(key, self._score_at(key, now)) for key in self._scores]
+        scored = [(key, score) for key, score in scored if score >= min_score]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:count]
+
+    def __len__(self) -> int:
+        return len(self._scores)
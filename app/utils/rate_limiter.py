@@ -0,0 +1,192 @@
+"""
+محدد معدل الطلبات الصادرة (Token bucket) مع طابور أولويات محدود
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from .exceptions import RateLimitExceededException
+
+
+class TokenBucket:
+    """دلو الرموز: rate رمز في الثانية بحد أقصى capacity رمز متراكم"""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+
+    def try_acquire(self, now: float) -> float:
+        """
+        محاولة أخذ رمز
+
+        Returns:
+            0 إذا أُخذ الرمز، وإلا عدد الثواني حتى يتوفر الرمز التالي
+        """
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        # هامش صغير لأخطاء التقريب في الأعداد العشرية
+        if self.tokens >= 1 - 1e-9:
+            self.tokens = max(0.0, self.tokens - 1)
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class _Waiter:
+    __slots__ = ("priority", "sequence", "enqueued_at", "deadline", "cancelled", "evicted")
+
+    def __init__(self, priority: int, sequence: int, enqueued_at: float, deadline: Optional[float]):
+        self.priority = priority
+        self.sequence = sequence
+        self.enqueued_at = enqueued_at
+        self.deadline = deadline
+        self.cancelled = False
+        self.evicted = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+class RateLimitedQueue:
+    """
+    طابور انتظار محدود بأولويات أمام خدمة خارجية محدودة المعدل
+
+    - الرقم الأصغر في priority يعني أولوية أعلى (0 للطلبات التفاعلية)
+    - الطلب الذي لن يصل دوره قبل deadline يُرفض فوراً بدلاً من الانتظار بلا فائدة
+    - عند امتلاء الطابور يُطرد الطلب الأقل أولوية (أو يُرفض الطلب الجديد)
+    """
+
+    def __init__(self, name: str, rate: float, burst: int = 1, max_queue: int = 50):
+        self.name = name
+        self.max_queue = max_queue
+        self._bucket = TokenBucket(rate, burst)
+        self._heap = []
+        self._depth = 0
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+        # مقاييس
+        self.acquired = 0
+        self.dropped_deadline = 0
+        self.dropped_full = 0
+        self.max_depth = 0
+        self._total_wait = 0.0
+        self._recent_waits = deque(maxlen=1000)
+
+    def acquire(self, priority: int = 0, deadline: Optional[float] = None) -> float:
+        """
+        انتظار دور الطلب وأخذ رمز
+
+        Args:
+            priority: أولوية الطلب (الأصغر أولاً)
+            deadline: آخر لحظة مقبولة (time.monotonic) لبدء الطلب
+
+        Returns:
+            مدة الانتظار بالثواني
+
+        Raises:
+            RateLimitExceededException: إذا امتلأ الطابور أو لن يصل الدور قبل deadline
+        """
+        with self._condition:
+            now = time.monotonic()
+            ahead = sum(1 for waiter in self._heap if not waiter.cancelled and waiter.priority <= priority)
+            expected_wait = ahead / self._bucket.rate
+            if deadline is not None and now + expected_wait > deadline:
+                self.dropped_deadline += 1
+                raise RateLimitExceededException(self.name, retry_after=expected_wait)
+
+            if self._depth >= self.max_queue:
+                self._evict_lowest_priority(priority)
+
+            waiter = _Waiter(priority, next(self._sequence), now, deadline)
+            heapq.heappush(self._heap, waiter)
+            self._depth += 1
+            self.max_depth = max(self.max_depth, self._depth)
+
+            try:
+                return self._wait_for_turn(waiter)
+            finally:
+                # السماح للطلب التالي بفحص دوره
+                self._condition.notify_all()
+
+    def try_acquire(self) -> bool:
+        """أخذ رمز فوراً إذا كان متاحاً ولا ينتظر أحد قبله، دون دخول الطابور"""
+        with self._condition:
+            if any(not waiter.cancelled for waiter in self._heap):
+                return False
+            if self._bucket.try_acquire(time.monotonic()) > 0:
+                return False
+            self._record_wait(0.0)
+            return True
+
+    def _evict_lowest_priority(self, priority: int) -> None:
+        live = [waiter for waiter in self._heap if not waiter.cancelled]
+        worst = max(live, key=lambda waiter: (waiter.priority, waiter.sequence), default=None)
+        if worst is None or worst.priority <= priority:
+            self.dropped_full += 1
+            raise RateLimitExceededException(self.name, retry_after=self._depth / self._bucket.rate)
+        self._cancel(worst)
+        worst.evicted = True
+        self.dropped_full += 1
+        self._condition.notify_all()
+
+    def _cancel(self, waiter: _Waiter) -> None:
+        if not waiter.cancelled:
+            waiter.cancelled = True
+            self._depth -= 1
+
+    def _wait_for_turn(self, waiter: _Waiter) -> float:
+        while True:
+            if waiter.evicted:
+                raise RateLimitExceededException(self.name, retry_after=self._depth / self._bucket.rate)
+
+            # إزالة الطلبات الملغاة من رأس الطابور
+            while self._heap and self._heap[0].cancelled:
+                heapq.heappop(self._heap)
+
+            now = time.monotonic()
+            timeout = None
+            if self._heap[0] is waiter:
+                timeout = self._bucket.try_acquire(now)
+                if timeout == 0:
+                    heapq.heappop(self._heap)
+                    self._depth -= 1
+                    return self._record_wait(now - waiter.enqueued_at)
+
+            if waiter.deadline is not None:
+                if now >= waiter.deadline:
+                    self._cancel(waiter)
+                    self.dropped_deadline += 1
+                    raise RateLimitExceededException(self.name, retry_after=self._depth / self._bucket.rate)
+                remaining = waiter.deadline - now
+                timeout = remaining if timeout is None else min(timeout, remaining)
+
+            self._condition.wait(timeout)
+
+    def _record_wait(self, wait: float) -> float:
+        self.acquired += 1
+        self._total_wait += wait
+        self._recent_waits.append(wait)
+        return wait
+
+    @property
+    def depth(self) -> int:
+        """عدد الطلبات المنتظرة حالياً"""
+        return self._depth
+
+    def stats(self) -> Dict[str, float]:
+        """مقاييس الطابور: العمق وزمن الانتظار وعدد الطلبات المرفوضة"""
+        waits = sorted(self._recent_waits)
+        return {
+            "queue_depth": self._depth,
+            "max_queue_depth": self.max_depth,
+            "acquired": self.acquired,
+            "dropped_deadline": self.dropped_deadline,
+            "dropped_queue_full": self.dropped_full,
+            "average_wait_seconds": round(self._total_wait / self.acquired, 3) if self.acquired else 0.0,
+            "p95_wait_seconds": round(waits[int(len(waits) * 0.95)], 3) if waits else 0.0
+        }
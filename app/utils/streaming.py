@@ -0,0 +1,69 @@
+"""
+أدوات الاستجابات المتدفقة: قراءة جسم الطلب سطراً بسطر والكتابة أثناء القراءة
+"""
+from typing import AsyncIterator, List, Optional
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    استجابة متدفقة تُكتب بينما يُقرأ جسم الطلب
+
+    StreamingResponse العادية تستمع لانقطاع الاتصال عبر receive في مهمة
+    موازية، فتستهلك أجزاء جسم الطلب التي يحتاجها المولّد نفسه. هنا المولّد
+    هو القارئ الوحيد لـ receive، وانقطاع الاتصال يظهر له كـ ClientDisconnect.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+        if self.background is not None:
+            await self.background()
+
+
+async def iter_line_batches(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[List[Optional[bytes]]]:
+    """
+    تقسيم جسم الطلب المتدفق إلى أسطر بذاكرة محدودة
+
+    كل جزء مستلم يُعطي دفعة واحدة من الأسطر المكتملة فيه، حتى يُعالج
+    المستدعي الدفعة ويكتب نتائجها معاً قبل انتظار الجزء التالي.
+
+    Yields:
+        قائمة الأسطر المكتملة (بدون محرف نهاية السطر)، مع None مكان أي سطر
+        أطول من max_line_bytes (يُتجاهل باقيه حتى نهاية السطر)
+    """
+    buffer = bytearray()
+    skipping = False
+
+    async for chunk in chunks:
+        lines: List[Optional[bytes]] = []
+        start = 0
+        while True:
+            newline = chunk.find(b"\n", start)
+            if newline == -1:
+                if not skipping:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        buffer.clear()
+                        skipping = True
+                        lines.append(None)
+                break
+
+            if skipping:
+                skipping = False
+            else:
+                buffer += chunk[start:newline]
+                lines.append(None if len(buffer) > max_line_bytes else bytes(buffer))
+            buffer.clear()
+            start = newline + 1
+
+        if lines:
+            yield lines
+
+    if buffer and not skipping:
+        yield [bytes(buffer)]
@@ -0,0 +1,230 @@
+"""
+تخزين مؤقت لنتائج TimezoneFinder على شبكة إحداثيات مكمّمة
+
+الإحداثيات المتقاربة (مثل مواقع GPS لمركبة تتحرك) تقع غالباً في نفس خلية
+الشبكة، فتُجاب من الذاكرة بدلاً من اختبار النقطة داخل المضلعات في كل مرة.
+الخلية تُعتبر داخل منطقة واحدة إذا وقعت كلها في خلايا اختصار h3 لا تحوي إلا
+منطقة واحدة (وهي نفس إجابة TimezoneFinder هناك)، أو إذا لم يقطع مربعَها أي ضلع
+من أضلاع مضلعات المناطق وثقوبها، فتكون كل نقاطها داخل نفس المضلعات ومنطقتها
+منطقة مركزها. أما إذا قطعها ضلع (مثل الجيوب في Baarle-Nassau) فهي خلية حدودية
+وكل نقطة فيها تُحسب بدقة، وكذلك كل الخلايا إذا لم يوفر finder بيانات المضلعات.
+"""
+import logging
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# وحدات TimezoneFinder الداخلية قد تتغير بين الإصدارات: بدونها تُحسب كل نقطة بدقة
+try:
+    import h3
+    from timezonefinder.configs import SHORTCUT_H3_RES
+    from timezonefinder.utils import COORD2INT_FACTOR
+except ImportError:
+    h3 = SHORTCUT_H3_RES = COORD2INT_FACTOR = None
+
+logger = logging.getLogger(__name__)
+
+# قيمة الخلايا الحدودية في التخزين المؤقت
+_BORDER = object()
+
+
+class QuantizedTimezoneCache:
+    """
+    تخزين مؤقت محدود الحجم (LRU) لخلايا الشبكة
+
+    Args:
+        finder: كائن يوفر timezone_at(lat=, lng=) مثل TimezoneFinder
+        cell_degrees: حجم الخلية بالدرجات (0.01 ≈ 1.1 كم)
+        max_cells: أقصى عدد خلايا في الذاكرة
+        max_polygon_points: أقصى عدد نقاط مضلعات محفوظة في الذاكرة لتصنيف الخلايا
+    """
+
+    def __init__(self, finder, cell_degrees: float = 0.01, max_cells: int = 100000, max_polygon_points: int = 2000000):
+        self.finder = finder
+        self.cell_degrees = cell_degrees
+        self.max_cells = max_cells
+        self.max_polygon_points = max_polygon_points
+        self._cells: "OrderedDict[Tuple[int, int], object]" = OrderedDict()
+        self._polygons: "OrderedDict[int, List[np.ndarray]]" = OrderedDict()
+        self._polygon_points = 0
+        self._bounds: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self._polygon_lock = threading.Lock()
+        self._polygons_failed = False
+        self.hits = 0
+        self.misses = 0
+        self.border_lookups = 0
+
+    def _cell_of(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def _exact(self, latitude: float, longitude: float) -> Optional[str]:
+        return self.finder.timezone_at(lat=latitude, lng=longitude)
+
+    def _has_polygons(self) -> bool:
+        return h3 is not None and not self._polygons_failed and all(
+            hasattr(self.finder, name)
+            for name in ("unique_timezone_at", "nr_of_polygons", "coords_of", "holes")
+        )
+
+    def _unique_zone(self, west: float, east: float, south: float, north: float) -> Optional[str]:
+        """المنطقة إذا وقع المستطيل كله في خلايا اختصار (h3) لا تحوي إلا هذه المنطقة"""
+        # هامش صغير لأن أضلاع خلايا h3 ليست خطوطاً مستقيمة في الدرجات
+        margin = self.cell_degrees * 0.1
+        shape = h3.LatLngPoly([
+            (max(-90.0, south - margin), max(-180.0, west - margin)),
+            (max(-90.0, south - margin), min(180.0, east + margin)),
+            (min(90.0, north + margin), min(180.0, east + margin)),
+            (min(90.0, north + margin), max(-180.0, west - margin)),
+        ])
+        zones = set()
+        for hex_id in h3.h3shape_to_cells_experimental(shape, SHORTCUT_H3_RES, contain="overlap"):
+            latitude, longitude = h3.cell_to_latlng(hex_id)
+            zones.add(self.finder.unique_timezone_at(lng=longitude, lat=latitude))
+        return zones.pop() if len(zones) == 1 else None
+
+    def _polygon_bounds(self) -> np.ndarray:
+        """مستطيل كل مضلع (غرب، شرق، جنوب، شمال) بوحدات الإحداثيات الصحيحة، يُبنى مرة واحدة"""
+        if self._bounds is None:
+            with self._polygon_lock:
+                if self._bounds is None:
+                    bounds = np.empty((self.finder.nr_of_polygons, 4), dtype=np.int64)
+                    for boundary_id in range(len(bounds)):
+                        coords = self.finder.coords_of(boundary_id)
+                        bounds[boundary_id] = (
+                            coords[0].min(), coords[0].max(), coords[1].min(), coords[1].max()
+                        )
+                    self._bounds = bounds
+        return self._bounds
+
+    def prepare(self) -> None:
+        """بناء فهرس مستطيلات المضلعات مسبقاً (≈ ثانية) بدلاً من أول خلية جديدة"""
+        if self._has_polygons():
+            self._polygon_bounds()
+
+    def _rings_of(self, boundary_id: int) -> List[np.ndarray]:
+        """الحد الخارجي للمضلع وثقوبه (مصفوفات 2×N: خطوط الطول ثم العرض)"""
+        with self._polygon_lock:
+            rings = self._polygons.get(boundary_id)
+            if rings is not None:
+                self._polygons.move_to_end(boundary_id)
+                return rings
+
+        rings = [self.finder.coords_of(boundary_id)]
+        rings.extend(self.finder.holes.coords_of(hole_id) for hole_id in self.finder.holes.ids_of(boundary_id))
+        with self._polygon_lock:
+            self._polygons[boundary_id] = rings
+            self._polygon_points += sum(ring.shape[1] for ring in rings)
+            while self._polygon_points > self.max_polygon_points and len(self._polygons) > 1:
+                _, evicted = self._polygons.popitem(last=False)
+                self._polygon_points -= sum(ring.shape[1] for ring in evicted)
+        return rings
+
+    @staticmethod
+    def _ring_crosses_box(ring: np.ndarray, west: float, east: float, south: float, north: float) -> bool:
+        """هل يقطع (أو يلمس) أي ضلع من أضلاع الحلقة المستطيل؟"""
+        # الإحداثيات نسبةً للركن الجنوبي الغربي حتى تبقى حسابات float64 دقيقة
+        lngs, lats = ring[0] - west, ring[1] - south
+        width, height = east - west, north - south
+        next_lngs, next_lats = np.roll(lngs, -1), np.roll(lats, -1)
+        # الأضلاع التي يتداخل مستطيلها مع المستطيل
+        near = (
+            (np.maximum(lngs, next_lngs) >= 0) & (np.minimum(lngs, next_lngs) <= width)
+            & (np.maximum(lats, next_lats) >= 0) & (np.minimum(lats, next_lats) <= height)
+        )
+        if not near.any():
+            return False
+
+        lngs, lats = lngs[near], lats[near]
+        delta_lng, delta_lat = next_lngs[near] - lngs, next_lats[near] - lats
+        # الضلع يقطع المستطيل إلا إذا وقعت أركانه الأربعة في نفس الجهة من امتداده
+        sides = np.stack([
+            delta_lng * (corner_lat - lats) - delta_lat * (corner_lng - lngs)
+            for corner_lng, corner_lat in ((0, 0), (0, height), (width, 0), (width, height))
+        ])
+        return bool(np.any(~((sides > 0).all(axis=0) | (sides < 0).all(axis=0))))
+
+    def _classify_cell(self, cell: Tuple[int, int]) -> object:
+        """منطقة مركز الخلية إذا لم يقطعها حد أي مضلع، وإلا _BORDER"""
+        if not self._has_polygons():
+            return _BORDER
+        try:
+            return self._classify_from_polygons(cell)
+        except Exception as e:
+            # واجهات h3 أو TimezoneFinder تغيرت: البحث الدقيق لكل نقطة بدلاً من فشل الطلبات
+            self._polygons_failed = True
+            logger.warning(f"⚠️ Timezone grid falls back to exact lookups: {e!r}")
+            return _BORDER
+
+    def _classify_from_polygons(self, cell: Tuple[int, int]) -> object:
+        south, west = cell[0] * self.cell_degrees, cell[1] * self.cell_degrees
+        north, east = south + self.cell_degrees, west + self.cell_degrees
+        zone = self._unique_zone(west, east, south, north)
+        if zone is not None:
+            return zone
+
+        # حدود المستطيل بوحدات الإحداثيات الصحيحة في بيانات TimezoneFinder
+        box = tuple(value * COORD2INT_FACTOR for value in (west, east, south, north))
+        bounds = self._polygon_bounds()
+        candidates = np.nonzero(
+            (bounds[:, 0] <= box[1]) & (bounds[:, 1] >= box[0]) & (bounds[:, 2] <= box[3]) & (bounds[:, 3] >= box[2])
+        )[0]
+
+        for boundary_id in candidates:
+            for ring in self._rings_of(int(boundary_id)):
+                if self._ring_crosses_box(ring, *box):
+                    return _BORDER
+
+        zone = self._exact(min(90.0, max(-90.0, (south + north) / 2)), min(180.0, max(-180.0, (west + east) / 2)))
+        return _BORDER if zone is None else zone
+
+    def timezone_at(self, latitude: float, longitude: float) -> Optional[str]:
+        """المنطقة الزمنية لنقطة، من الذاكرة إن أمكن"""
+        cell = self._cell_of(latitude, longitude)
+
+        with self._lock:
+            value = self._cells.get(cell)
+            if value is not None:
+                self._cells.move_to_end(cell)
+
+        if value is None:
+            self.misses += 1
+            value = self._classify_cell(cell)
+            with self._lock:
+                self._cells[cell] = value
+                while len(self._cells) > self.max_cells:
+                    self._cells.popitem(last=False)
+        else:
+            self.hits += 1
+
+        if value is _BORDER:
+            # الخلية تعبر حدود منطقتين: البحث الدقيق للنقطة نفسها
+            self.border_lookups += 1
+            return self._exact(latitude, longitude)
+        return value
+
+    def is_cached(self, latitude: float, longitude: float) -> bool:
+        """هل تُجاب النقطة من الذاكرة؟ (خلية معروفة وليست حدودية)"""
+        value = self._cells.get(self._cell_of(latitude, longitude))
+        return value is not None and value is not _BORDER
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cells.clear()
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def stats(self) -> Dict[str, float]:
+        """إحصائيات التخزين المؤقت للشبكة"""
+        lookups = self.hits + self.misses
+        return {
+            "cells": len(self._cells),
+            "hits": self.hits,
+            "misses": self.misses,
+            "border_lookups": self.border_lookups,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,70 @@
+"""
+جداول انتقالات المناطق الزمنية (DST) المحسوبة مسبقاً
+
+تُستخرج لحظات تغيير الإزاحة عن UTC من بيانات pytz مرة واحدة لكل منطقة،
+ثم يُحسب فرق التوقيت لأي عدد من اللحظات دفعة واحدة باستخدام searchsorted
+بدلاً من إنشاء كائن datetime لكل لحظة.
+"""
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+import pytz
+from pytz.tzinfo import DstTzInfo
+
+_EPOCH = datetime(1970, 1, 1)
+
+# بيانات pytz الداخلية التي تُقرأ منها الانتقالات (غير موثقة)
+_TRANSITION_ATTRIBUTES = ("_utc_transition_times", "_transition_info")
+
+
+@lru_cache(maxsize=None)
+def get_transition_table(timezone_name: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    الحصول على جدول انتقالات المنطقة الزمنية
+
+    Returns:
+        (لحظات الانتقال بثواني UTC منذ 1970، الإزاحة بالثواني بعد كل انتقال)
+
+    Raises:
+        RuntimeError: إذا لم تعد pytz توفر بيانات الانتقالات لمنطقة لها انتقالات
+    """
+    zone = pytz.timezone(timezone_name)
+
+    if not isinstance(zone, DstTzInfo):
+        # منطقة بإزاحة ثابتة (مثل UTC)
+        offset = datetime.now(timezone.utc).astimezone(zone).utcoffset().total_seconds()
+        return np.array([np.iinfo(np.int64).min]), np.array([offset], dtype=np.int64)
+
+    if not all(getattr(zone, name, None) for name in _TRANSITION_ATTRIBUTES):
+        # إزاحة ثابتة هنا ستعطي فروق توقيت خاطئة بصمت
+        raise RuntimeError(f"pytz {pytz.__version__} لا يوفر بيانات انتقالات المنطقة {timezone_name}")
+
+    transitions = np.array(
+        [int((moment - _EPOCH).total_seconds()) for moment in zone._utc_transition_times],
+        dtype=np.int64
+    )
+    offsets = np.array(
+        [int(info[0].total_seconds()) for info in zone._transition_info],
+        dtype=np.int64
+    )
+    # أول انتقال في pytz هو datetime.min ويمثل الإزاحة قبل كل الانتقالات
+    transitions[0] = np.iinfo(np.int64).min
+    return transitions, offsets
+
+
+def utc_offsets_at(timezone_name: str, timestamps: np.ndarray) -> np.ndarray:
+    """
+    حساب الإزاحة عن UTC (بالثواني) لمجموعة لحظات دفعة واحدة
+
+    Args:
+        timezone_name: اسم المنطقة الزمنية (مثل Africa/Cairo)
+        timestamps: مصفوفة لحظات بثواني UTC منذ 1970
+
+    Returns:
+        مصفوفة الإزاحات بالثواني بنفس طول timestamps
+    """
+    transitions, offsets = get_transition_table(timezone_name)
+    indices = np.searchsorted(transitions, timestamps, side="right") - 1
+    return offsets[np.clip(indices, 0, len(offsets) - 1)]
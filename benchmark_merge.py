@@ -0,0 +1,215 @@
+"""
+قياس أداء خوارزميات دمج المصفوفات المرتبة على توزيعات بيانات مختلفة
+
+يقارن الدمج العادي (Python) والدمج في المكان و heapq.merge و sorted(a + b)
+مع الدمج المتجه (NumPy) والدمج المتوازي، ويكتب النتائج بصيغة JSON Lines
+أو CSV (سطر لكل قياس) لتسهيل تحليلها آلياً.
+
+مثال:
+    python benchmark_merge.py --sizes 10,1000,100000 --output results.jsonl
+"""
+import argparse
+import csv
+import gc
+import heapq
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from merge_sorted_arrays import np, merge_sorted_arrays, merge_in_place, merge_sorted_buffers
+from parallel_merge import parallel_merge
+
+DEFAULT_SIZES = [10, 1_000, 100_000, 10_000_000, 100_000_000]
+DISTRIBUTIONS = ["uniform", "skewed", "duplicates", "interleaved"]
+
+# نسبة حجم المصفوفة الصغيرة إلى الكبيرة في التوزيع غير المتوازن
+SKEW_RATIO = 0.001
+
+
+def generate_inputs(distribution, size, seed=0):
+    """
+    توليد مصفوفتين مرتبتين مجموع طوليهما size
+
+    Returns:
+        (arr1, arr2) كمصفوفات NumPy إن كانت متوفرة وإلا قوائم
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"توزيع غير معروف: {distribution}")
+
+    if distribution == "skewed":
+        len2 = max(1, int(size * SKEW_RATIO))
+    else:
+        len2 = size // 2
+    len1 = size - len2
+
+    if distribution == "interleaved":
+        # أرقام زوجية وفردية متناوبة - أسوأ حالة لوضع القفز
+        if np is not None:
+            return np.arange(0, 2 * len1, 2), np.arange(1, 2 * len2, 2)
+        return list(range(0, 2 * len1, 2)), list(range(1, 2 * len2, 2))
+
+    # عدد قليل من القيم المختلفة في حالة التكرارات الكثيرة
+    high = 100 if distribution == "duplicates" else max(size * 4, 100)
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        return (
+            np.sort(rng.integers(0, high, size=len1)),
+            np.sort(rng.integers(0, high, size=len2)),
+        )
+    rng = random.Random(seed)
+    return (
+        sorted(rng.randrange(high) for _ in range(len1)),
+        sorted(rng.randrange(high) for _ in range(len2)),
+    )
+
+
+def _to_list(arr):
+    return arr.tolist() if hasattr(arr, "tolist") else list(arr)
+
+
+def _prepare_python(arr1, arr2):
+    return (_to_list(arr1), _to_list(arr2))
+
+
+def _prepare_in_place(arr1, arr2):
+    first, second = _to_list(arr1), _to_list(arr2)
+    return (first + [0] * len(second), len(first), second, len(second))
+
+
+def _prepare_numpy(arr1, arr2):
+    return (np.asarray(arr1), np.asarray(arr2))
+
+
+def _run_in_place(arr1, m, arr2, n):
+    merge_in_place(arr1, m, arr2, n)
+    return arr1
+
+
+# كل خوارزمية: (دالة التحضير خارج القياس، دالة الدمج، أقصى حجم افتراضي، تتطلب numpy)
+ALGORITHMS = {
+    "python_merge": (_prepare_python, merge_sorted_arrays, 10_000_000, False),
+    "merge_in_place": (_prepare_in_place, _run_in_place, 10_000_000, False),
+    "heapq_merge": (_prepare_python, lambda a, b: list(heapq.merge(a, b)), 10_000_000, False),
+    "sorted_concat": (_prepare_python, lambda a, b: sorted(a + b), 10_000_000, False),
+    "numpy_merge": (_prepare_numpy, merge_sorted_buffers, None, True),
+    "parallel_merge": (_prepare_numpy, parallel_merge, None, True),
+}
+
+
+def _measure(prepare, func, arr1, arr2, repeat):
+    """
+    أفضل زمن من عدة تكرارات، ثم أقصى ذاكرة في تشغيل منفصل مع tracemalloc
+
+    المدخلات تُحضّر من جديد قبل كل تشغيل (خارج القياس) لأن merge_in_place
+    يعدّل المصفوفة الأولى.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        args = prepare(arr1, arr2)
+        gc.collect()
+        start_time = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start_time)
+        del args
+
+    args = prepare(arr1, arr2)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return best, peak
+
+
+def run_benchmarks(sizes=None, distributions=None, algorithms=None, repeat=3, no_limits=False):
+    """
+    تشغيل القياسات وإرجاع النتائج
+
+    Args:
+        sizes: أحجام المدخلات (مجموع طولي المصفوفتين)
+        distributions: توزيعات البيانات المطلوبة
+        algorithms: أسماء الخوارزميات من ALGORITHMS
+        repeat: عدد التكرارات (يُؤخذ أفضل زمن)
+        no_limits: تجاهل الحد الأقصى الافتراضي لحجم الخوارزميات البطيئة
+
+    Yields:
+        قاموس لكل قياس يحتوي الزمن والإنتاجية وأقصى ذاكرة
+    """
+    sizes = sizes or DEFAULT_SIZES
+    distributions = distributions or DISTRIBUTIONS
+    algorithms = algorithms or list(ALGORITHMS)
+
+    for distribution in distributions:
+        for size in sizes:
+            arr1, arr2 = generate_inputs(distribution, size)
+            for name in algorithms:
+                prepare, func, max_size, needs_numpy = ALGORITHMS[name]
+                result = {
+                    "algorithm": name,
+                    "distribution": distribution,
+                    "size": size,
+                    "len1": len(arr1),
+                    "len2": len(arr2),
+                }
+                if needs_numpy and np is None:
+                    yield {**result, "skipped": "numpy غير مثبت"}
+                    continue
+                if max_size is not None and size > max_size and not no_limits:
+                    yield {**result, "skipped": f"الحجم أكبر من {max_size}"}
+                    continue
+
+                seconds, peak = _measure(prepare, func, arr1, arr2, repeat)
+                yield {
+                    **result,
+                    "seconds": round(seconds, 6),
+                    "items_per_second": round(size / seconds) if seconds else None,
+                    "peak_memory_bytes": peak,
+                }
+
+
+def main(argv=None):
+    """واجهة سطر الأوامر لتشغيل القياسات"""
+    parser = argparse.ArgumentParser(description="قياس أداء خوارزميات دمج المصفوفات المرتبة")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES))
+    parser.add_argument("--distributions", default=",".join(DISTRIBUTIONS))
+    parser.add_argument("--algorithms", default=",".join(ALGORITHMS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("--output", default=None, help="ملف الناتج (الافتراضي stdout)")
+    parser.add_argument("--no-limits", action="store_true", help="تشغيل الخوارزميات البطيئة على كل الأحجام")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        sizes=[int(size) for size in args.sizes.split(",")],
+        distributions=args.distributions.split(","),
+        algorithms=args.algorithms.split(","),
+        repeat=args.repeat,
+        no_limits=args.no_limits,
+    )
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        writer = None
+        for result in results:
+            if args.format == "jsonl":
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            else:
+                if writer is None:
+                    fields = ["algorithm", "distribution", "size", "len1", "len2",
+                              "seconds", "items_per_second", "peak_memory_bytes", "skipped"]
+                    writer = csv.DictWriter(out, fieldnames=fields)
+                    writer.writeheader()
+                writer.writerow(result)
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,18 @@
+import array
+import bisect
+
+try:
+    import numpy as np
+except ImportError:  # numpy اختياري - بدونه تُستخدم الخوارزمية العادية فقط
+    np = None
+
+# عدد مرات الفوز المتتالية لإحدى المصفوفتين قبل الانتقال لوضع القفز (كما في Timsort)
+MIN_GALLOP = 7
+
+# إذا كانت إحدى المصفوفتين أكبر من الأخرى بهذه النسبة نبدأ بوضع القفز مباشرة
+GALLOP_SKEW_RATIO = 32
+
+
 def merge_sorted_arrays(arr1, arr2):
     """
     دمج مصفوفتين مرتبتين في مصفوفة واحدة مرتبة
@@ -5,6 +20,9 @@ def merge_sorted_arrays(arr1, arr2):
     التعقيد الزمني: O(n + m) حيث n و m هما أطوال المصفوفتين
     التعقيد المكاني: O(n + m) للمصفوفة الناتجة
     
+    مصفوفات NumPy و array.array و memoryview تُدمج بعمليات متجهة
+    (انظر merge_sorted_buffers)، أما القوائم فتُدمج بالخوارزمية العادية.
+    
     Args:
         arr1: المصفوفة الأولى المرتبة
         arr2: المصفوفة الثانية المرتبة
@@ -12,28 +30,190 @@ def merge_sorted_arrays(arr1, arr2):
     Returns:
         مصفوفة مدموجة ومرتبة
     """
+    if np is not None and (_is_buffer_input(arr1) or _is_buffer_input(arr2)):
+        return merge_sorted_buffers(arr1, arr2)
+    return _merge_sorted_lists(arr1, arr2)
+
+
+def _is_buffer_input(arr):
+    """هل المدخل مصفوفة رقمية (NumPy أو array.array أو memoryview)؟"""
+    if np is not None and isinstance(arr, np.ndarray):
+        return arr.dtype != object
+    return isinstance(arr, (array.array, memoryview))
+
+
+def _as_numpy(arr):
+    """تحويل المدخل إلى مصفوفة NumPy أحادية البعد دون نسخ إن أمكن"""
+    result = np.asarray(arr)
+    if result.ndim != 1:
+        raise ValueError("الدمج المتجه يدعم المصفوفات أحادية البعد فقط")
+    return result
+
+
+def merge_sorted_buffers(arr1, arr2):
+    """
+    دمج مصفوفتين رقميتين مرتبتين بعمليات متجهة (Vectorized)
+    
+    يُحسب موضع كل عنصر في الناتج مباشرة باستخدام searchsorted بدلاً من
+    المقارنة عنصراً بعنصر، ثم تُوضع العناصر في أماكنها دفعة واحدة.
+    الدمج مستقر: العناصر المتساوية من arr1 تأتي قبل مثيلاتها من arr2.
+    
+    التعقيد الزمني: O((n + m) log(n + m)) لكن داخل كود C دون كائنات Python
+    
+    Args:
+        arr1: مصفوفة NumPy أو array.array أو memoryview مرتبة
+        arr2: مصفوفة NumPy أو array.array أو memoryview مرتبة
+    
+    Returns:
+        مصفوفة مدموجة من نفس نوع arr1 (ndarray أو array.array أو memoryview)
+        مع الحفاظ على نوع البيانات (dtype)
+    """
+    if np is None:
+        raise RuntimeError("الدمج المتجه يتطلب تثبيت numpy")
+    
+    a = _as_numpy(arr1)
+    b = _as_numpy(arr2)
+    dtype = np.result_type(a.dtype, b.dtype)
+    
+    # موضع a[i] = i + عدد عناصر b الأصغر منه تماماً
+    # موضع b[j] = j + عدد عناصر a الأصغر منه أو المساوية له
+    merged = np.empty(len(a) + len(b), dtype=dtype)
+    merged[np.arange(len(a)) + np.searchsorted(b, a, side="left")] = a
+    merged[np.arange(len(b)) + np.searchsorted(a, b, side="right")] = b
+    
+    return _like(arr1, merged)
+
+
+def _like(template, merged):
+    """
+    إرجاع الناتج بنفس نوع الحاوية الأصلية
+
+    array.array يُبنى من بايتات الناتج فقط بنوع يطابق dtype الناتج تماماً (مثلاً
+    دمج 'l' مع 'd' ينتج 'd')، وإذا لم يوجد نوع مطابق يُرجع ndarray كما هو.
+    """
+    if isinstance(template, array.array):
+        typecode = _array_typecode(merged.dtype, preferred=template.typecode)
+        if typecode is None:
+            return merged
+        result = array.array(typecode)
+        result.frombytes(merged.tobytes())
+        return result
+    if isinstance(template, memoryview):
+        return memoryview(merged)
+    return merged
+
+
+def _array_typecode(dtype, preferred):
+    """نوع array.array الذي يطابق dtype تماماً (preferred أولاً إن طابقه)، أو None"""
+    for typecode in (preferred,) + tuple(array.typecodes):
+        # أنواع النصوص ('u' و 'w' في Python 3.13) لا تقابل أي dtype رقمي
+        try:
+            if np.dtype(typecode) == dtype:
+                return typecode
+        except TypeError:
+            continue
+    return None
+
+
+def _gallop_forward(key, arr, lo, hi, right=True):
+    """
+    البحث الأسي (Galloping) من بداية arr[lo:hi] عن موضع key
+    
+    يفحص المواضع lo, lo+1, lo+3, lo+7, ... ثم يبحث ثنائياً داخل آخر نطاق،
+    فتكون المقارنات O(log k) حيث k هو طول الجزء المتجاوز.
+    
+    Returns:
+        نفس ناتج bisect_right (أو bisect_left إذا right=False) على arr[lo:hi]
+    """
+    offset = 1
+    start = lo
+    while lo + offset - 1 < hi:
+        value = arr[lo + offset - 1]
+        # نستخدم المعامل < فقط مثل bisect
+        if (key < value) if right else not (value < key):
+            break
+        start = lo + offset
+        offset *= 2
+    end = min(lo + offset - 1, hi)
+    search = bisect.bisect_right if right else bisect.bisect_left
+    return search(arr, key, start, end)
+
+
+def _gallop_backward(key, arr, lo, hi, right=True):
+    """البحث الأسي من نهاية arr[lo:hi] - نفس ناتج _gallop_forward"""
+    offset = 1
+    end = hi
+    while hi - offset >= lo:
+        value = arr[hi - offset]
+        if not (key < value) if right else (value < key):
+            break
+        end = hi - offset
+        offset *= 2
+    start = max(hi - offset + 1, lo)
+    search = bisect.bisect_right if right else bisect.bisect_left
+    return search(arr, key, start, end)
+
+
+def _starts_galloping(len1, len2):
+    """هل الفرق بين الحجمين كبير بما يكفي لبدء الدمج بوضع القفز مباشرة؟"""
+    return min(len1, len2) * GALLOP_SKEW_RATIO <= max(len1, len2)
+
+
+def _merge_sorted_lists(arr1, arr2):
+    """
+    الدمج العادي عنصراً بعنصر - يعمل مع أي عناصر قابلة للمقارنة
+    
+    مثل Timsort: عندما تفوز إحدى المصفوفتين MIN_GALLOP مرات متتالية ننتقل
+    لوضع القفز (Galloping) وننسخ الأجزاء الطويلة بالشرائح (slices) دفعة
+    واحدة، ونعود للمقارنة العادية عندما تقصر الأجزاء. مع مدخلات غير متوازنة
+    (n كبير و m صغير) تنخفض المقارنات من O(n + m) إلى O(m log(n/m)).
+    """
     # مؤشرين للتنقل في المصفوفتين
     i, j = 0, 0
+    len1, len2 = len(arr1), len(arr2)
     merged = []
+    min_gallop = MIN_GALLOP
+    galloping = _starts_galloping(len1, len2)
+    wins1 = wins2 = 0
     
     # دمج العناصر بالترتيب الصحيح
-    while i < len(arr1) and j < len(arr2):
-        if arr1[i] <= arr2[j]:
+    while i < len1 and j < len2:
+        if galloping:
+            # نسخ كل عناصر arr1 الأصغر من arr2[j] أو المساوية له دفعة واحدة
+            end = _gallop_forward(arr2[j], arr1, i, len1, right=True)
+            run1 = end - i
+            merged.extend(arr1[i:end])
+            i = end
+            if i == len1:
+                break
+            
+            # ثم كل عناصر arr2 الأصغر تماماً من arr1[i]
+            end = _gallop_forward(arr1[i], arr2, j, len2, right=False)
+            run2 = end - j
+            merged.extend(arr2[j:end])
+            j = end
+            
+            # الأجزاء قصيرة: القفز لا يفيد هنا، نعود للمقارنة العادية
+            if run1 < MIN_GALLOP and run2 < MIN_GALLOP:
+                min_gallop += 1
+                galloping = False
+                wins1 = wins2 = 0
+            else:
+                min_gallop = max(1, min_gallop - 1)
+        elif arr1[i] <= arr2[j]:
             merged.append(arr1[i])
             i += 1
+            wins1, wins2 = wins1 + 1, 0
+            galloping = wins1 >= min_gallop
         else:
             merged.append(arr2[j])
             j += 1
+            wins1, wins2 = 0, wins2 + 1
+            galloping = wins2 >= min_gallop
     
-    # إضافة العناصر المتبقية من المصفوفة الأولى
-    while i < len(arr1):
-        merged.append(arr1[i])
-        i += 1
-    
-    # إضافة العناصر المتبقية من المصفوفة الثانية
-    while j < len(arr2):
-        merged.append(arr2[j])
-        j += 1
+    # إضافة العناصر المتبقية من المصفوفتين
+    merged.extend(arr1[i:])
+    merged.extend(arr2[j:])
     
     return merged
 
@@ -42,31 +222,69 @@ def merge_in_place(arr1, m, arr2, n):
     """
     دمج مصفوفتين في المكان (in-place) - مفيد عندما تكون المصفوفة الأولى كبيرة بما يكفي
     
+    يستخدم نفس وضع القفز (Galloping) في _merge_sorted_lists لكن من النهاية.
+    
     Args:
         arr1: المصفوفة الأولى (يجب أن تكون كبيرة بما يكفي لاستيعاب العناصر)
         m: عدد العناصر الفعلية في arr1
         arr2: المصفوفة الثانية
         n: عدد العناصر في arr2
     """
+    if np is not None and isinstance(arr1, np.ndarray) and arr1.dtype != object:
+        # نسخة arr1[:m] ضرورية لأن الناتج يُكتب فوقها
+        arr1[:m + n] = merge_sorted_buffers(arr1[:m].copy(), _as_numpy(arr2)[:n])
+        return
+    
+    if isinstance(arr1, array.array) and not isinstance(arr2, array.array):
+        # إسناد الشرائح في array.array يتطلب مصفوفة من نفس النوع
+        arr2 = array.array(arr1.typecode, arr2[:n])
+    
     # البدء من النهاية لتجنب الكتابة فوق البيانات
     i = m - 1  # آخر عنصر في arr1
     j = n - 1  # آخر عنصر في arr2
     k = m + n - 1  # آخر موضع في arr1 المدمجة
+    min_gallop = MIN_GALLOP
+    galloping = _starts_galloping(m, n)
+    wins1 = wins2 = 0
     
     while i >= 0 and j >= 0:
-        if arr1[i] > arr2[j]:
+        if galloping:
+            # نقل كل عناصر arr1 الأكبر تماماً من arr2[j] دفعة واحدة
+            start = _gallop_backward(arr2[j], arr1, 0, i + 1, right=True)
+            run1 = i + 1 - start
+            arr1[k - run1 + 1:k + 1] = arr1[start:i + 1]
+            i, k = i - run1, k - run1
+            if i < 0:
+                break
+            
+            # ثم كل عناصر arr2 الأكبر من arr1[i] أو المساوية له
+            start = _gallop_backward(arr1[i], arr2, 0, j + 1, right=False)
+            run2 = j + 1 - start
+            arr1[k - run2 + 1:k + 1] = arr2[start:j + 1]
+            j, k = j - run2, k - run2
+            
+            if run1 < MIN_GALLOP and run2 < MIN_GALLOP:
+                min_gallop += 1
+                galloping = False
+                wins1 = wins2 = 0
+            else:
+                min_gallop = max(1, min_gallop - 1)
+        elif arr1[i] > arr2[j]:
             arr1[k] = arr1[i]
             i -= 1
+            k -= 1
+            wins1, wins2 = wins1 + 1, 0
+            galloping = wins1 >= min_gallop
         else:
             arr1[k] = arr2[j]
             j -= 1
-        k -= 1
+            k -= 1
+            wins1, wins2 = 0, wins2 + 1
+            galloping = wins2 >= min_gallop
     
     # إضافة العناصر المتبقية من arr2
-    while j >= 0:
-        arr1[k] = arr2[j]
-        j -= 1
-        k -= 1
+    if j >= 0:
+        arr1[:j + 1] = arr2[:j + 1]
 
 
 # أمثلة على الاستخدام
@@ -114,4 +332,14 @@ if __name__ == "__main__":
     
     print("=== حالات خاصة ===")
     print("دمج مصفوفة فارغة مع [42]:", merge_sorted_arrays(empty_array, single_array))
-    print("دمج [1,2,3] مع مصفوفة فارغة:", merge_sorted_arrays([1,2,3], empty_array))
\ No newline at end of file
+    print("دمج [1,2,3] مع مصفوفة فارغة:", merge_sorted_arrays([1,2,3], empty_array))
+    
+    # مثال 5: الدمج المتجه للمصفوفات الرقمية
+    if np is not None:
+        print()
+        print("=== الدمج المتجه (NumPy) ===")
+        numeric1 = np.array([1.5, 3.5, 5.5], dtype=np.float32)
+        numeric2 = np.array([2.5, 4.5], dtype=np.float32)
+        merged_numeric = merge_sorted_arrays(numeric1, numeric2)
+        print("النتيجة المدمجة:", merged_numeric, "- النوع:", merged_numeric.dtype)
+        print("دمج array.array:", merge_sorted_arrays(array.array("i", [1, 4]), array.array("i", [2, 3])))
\ No newline at end of file
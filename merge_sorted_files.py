@@ -0,0 +1,232 @@
+"""
+دمج ملفات مرتبة أكبر من حجم الذاكرة (External-memory merge)
+
+الملفات الثنائية تُفتح عبر memory-map وتُدمج على دفعات ثابتة الحجم،
+والملفات النصية تُقرأ سطراً بسطر، وفي الحالتين تُكتب النتيجة عبر مخزن
+مؤقت (buffer) بحيث يبقى استهلاك الذاكرة محدوداً مهما كان حجم الملفات.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from merge_sorted_arrays import np, merge_sorted_buffers
+
+# عدد العناصر في كل دفعة من كل ملف (8 ميجابايت لكل ملف مع int64)
+DEFAULT_CHUNK_ITEMS = 1 << 20
+
+# حجم مخزن الكتابة المؤقت للملفات النصية
+DEFAULT_WRITE_BUFFER = 1 << 20
+
+
+def merge_sorted_binary_files(path1, path2, out_path, dtype="<i8", chunk_items=DEFAULT_CHUNK_ITEMS):
+    """
+    دمج ملفين ثنائيين مرتبين من الأرقام في ملف ثالث
+
+    الذاكرة المستخدمة: O(chunk_items) بغض النظر عن حجم الملفات
+
+    Args:
+        path1: مسار الملف الأول (مصفوفة أرقام خام مرتبة)
+        path2: مسار الملف الثاني
+        out_path: مسار ملف الناتج
+        dtype: نوع الأرقام في الملفين (مثل "<i8" أو "<f4")
+        chunk_items: عدد العناصر المقروءة من كل ملف في كل دفعة
+
+    Returns:
+        عدد العناصر المكتوبة في ملف الناتج
+    """
+    if np is None:
+        raise RuntimeError("دمج الملفات الثنائية يتطلب تثبيت numpy")
+    if chunk_items <= 0:
+        raise ValueError("chunk_items يجب أن يكون أكبر من صفر")
+
+    dtype = np.dtype(dtype)
+    a = _open_memmap(path1, dtype)
+    b = _open_memmap(path2, dtype)
+    i, j = 0, 0
+
+    with open(out_path, "wb") as out:
+        while i < len(a) and j < len(b):
+            block_a = a[i:i + chunk_items]
+            block_b = b[j:j + chunk_items]
+
+            # نأخذ الدفعة كاملة من الملف الذي ينتهي بالقيمة الأصغر، ومن الآخر
+            # فقط العناصر التي لا يمكن أن يسبقها شيء لم يُقرأ بعد.
+            # عند التساوي تأتي عناصر الملف الأول أولاً (دمج مستقر)
+            if block_a[-1] <= block_b[-1]:
+                take_a = len(block_a)
+                take_b = int(np.searchsorted(block_b, block_a[-1], side="left"))
+            else:
+                take_b = len(block_b)
+                take_a = int(np.searchsorted(block_a, block_b[-1], side="right"))
+
+            merged = merge_sorted_buffers(block_a[:take_a], block_b[:take_b])
+            out.write(merged.astype(dtype, copy=False).tobytes())
+            i += take_a
+            j += take_b
+
+        # نسخ المتبقي من أحد الملفين على دفعات
+        for rest, start in ((a, i), (b, j)):
+            for offset in range(start, len(rest), chunk_items):
+                out.write(rest[offset:offset + chunk_items].tobytes())
+
+    return len(a) + len(b)
+
+
+def _open_memmap(path, dtype):
+    """فتح ملف ثنائي كمصفوفة للقراءة فقط دون تحميله في الذاكرة"""
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+def merge_sorted_text_files(path1, path2, out_path, key=None, buffer_size=DEFAULT_WRITE_BUFFER):
+    """
+    دمج ملفين نصيين مرتبين (سطر لكل عنصر) في ملف ثالث
+
+    Args:
+        path1: مسار الملف الأول
+        path2: مسار الملف الثاني
+        out_path: مسار ملف الناتج
+        key: دالة تُطبق على كل سطر (bytes بدون فاصل السطر) للمقارنة،
+             مثل int للملفات الرقمية. الافتراضي مقارنة النص كما هو
+        buffer_size: حجم مخزن القراءة والكتابة بالبايت
+
+    Returns:
+        عدد الأسطر المكتوبة في ملف الناتج
+    """
+    key = key or (lambda line: line)
+    written = 0
+
+    with open(path1, "rb", buffering=buffer_size) as file1, \
+            open(path2, "rb", buffering=buffer_size) as file2, \
+            open(out_path, "wb", buffering=buffer_size) as out:
+        line1 = _next_line(file1)
+        line2 = _next_line(file2)
+        key1 = key(line1[:-1]) if line1 else None
+        key2 = key(line2[:-1]) if line2 else None
+
+        while line1 and line2:
+            if key1 <= key2:
+                out.write(line1)
+                line1 = _next_line(file1)
+                key1 = key(line1[:-1]) if line1 else None
+            else:
+                out.write(line2)
+                line2 = _next_line(file2)
+                key2 = key(line2[:-1]) if line2 else None
+            written += 1
+
+        # نسخ الأسطر المتبقية من الملف الذي لم ينتهِ
+        for line, source in ((line1, file1), (line2, file2)):
+            while line:
+                out.write(line)
+                written += 1
+                line = _next_line(source)
+
+    return written
+
+
+def _next_line(source):
+    """قراءة السطر التالي مع ضمان انتهائه بفاصل سطر"""
+    line = source.readline()
+    if line and not line.endswith(b"\n"):
+        line += b"\n"
+    return line
+
+
+def _peak_memory_mb():
+    """أقصى ذاكرة مستخدمة (RSS) للعملية الحالية بالميجابايت، أو None حيث لا تتوفر (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss بالكيلوبايت على Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_sorted_random_file(path, count, dtype="<i8", chunk_items=DEFAULT_CHUNK_ITEMS, seed=0):
+    """كتابة ملف ثنائي مرتب من أرقام عشوائية على دفعات (لأغراض القياس)"""
+    rng = np.random.default_rng(seed)
+    last = 0
+    with open(path, "wb") as out:
+        for offset in range(0, count, chunk_items):
+            size = min(chunk_items, count - offset)
+            block = last + np.cumsum(rng.integers(0, 16, size=size))
+            last = int(block[-1])
+            out.write(block.astype(dtype).tobytes())
+
+
+def benchmark_binary_merge(size_gb, directory=None, dtype="<i8", chunk_items=DEFAULT_CHUNK_ITEMS):
+    """
+    قياس أداء دمج ملفين ثنائيين حجمهما الإجمالي size_gb جيجابايت
+
+    Returns:
+        قاموس بالنتائج: الحجم والوقت والإنتاجية وأقصى استهلاك للذاكرة
+    """
+    itemsize = np.dtype(dtype).itemsize
+    count = int(size_gb * (1 << 30) / itemsize / 2)
+
+    with tempfile.TemporaryDirectory(dir=directory) as workdir:
+        path1 = os.path.join(workdir, "input1.bin")
+        path2 = os.path.join(workdir, "input2.bin")
+        out_path = os.path.join(workdir, "merged.bin")
+        write_sorted_random_file(path1, count, dtype, chunk_items, seed=1)
+        write_sorted_random_file(path2, count, dtype, chunk_items, seed=2)
+
+        start_time = time.perf_counter()
+        total = merge_sorted_binary_files(path1, path2, out_path, dtype, chunk_items)
+        elapsed = time.perf_counter() - start_time
+
+    peak_mb = _peak_memory_mb()
+    return {
+        "input_gb": round(2 * count * itemsize / (1 << 30), 3),
+        "items": total,
+        "seconds": round(elapsed, 3),
+        "items_per_second": round(total / elapsed) if elapsed else None,
+        "mb_per_second": round(total * itemsize / (1 << 20) / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": round(peak_mb, 1) if peak_mb is not None else None,
+    }
+
+
+def main(argv=None):
+    """واجهة سطر الأوامر للدمج والقياس"""
+    parser = argparse.ArgumentParser(description="دمج ملفات مرتبة أكبر من حجم الذاكرة")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    merge_parser = commands.add_parser("merge", help="دمج ملفين مرتبين")
+    merge_parser.add_argument("input1")
+    merge_parser.add_argument("input2")
+    merge_parser.add_argument("output")
+    merge_parser.add_argument("--text", action="store_true", help="الملفات نصية (سطر لكل عنصر)")
+    merge_parser.add_argument("--numeric", action="store_true", help="مقارنة الأسطر النصية كأرقام")
+    merge_parser.add_argument("--dtype", default="<i8", help="نوع الأرقام في الملفات الثنائية")
+    merge_parser.add_argument("--chunk-items", type=int, default=DEFAULT_CHUNK_ITEMS)
+
+    bench_parser = commands.add_parser("bench", help="قياس أداء الدمج على ملفات كبيرة")
+    bench_parser.add_argument("--size-gb", type=float, default=2.0, help="الحجم الإجمالي للملفين")
+    bench_parser.add_argument("--dir", default=None, help="مجلد الملفات المؤقتة")
+    bench_parser.add_argument("--dtype", default="<i8")
+    bench_parser.add_argument("--chunk-items", type=int, default=DEFAULT_CHUNK_ITEMS)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "merge":
+        if args.text:
+            count = merge_sorted_text_files(
+                args.input1, args.input2, args.output,
+                key=float if args.numeric else None
+            )
+        else:
+            count = merge_sorted_binary_files(
+                args.input1, args.input2, args.output, args.dtype, args.chunk_items
+            )
+        print(f"تم دمج {count} عنصر في {args.output}")
+    else:
+        result = benchmark_binary_merge(args.size_gb, args.dir, args.dtype, args.chunk_items)
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
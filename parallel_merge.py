@@ -0,0 +1,160 @@
+"""
+دمج متوازٍ لمصفوفتين مرتبتين كبيرتين على عدة أنوية (Merge Path)
+
+تُقسم مصفوفة الناتج إلى أجزاء متساوية، ولكل حد تقسيم k نجد بالبحث الثنائي
+(co-rank) عدد العناصر i من arr1 و j = k - i من arr2 التي تسبقه. بعدها يصبح
+دمج كل جزء مستقلاً تماماً، فتدمج كل عملية جزءها مباشرة في ذاكرة مشتركة.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from merge_sorted_arrays import np, merge_sorted_arrays, merge_sorted_buffers, _is_buffer_input
+
+# أقل عدد عناصر إجمالي يستحق تكلفة تشغيل العمليات ونسخ البيانات
+PARALLEL_THRESHOLD = 1 << 21
+
+
+def co_rank(k, arr1, arr2):
+    """
+    إيجاد عدد العناصر من arr1 ضمن أول k عنصر في ناتج الدمج المستقر
+
+    التعقيد الزمني: O(log(min(k, n)))
+
+    Args:
+        k: موضع في مصفوفة الناتج (0 <= k <= n + m)
+        arr1: المصفوفة الأولى المرتبة
+        arr2: المصفوفة الثانية المرتبة
+
+    Returns:
+        i بحيث تتكون أول k عناصر من arr1[:i] و arr2[:k - i]
+    """
+    low = max(0, k - len(arr2))
+    high = min(k, len(arr1))
+
+    while low < high:
+        i = (low + high) // 2
+        j = k - i
+        # عند التساوي تسبق عناصر arr1 (دمج مستقر)
+        if j > 0 and i < len(arr1) and arr2[j - 1] >= arr1[i]:
+            low = i + 1
+        else:
+            high = i
+
+    return low
+
+
+def merge_path_partitions(arr1, arr2, parts):
+    """
+    تقسيم ناتج الدمج إلى أجزاء متساوية تقريباً
+
+    Returns:
+        قائمة من (i_start, i_end, j_start, j_end, k_start) لكل جزء
+    """
+    total = len(arr1) + len(arr2)
+    bounds = [total * p // parts for p in range(parts + 1)]
+    ranks = [co_rank(k, arr1, arr2) for k in bounds]
+
+    return [
+        (ranks[p], ranks[p + 1], bounds[p] - ranks[p], bounds[p + 1] - ranks[p + 1], bounds[p])
+        for p in range(parts)
+        if bounds[p] < bounds[p + 1]
+    ]
+
+
+def _merge_segment(names, dtype, lengths, segment):
+    """دمج جزء واحد وكتابته في موضعه من ذاكرة الناتج المشتركة (داخل العملية الفرعية)"""
+    # العمليات الفرعية تشارك العملية الأم نفس resource_tracker، والأم هي من تحذف الذاكرة
+    blocks = [shared_memory.SharedMemory(name=name) for name in names]
+    try:
+        a, b, out = (
+            np.ndarray((length,), dtype=dtype, buffer=block.buf)
+            for block, length in zip(blocks, lengths)
+        )
+        i_start, i_end, j_start, j_end, k_start = segment
+        merged = merge_sorted_buffers(a[i_start:i_end], b[j_start:j_end])
+        out[k_start:k_start + len(merged)] = merged
+        del a, b, out, merged
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def parallel_merge(arr1, arr2, workers=None, threshold=PARALLEL_THRESHOLD, executor=None):
+    """
+    دمج مصفوفتين رقميتين مرتبتين بالتوازي على عدة أنوية
+
+    المصفوفات الصغيرة (أقل من threshold) أو غير الرقمية تُدمج مباشرة
+    عبر merge_sorted_arrays لأن تكلفة التوازي أكبر من الفائدة.
+
+    Args:
+        arr1: المصفوفة الأولى المرتبة
+        arr2: المصفوفة الثانية المرتبة
+        workers: عدد العمليات (الافتراضي عدد الأنوية)
+        threshold: أقل حجم إجمالي لاستخدام التوازي
+        executor: ProcessPoolExecutor جاهز لإعادة استخدامه بين الاستدعاءات
+
+    Returns:
+        مصفوفة NumPy مدموجة ومرتبة
+    """
+    workers = workers or os.cpu_count() or 1
+    numeric = np is not None and _is_buffer_input(arr1) and _is_buffer_input(arr2)
+    if not numeric or workers < 2 or len(arr1) + len(arr2) < threshold:
+        return merge_sorted_arrays(arr1, arr2)
+
+    a = np.asarray(arr1)
+    b = np.asarray(arr2)
+    dtype = np.result_type(a.dtype, b.dtype)
+    lengths = (len(a), len(b), len(a) + len(b))
+    segments = merge_path_partitions(a, b, workers)
+
+    # نسخ المدخلات إلى ذاكرة مشتركة تقرؤها كل العمليات دون نسخ إضافي
+    blocks = [
+        shared_memory.SharedMemory(create=True, size=max(1, length * dtype.itemsize))
+        for length in lengths
+    ]
+    try:
+        for block, source in zip(blocks, (a, b)):
+            np.ndarray((len(source),), dtype=dtype, buffer=block.buf)[:] = source
+
+        names = [block.name for block in blocks]
+        pool = executor or ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = [
+                pool.submit(_merge_segment, names, dtype, lengths, segment)
+                for segment in segments
+            ]
+            for future in futures:
+                future.result()
+        finally:
+            if executor is None:
+                pool.shutdown()
+
+        return np.ndarray((lengths[2],), dtype=dtype, buffer=blocks[2].buf).copy()
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+# أمثلة على الاستخدام
+if __name__ == "__main__":
+    import time
+
+    print("=== الدمج المتوازي (Merge Path) ===")
+    rng = np.random.default_rng(0)
+    size = 20_000_000
+    first = np.sort(rng.integers(0, 1 << 40, size=size))
+    second = np.sort(rng.integers(0, 1 << 40, size=size))
+
+    start_time = time.perf_counter()
+    expected = merge_sorted_buffers(first, second)
+    print(f"دمج متجه على نواة واحدة: {time.perf_counter() - start_time:.3f}s")
+
+    for count in (2, 4, os.cpu_count() or 1):
+        with ProcessPoolExecutor(max_workers=count) as pool:
+            start_time = time.perf_counter()
+            result = parallel_merge(first, second, workers=count, executor=pool)
+            elapsed = time.perf_counter() - start_time
+        assert np.array_equal(result, expected)
+        print(f"دمج متوازٍ على {count} عملية: {elapsed:.3f}s")
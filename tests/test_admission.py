@@ -0,0 +1,132 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.admission import LOW, NORMAL, AdaptiveLimit, AdmissionController, AdmissionMiddleware
+
+
+def _make_app(controller: AdmissionController) -> FastAPI:
+    test_app = FastAPI()
+    test_app.add_middleware(AdmissionMiddleware, controller=controller, low_priority_paths=("/metrics",))
+
+    @test_app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.3)
+        return {"done": True}
+
+    @test_app.get("/metrics")
+    async def metrics():
+        return {"ok": True}
+
+    @test_app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return test_app
+
+
+async def _call(test_app: FastAPI, path: str) -> dict:
+    """استدعاء ASGI مباشر يُرجع الحالة والترويسات"""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [], "client": ("127.0.0.1", 1234), "server": ("testserver", 80)
+    }
+    await test_app(scope, receive, send)
+    start = sent[0]
+    return {"status": start["status"], "headers": dict(start["headers"])}
+
+
+class TestAdmission:
+    """اختبارات التحكم في قبول الطلبات وإسقاط الحمل"""
+
+    def test_limit_decreases_on_slow_responses_and_grows_when_used(self):
+        """اختبار النقص الضربي عند تجاوز الزمن المستهدف والزيادة الجمعية عند الاستغلال"""
+        limit = AdaptiveLimit(initial_limit=20, min_limit=4, target_latency=0.5)
+
+        limit.on_sample(1.0, in_flight=20, now=10.0)
+        assert limit.limit == pytest.approx(18)
+        # نفس موجة الطلبات البطيئة لا تُنقص الحد مرة أخرى
+        limit.on_sample(1.0, in_flight=20, now=10.1)
+        assert limit.limit == pytest.approx(18)
+
+        # بدون استغلال للحد لا يزيد
+        limit.on_sample(0.1, in_flight=2, now=11.0)
+        assert limit.limit == pytest.approx(18)
+        limit.on_sample(0.1, in_flight=18, now=11.0)
+        assert limit.limit == pytest.approx(18 + 1 / 18)
+
+        for i in range(100):
+            limit.on_sample(1.0, in_flight=20, now=20.0 + i)
+        assert limit.limit == 4
+
+    @pytest.mark.asyncio
+    async def test_low_priority_is_shed_first(self):
+        """اختبار رفض الطلبات منخفضة الأولوية قبل التفاعلية"""
+        controller = AdmissionController(AdaptiveLimit(initial_limit=4), low_priority_share=0.5, max_queue_wait=0.01)
+
+        assert await controller.acquire(NORMAL)
+        assert await controller.acquire(LOW)
+        # نصف الحد مشغول: منخفضة الأولوية تُرفض والتفاعلية تُقبل
+        assert not await controller.acquire(LOW)
+        assert await controller.acquire(NORMAL)
+        assert await controller.acquire(NORMAL)
+        assert not await controller.acquire(NORMAL)
+
+        stats = controller.stats()
+        assert stats["in_flight"] == 4
+        assert stats["shed_low"] == 1
+        assert stats["shed_normal"] == 1
+
+    @pytest.mark.asyncio
+    async def test_queued_request_gets_released_slot(self):
+        """اختبار أن الطلب المنتظر يأخذ المكان فور تحرره"""
+        controller = AdmissionController(AdaptiveLimit(initial_limit=1), max_queue_wait=1.0)
+        assert await controller.acquire(NORMAL)
+
+        waiting = asyncio.create_task(controller.acquire(NORMAL))
+        await asyncio.sleep(0.05)
+        assert controller.stats()["queued"] == 1
+
+        controller.release(0.01)
+        assert await waiting
+        assert controller.stats()["in_flight"] == 1
+        assert controller.stats()["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_overloaded_server_answers_503_fast(self):
+        """اختبار الرد السريع بـ 503 و Retry-After عند الحمل الزائد مع بقاء فحص الصحة"""
+        controller = AdmissionController(AdaptiveLimit(initial_limit=2, min_limit=1), max_queue_wait=0.05)
+        test_app = _make_app(controller)
+
+        slow = [asyncio.create_task(_call(test_app, "/slow")) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        metrics = await _call(test_app, "/metrics")
+        rejected = await _call(test_app, "/slow")
+        health = await _call(test_app, "/health")
+
+        assert metrics["status"] == 503
+        assert metrics["headers"][b"retry-after"] == b"1"
+        assert rejected["status"] == 503
+        assert health["status"] == 200
+        assert [r["status"] for r in await asyncio.gather(*slow)] == [200, 200]
+        assert controller.stats()["in_flight"] == 0
+
+    def test_metrics_include_admission(self):
+        """اختبار ظهور مقاييس القبول في /metrics"""
+        client = TestClient(app)
+
+        admission = client.get("/metrics").json()["admission"]
+
+        assert admission["limit"] >= admission["in_flight"]
+        assert admission["shed_low"] == 0
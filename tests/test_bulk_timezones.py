@@ -0,0 +1,88 @@
+import io
+import numpy as np
+import pytest
+from timezonefinder import TimezoneFinder
+from app.utils.bulk_timezones import iter_resolve, resolve_timezones, resolve_csv, main
+
+
+class TestBulkTimezones:
+    """اختبارات تحديد المناطق الزمنية لأعداد كبيرة من الإحداثيات"""
+    
+    def setup_method(self):
+        """إعداد الاختبارات"""
+        rng = np.random.default_rng(0)
+        self.latitudes = rng.uniform(-60, 70, size=600)
+        self.longitudes = rng.uniform(-180, 180, size=600)
+        finder = TimezoneFinder()
+        self.expected = [
+            finder.timezone_at(lat=lat, lng=lng)
+            for lat, lng in zip(self.latitudes.tolist(), self.longitudes.tolist())
+        ]
+    
+    def test_resolve_numpy_arrays(self):
+        """اختبار النتائج بنفس ترتيب المدخلات"""
+        result = resolve_timezones(self.latitudes, self.longitudes, cell_degrees=None)
+        
+        assert result.dtype == object
+        assert result.tolist() == self.expected
+    
+    def test_process_pool_keeps_input_order(self):
+        """اختبار أن الدفعات الموزعة على العمليات تعود بالترتيب"""
+        chunks = [
+            (self.latitudes[start:start + 50], self.longitudes[start:start + 50])
+            for start in range(0, 600, 50)
+        ]
+        results = list(iter_resolve(chunks, workers=2, cell_degrees=None, max_pending=3))
+        
+        assert [len(zones) for zones in results] == [50] * 12
+        assert sum(results, []) == self.expected
+    
+    def test_resolve_csv_stream(self):
+        """اختبار قراءة وكتابة CSV على دفعات مع عمود timezone"""
+        rows = "\n".join(f"s{i},{lat},{lng}" for i, (lat, lng) in
+                         enumerate(zip(self.latitudes[:100], self.longitudes[:100])))
+        output = io.StringIO()
+        
+        written = resolve_csv(io.StringIO("id,lat,lng\n" + rows + "\n"), output, chunk_size=30, workers=1)
+        
+        lines = output.getvalue().splitlines()
+        assert written == 100
+        assert lines[0] == "id,lat,lng,timezone"
+        assert [line.split(",")[-1] for line in lines[1:]] == [zone or "" for zone in self.expected[:100]]
+    
+    def test_border_coordinates_match_exact_lookup(self):
+        """اختبار نقاط حول جيوب Baarle-Nassau/Baarle-Hertog بالإعدادات الافتراضية ومع شبكة الخلايا"""
+        rng = np.random.default_rng(37)
+        latitudes = rng.uniform(51.42, 51.48, size=2000)
+        longitudes = rng.uniform(4.88, 4.98, size=2000)
+        finder = TimezoneFinder()
+        expected = [
+            finder.timezone_at(lat=lat, lng=lng)
+            for lat, lng in zip(latitudes.tolist(), longitudes.tolist())
+        ]
+        
+        assert {"Europe/Amsterdam", "Europe/Brussels"} <= set(expected)
+        assert resolve_timezones(latitudes, longitudes).tolist() == expected
+        assert resolve_timezones(latitudes, longitudes, cell_degrees=0.01).tolist() == expected
+    
+    def test_invalid_input(self):
+        """اختبار رفض المدخلات غير الصحيحة"""
+        with pytest.raises(ValueError):
+            resolve_timezones([1.0, 2.0], [1.0])
+        with pytest.raises(ValueError):
+            resolve_timezones([91.0], [0.0])
+        with pytest.raises(ValueError):
+            resolve_csv(io.StringIO("id,x,y\n"), io.StringIO())
+    
+    def test_cli(self, tmp_path):
+        """اختبار واجهة سطر الأوامر"""
+        source = tmp_path / "points.csv"
+        source.write_text("lat,lng\n30.0444,31.2357\n51.5074,-0.1278\n", encoding="utf-8")
+        target = tmp_path / "zones.csv"
+        
+        main([str(source), "--output", str(target), "--workers", "1"])
+        
+        assert target.read_text(encoding="utf-8").splitlines()[1:] == [
+            "30.0444,31.2357,Africa/Cairo",
+            "51.5074,-0.1278,Europe/London",
+        ]
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.time_service import time_service
+from app.services.weather_service import weather_service
+from app.utils import cache_backends
+from app.utils.cache_backends import MemoryBackend
+from app.utils.bulkhead import Bulkhead
+from app.utils.exceptions import BulkheadFullException
+from app.utils.http_cache import response_cache
+
+
+def _occupy(bulkhead: Bulkhead, release: threading.Event) -> threading.Thread:
+    """حجز مكان في السعة بعملية معلقة حتى release"""
+    thread = threading.Thread(target=asyncio.run, args=(bulkhead.run(release.wait, 5),), daemon=True)
+    thread.start()
+    while bulkhead.active == 0:
+        time.sleep(0.01)
+    return thread
+
+
+class TestBulkhead:
+    """اختبارات عزل سعة الخدمات الخارجية"""
+
+    @pytest.mark.asyncio
+    async def test_queue_limit_rejects_immediately(self):
+        """اختبار الانتظار حتى حد الطابور ثم الرفض الفوري"""
+        bulkhead = Bulkhead("test", max_concurrent=1, max_queue=1, max_wait=2.0)
+        release = threading.Event()
+
+        running = asyncio.ensure_future(bulkhead.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(bulkhead.run(lambda: "queued"))
+        await asyncio.sleep(0.05)
+
+        started = time.monotonic()
+        with pytest.raises(BulkheadFullException):
+            await bulkhead.run(lambda: "rejected")
+        assert time.monotonic() - started < 0.1
+
+        stats = bulkhead.stats()
+        assert stats["active"] == 1
+        assert stats["queued"] == 1
+        assert stats["saturation"] == 1.0
+        assert stats["rejected_full"] == 1
+
+        release.set()
+        assert await running is True
+        assert await queued == "queued"
+        assert bulkhead.stats()["active"] == 0
+        assert bulkhead.stats()["completed"] == 2
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_is_bounded(self):
+        """اختبار رفض العملية المنتظرة بعد max_wait"""
+        bulkhead = Bulkhead("test", max_concurrent=1, max_queue=5, max_wait=0.1)
+
+        async def slow():
+            await asyncio.sleep(0.5)
+
+        running = asyncio.ensure_future(bulkhead.run_async(slow))
+        await asyncio.sleep(0.01)
+        with pytest.raises(BulkheadFullException):
+            await bulkhead.run_async(slow)
+
+        assert bulkhead.stats()["rejected_timeout"] == 1
+        await running
+
+    @pytest.mark.asyncio
+    async def test_hung_thread_keeps_its_slot_after_cancel(self):
+        """اختبار أن إلغاء الطلب لا يحرر المكان قبل انتهاء الخيط المعلق فعلاً"""
+        bulkhead = Bulkhead("test", max_concurrent=1, max_queue=0)
+        release = threading.Event()
+
+        task = asyncio.ensure_future(bulkhead.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.sleep(0.05)
+
+        assert bulkhead.stats()["active"] == 1
+        with pytest.raises(BulkheadFullException):
+            await bulkhead.run(lambda: None)
+
+        release.set()
+        await asyncio.sleep(0.05)
+        assert bulkhead.stats()["active"] == 0
+
+    def test_hung_geocoder_does_not_affect_other_endpoints(self):
+        """اختبار أن امتلاء سعة البحث الجغرافي لا يؤثر على الطقس والإحداثيات"""
+        client = TestClient(app)
+        bulkhead = Bulkhead("geocoder", max_concurrent=1, max_queue=0)
+        release = threading.Event()
+        thread = _occupy(bulkhead, release)
+
+        try:
+            with patch.object(time_service, "geocode_bulkhead", bulkhead):
+                busy = client.get("/time/comparison?city1=Atlantisville&city2=London")
+                weather = client.get("/weather/?city=Cairo")
+                location = client.get("/time/at?lat=51.5074&lng=-0.1278")
+                local = client.get("/time/comparison?city1=Cairo&city2=London")
+        finally:
+            release.set()
+            thread.join()
+
+        assert busy.status_code == 503
+        assert "Retry-After" in busy.headers
+        assert weather.status_code == 200
+        assert location.status_code == 200
+        assert local.status_code == 200
+        assert bulkhead.stats()["rejected_full"] == 1
+
+        bulkheads = client.get("/metrics").json()["bulkheads"]
+        assert set(bulkheads) == {"geocoder", "timezone_lookup", "weather"}
+        assert all("saturation" in pool for pool in bulkheads.values())
+
+    def test_full_weather_bulkhead_returns_503_with_retry_after(self):
+        """اختبار أن امتلاء سعة الطقس يُرجع 503 مع Retry-After وليس خطأ خدمة الطقس"""
+        client = TestClient(app)
+        bulkhead = Bulkhead("weather", max_concurrent=1, max_queue=0)
+        release = threading.Event()
+        thread = _occupy(bulkhead, release)
+        # بدون استجابة أو بيانات مخزنة من اختبار سابق حتى يصل الطلب إلى المصدر
+        response_cache.clear()
+
+        try:
+            with patch.object(weather_service, "bulkhead", bulkhead), \
+                 patch.object(cache_backends, "_default_backend", MemoryBackend()):
+                response = client.get("/weather/?city=Cairo")
+        finally:
+            release.set()
+            thread.join()
+
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+        assert response.json()["dependency"] == "weather"
@@ -0,0 +1,306 @@
+import asyncio
+import socket
+import socketserver
+import threading
+import time
+import pytest
+from pydantic import BaseModel
+from app.utils.cache_backends import CacheBackend, MemoryBackend, SQLiteBackend, RedisBackend, RespClient, schema_tag
+from app.utils.performance import cache_result
+from app.models.weather_models import WeatherData
+
+
+class _RespStandIn(socketserver.StreamRequestHandler):
+    """خادم RESP مصغّر يكفي للاختبار بدلاً من Redis حقيقي"""
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        parts = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            parts.append(self.rfile.read(length + 2)[:-2])
+        return parts
+
+    def _write(self, value):
+        if value is None:
+            self.wfile.write(b"$-1\r\n")
+        elif isinstance(value, int):
+            self.wfile.write(b":%d\r\n" % value)
+        elif isinstance(value, list):
+            self.wfile.write(b"*%d\r\n" % len(value))
+            for item in value:
+                self._write(item)
+        else:
+            self.wfile.write(b"$%d\r\n%s\r\n" % (len(value), value))
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            name, args = command[0].upper(), command[1:]
+            now = time.time()
+            live = {key: value for key, (value, expires_at) in store.items() if expires_at > now}
+            if name in (b"PING", b"SELECT"):
+                self.wfile.write(b"+OK\r\n")
+            elif name == b"SET":
+                if b"NX" in args[4:] and args[0] in live:
+                    self._write(None)
+                    continue
+                store[args[0]] = (args[1], now + int(args[3]) / 1000)
+                self.wfile.write(b"+OK\r\n")
+            elif name == b"INCR":
+                count = int(live.get(args[0], b"0")) + 1
+                store[args[0]] = (b"%d" % count, store[args[0]][1] if args[0] in live else float("inf"))
+                self._write(count)
+            elif name == b"GET":
+                self._write(live.get(args[0]))
+            elif name == b"MGET":
+                self._write([live.get(key) for key in args])
+            elif name == b"PTTL":
+                self._write(int((store[args[0]][1] - now) * 1000) if args[0] in live else -2)
+            elif name == b"DEL":
+                self._write(1 if store.pop(args[0], None) else 0)
+            elif name == b"SCAN":
+                prefix = args[2][:-1].replace(b"\\", b"")
+                self._write([b"0", [key for key in live if key.startswith(prefix)]])
+            else:
+                self.wfile.write(b"-ERR unknown command\r\n")
+
+
+@pytest.fixture
+def resp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _RespStandIn)
+    server.daemon_threads = True
+    server.store = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend()
+    if request.param == "sqlite":
+        return SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+    server = request.getfixturevalue("resp_server")
+    return RedisBackend(f"redis://127.0.0.1:{server.server_address[1]}/1")
+
+
+class TestCacheBackends:
+    """اختبارات مخازن التخزين المؤقت"""
+
+    def test_set_get_ttl_delete(self, backend):
+        """اختبار العمليات الأساسية لكل مخزن"""
+        weather = WeatherData(main={"temp": 20.0}, weather=[], name="Cairo", cod=200)
+        backend.set("weather:cairo", weather, ttl_seconds=60)
+
+        assert backend.get("weather:cairo") == weather
+        assert 0 < backend.ttl("weather:cairo") <= 60
+        assert backend.get("weather:london") is None
+        assert backend.ttl("weather:london") is None
+
+        backend.delete("weather:cairo")
+        assert backend.get("weather:cairo") is None
+
+    def test_expired_entries_are_misses(self, backend):
+        """اختبار أن القيم المنتهية الصلاحية لا تُرجع"""
+        backend.set("short", "value", ttl_seconds=0.05)
+        time.sleep(0.1)
+
+        assert backend.get("short") is None
+        assert backend.ttl("short") is None
+
+    def test_scan_by_prefix(self, backend):
+        """اختبار استعراض المفاتيح الصالحة ببادئة معينة"""
+        backend.set("geo:[cairo]", "Africa/Cairo", 60)
+        backend.set("geo:[london]", "Europe/London", 60)
+        backend.set("weather:cairo", "sunny", 60)
+
+        assert dict(backend.scan("geo:[")) == {"geo:[cairo]": "Africa/Cairo", "geo:[london]": "Europe/London"}
+
+    def test_increment_counts_within_ttl(self, backend):
+        """اختبار العداد المشترك: يبدأ من 1 ويزداد ثم يبدأ من جديد بعد انتهاء صلاحيته"""
+        assert [backend.increment("budget", 0.2) for _ in range(3)] == [1, 2, 3]
+        assert backend.increment("other", 0.2) == 1
+        assert 0 < backend.ttl("budget") <= 0.2
+        time.sleep(0.3)
+
+        assert backend.increment("budget", 60) == 1
+
+    def test_memory_backend_is_bounded(self):
+        """اختبار أن مخزن memory يحذف أقدم المفاتيح عند تجاوز الحد"""
+        backend = MemoryBackend(max_entries=3)
+        for index in range(5):
+            backend.set(f"key{index}", index, 60)
+        backend.set("key2", "rewritten", 60)
+        backend.set("key5", 5, 60)
+
+        assert [key for key, _ in backend.scan("key")] == ["key4", "key2", "key5"]
+        assert backend.stats()["entries"] == 3
+
+    def test_incomplete_backend_fails_at_construction(self):
+        """اختبار أن المخزن الذي لا يعرّف كل العمليات لا يمكن إنشاؤه"""
+        class GetOnly(CacheBackend):
+            def get(self, key):
+                return None
+
+        with pytest.raises(TypeError):
+            GetOnly()
+
+    @pytest.mark.parametrize("kind", ["sqlite", "redis"])
+    def test_corrupt_and_unpicklable_values_are_misses(self, kind, request, tmp_path):
+        """اختبار أن قيمة تالفة أو لا تُرمّز تُعامل كإخفاق دون إفشال الطلب"""
+        if kind == "sqlite":
+            backend = SQLiteBackend(str(tmp_path / "cache.sqlite3"))
+            backend.set("stale", "value", 60)
+            backend._connection().execute("UPDATE cache SET value = ? WHERE key = ?", (b"\x80\x05garbage", "stale"))
+        else:
+            server = request.getfixturevalue("resp_server")
+            backend = RedisBackend(f"redis://127.0.0.1:{server.server_address[1]}/0")
+            server.store[b"stale"] = (b"\x80\x05garbage", time.time() + 60)
+        backend.set("fresh", "value", 60)
+
+        assert backend.get("stale") is None
+        assert dict(backend.scan("")) == {"fresh": "value"}
+
+        backend.set("lock", threading.Lock(), 60)
+        assert backend.get("lock") is None
+        assert backend.stats()["errors"] == 3
+
+    def test_keys_are_tagged_with_model_schema(self):
+        """اختبار أن تغيير نموذج القيمة المخزنة يغير وسم المفتاح"""
+        class Weather(BaseModel):
+            temp: float
+
+        def before(city: str) -> Weather:
+            return Weather(temp=20.0)
+
+        class Weather(BaseModel):
+            temp: float
+            humidity: int
+
+        def after(city: str) -> Weather:
+            return Weather(temp=20.0, humidity=40)
+
+        def plain(city: str) -> str:
+            return city
+
+        assert schema_tag(before).startswith("v1-")
+        assert schema_tag(before) != schema_tag(after)
+        assert schema_tag(plain) == "v1"
+
+        backend = MemoryBackend()
+        cache_result(ttl_seconds=60, backend=backend)(after)("cairo")
+        assert [key for key, _ in backend.scan("")][0].startswith(schema_tag(after) + ":")
+
+    @pytest.mark.asyncio
+    async def test_shared_backend_does_not_block_event_loop(self):
+        """اختبار أن مخزناً مشتركاً بطيئاً (مثل SQLite مقفل) لا يحجز حلقة الأحداث"""
+        class SlowBackend(MemoryBackend):
+            blocking = True
+
+            def get(self, key):
+                time.sleep(0.2)
+                return super().get(key)
+
+            def set(self, key, value, ttl_seconds):
+                time.sleep(0.2)
+                super().set(key, value, ttl_seconds)
+
+        backend = SlowBackend()
+
+        @cache_result(ttl_seconds=60, backend=backend)
+        async def lookup(city):
+            return city.upper()
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        try:
+            assert await lookup("cairo") == "CAIRO"
+            assert await lookup("cairo") == "CAIRO"
+        finally:
+            task.cancel()
+
+        # ثلاث عمليات مخزن (0.6 ثانية) والحلقة تستمر في العمل أثناءها
+        assert ticks >= 30
+        assert lookup.cache_stats["hits"] >= 1
+
+    def test_sqlite_is_shared_between_processes(self, tmp_path):
+        """اختبار أن عمليتين (اتصالين منفصلين) تتشاركان نفس ملف SQLite"""
+        path = str(tmp_path / "shared.sqlite3")
+        first, second = SQLiteBackend(path), SQLiteBackend(path)
+
+        first.set("geocode:Giza", "Africa/Cairo", 60)
+
+        assert second.get("geocode:Giza") == "Africa/Cairo"
+        mode = second._connection().execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
+    def test_cache_result_shares_results_across_workers(self, tmp_path):
+        """اختبار أن نسختين من الخدمة بنفس cache_namespace لا تحسبان نفس النتيجة مرتين"""
+        path = str(tmp_path / "shared.sqlite3")
+        calls = []
+
+        class Service:
+            def __init__(self, backend):
+                self.cache_namespace = "service"
+                self.lookup = cache_result(ttl_seconds=60, backend=backend)(self._lookup)
+
+            def _lookup(self, city):
+                calls.append(city)
+                return city.upper()
+
+        worker1, worker2 = Service(SQLiteBackend(path)), Service(SQLiteBackend(path))
+
+        assert worker1.lookup("cairo") == "CAIRO"
+        assert worker2.lookup("cairo") == "CAIRO"
+        assert calls == ["cairo"]
+
+    def test_entries_and_prime_with_namespace(self):
+        """اختبار أن الخدمة تُمثَّل في المفتاح بـ cache_namespace وليس بعنوانها"""
+        backend = MemoryBackend()
+
+        class Service:
+            cache_namespace = "geo"
+
+            @cache_result(ttl_seconds=60, backend=backend)
+            def resolve(self, city):
+                return "UTC"
+
+        service = Service()
+        Service.resolve.prime("Asia/Tokyo", service, "Tokyo")
+
+        assert service.resolve("Tokyo") == "Asia/Tokyo"
+        assert Service.resolve.entries() == [(("geo", "Tokyo"), {}, "Asia/Tokyo")]
+        assert all("0x" not in key for key, _ in backend.scan(""))
+
+    def test_redis_backend_fails_open(self):
+        """اختبار أن تعطل الخادم المشترك يُعامل كإخفاق دون إفشال الطلب"""
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        backend = RedisBackend(f"redis://127.0.0.1:{port}/0", timeout=0.2)
+
+        backend.set("key", "value", 60)
+        assert backend.get("key") is None
+        assert backend.stats()["errors"] == 2
+
+    def test_resp_command_encoding(self):
+        """اختبار ترميز الأوامر ببروتوكول RESP"""
+        assert RespClient.encode_command("SET", "k", b"v", "PX", 1000) == (
+            b"*5\r\n$3\r\nSET\r\n$1\r\nk\r\n$1\r\nv\r\n$2\r\nPX\r\n$4\r\n1000\r\n"
+        )
@@ -0,0 +1,45 @@
+import pytest
+from app.utils.city_matching import FuzzyCityIndex, normalize_city_name, levenshtein_distance
+
+
+class TestCityMatching:
+    """اختبارات مطابقة أسماء المدن وتطبيع النص العربي"""
+    
+    def setup_method(self):
+        """إعداد الاختبارات"""
+        self.index = FuzzyCityIndex({
+            "cairo": "Africa/Cairo",
+            "القاهرة": "Africa/Cairo",
+            "riyadh": "Asia/Riyadh",
+            "الرياض": "Asia/Riyadh",
+            "paris": "Europe/Paris",
+            "baris": "Test/Baris",
+            "new york": "America/New_York"
+        })
+    
+    def test_normalize_arabic_variants(self):
+        """اختبار توحيد أشكال الألف والتاء المربوطة و"ال" والتشكيل"""
+        assert normalize_city_name("القاهرة") == normalize_city_name("القاهره")
+        assert normalize_city_name("القاهرة") == normalize_city_name("قاهرة")
+        assert normalize_city_name("إسطنبول") == normalize_city_name("اسطنبول")
+        assert normalize_city_name("عَمّان") == normalize_city_name("عمان")
+        assert normalize_city_name("  New-York ") == "new york"
+    
+    def test_levenshtein_distance(self):
+        """اختبار مسافة التحرير"""
+        assert levenshtein_distance("london", "londn") == 1
+        assert levenshtein_distance("", "abc") == 3
+        assert levenshtein_distance("kitten", "sitting") == 3
+    
+    def test_exact_and_fuzzy_match(self):
+        """اختبار المطابقة التامة والتقريبية"""
+        assert self.index.match("CAIRO") == "Africa/Cairo"
+        assert self.index.match("القاهره") == "Africa/Cairo"
+        assert self.index.match("Kairo") == "Africa/Cairo"
+        assert self.index.match("new yrok") == "America/New_York"
+    
+    def test_no_match_for_distant_or_ambiguous_names(self):
+        """اختبار عدم المطابقة للأسماء البعيدة أو الملتبسة"""
+        assert self.index.match("xyzq") is None
+        # "aris" على مسافة واحدة من paris و baris
+        assert self.index.match("aris") is None
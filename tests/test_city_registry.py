@@ -0,0 +1,54 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.city_registry import CityRegistry, CityRecord, city_registry
+from app.services.weather_service import weather_service
+from app.services.time_service import time_service
+
+client = TestClient(app)
+
+
+class TestCityRegistry:
+    """اختبارات سجل المدن الموحد"""
+    
+    def test_aliases_resolve_to_same_record(self):
+        """اختبار أن كل أسماء المدينة تشير إلى نفس السجل"""
+        record = city_registry.lookup("Cairo")
+        
+        assert record is city_registry.lookup("القاهرة")
+        assert record is city_registry.lookup("  القاهره ")
+        assert record.city_id == "cairo"
+        assert record.timezone == "Africa/Cairo"
+        assert city_registry.get("cairo") is record
+    
+    def test_lookup_is_exact_and_match_is_fuzzy(self):
+        """اختبار أن lookup تامة فقط بينما match تتسامح مع الأخطاء الإملائية"""
+        assert city_registry.lookup("Kairo") is None
+        assert city_registry.match("Kairo") is city_registry.lookup("Cairo")
+        assert city_registry.match("nyc").timezone == "America/New_York"
+        assert city_registry.match("xyzq") is None
+    
+    def test_first_record_wins_for_duplicate_alias(self):
+        """اختبار أن الاسم المستعار المكرر لا يستبدل السجل الأول"""
+        registry = CityRegistry([
+            CityRecord("Amman", "عمان", "Asia/Amman"),
+            CityRecord("Oman", "عمان", "Asia/Muscat"),
+        ])
+        
+        assert len(registry) == 2
+        assert registry.lookup("عمان").city_id == "amman"
+        assert registry.lookup("Oman").timezone == "Asia/Muscat"
+    
+    def test_time_and_weather_share_registry(self):
+        """اختبار أن خدمتي الوقت والطقس تستخدمان نفس السجل"""
+        assert time_service.city_registry is city_registry
+        assert time_service.get_city_timezone("القاهره") == "Africa/Cairo"
+        
+        response = client.get("/weather/?city=القاهره")
+        assert response.status_code == 200
+        assert response.json()["city"] == "Cairo"
+        
+        response = client.get("/weather/cities")
+        english_names = {city["english"] for city in response.json()["supported_cities"]}
+        assert english_names == {record.name_en for record in weather_service.get_supported_cities()}
+        assert {"Cairo", "Riyadh", "London"} <= english_names
@@ -0,0 +1,82 @@
+import gzip
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.compression import compression_stats, negotiate_encoding, precompress, strip_encoding_suffix, encoded_etag
+
+client = TestClient(app)
+
+
+class TestCompression:
+    """اختبارات ضغط الاستجابات"""
+    
+    def test_negotiate_encoding(self):
+        """اختبار اختيار الترميز من Accept-Encoding"""
+        available = ("br", "gzip")
+        
+        assert negotiate_encoding("gzip, deflate, br", available) == "br"
+        assert negotiate_encoding("br;q=0.5, gzip;q=0.9", available) == "gzip"
+        assert negotiate_encoding("br;q=0, *;q=0.1", available) == "gzip"
+        assert negotiate_encoding("identity", available) is None
+        assert negotiate_encoding(None, available) is None
+        assert negotiate_encoding("gzip, br", ("gzip",)) == "gzip"
+    
+    def test_etag_suffix_round_trip(self):
+        """اختبار ETag الخاص بكل ترميز"""
+        assert encoded_etag('"abc"', "gzip") == '"abc-gzip"'
+        assert strip_encoding_suffix('"abc-gzip"') == '"abc"'
+        assert strip_encoding_suffix('"abc"') == '"abc"'
+    
+    def test_precompress_skips_small_bodies(self):
+        """اختبار عدم ضغط المحتوى الصغير مسبقاً"""
+        assert precompress(b"{}", minimum_size=1024) == {}
+        variants = precompress(b'{"city": "Cairo"}' * 200, minimum_size=1024)
+        assert gzip.decompress(variants["gzip"]) == b'{"city": "Cairo"}' * 200
+    
+    def test_openapi_is_precompressed(self):
+        """اختبار أن مخطط OpenAPI يُرسل مضغوطاً مسبقاً مع ETag خاص بالترميز"""
+        response = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["etag"].endswith('-gzip"')
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.json()["info"]["title"] == "Time & Weather API"
+        
+        plain = client.get("/openapi.json", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.json() == response.json()
+        
+        not_modified = client.get(
+            "/openapi.json",
+            headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]}
+        )
+        assert not_modified.status_code == 304
+    
+    def test_large_dynamic_response_is_compressed_off_loop(self):
+        """اختبار ضغط الاستجابات الديناميكية الكبيرة في خيط منفصل"""
+        before = compression_stats()
+        response = client.get(
+            "/time/comparison/series?city1=Cairo&city2=London&from=2024-01-01&to=2024-12-31&step=1h",
+            headers={"Accept-Encoding": "gzip"}
+        )
+        after = compression_stats()
+        
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(response.json()["timestamps"]) == 8761
+        assert after["compressed_responses"] == before["compressed_responses"] + 1
+        assert after["offloaded_responses"] == before["offloaded_responses"] + 1
+    
+    def test_small_and_streaming_responses_are_not_compressed(self):
+        """اختبار أن الاستجابات الصغيرة والمتدفقة تُرسل كما هي"""
+        small = client.get("/weather/?city=Cairo", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in small.headers
+        
+        stream = client.post(
+            "/time/comparison/stream",
+            content='{"city1": "Cairo", "city2": "London"}\n' * 100,
+            headers={"Accept-Encoding": "gzip"}
+        )
+        assert "content-encoding" not in stream.headers
+        assert len(stream.text.splitlines()) == 100
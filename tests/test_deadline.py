@@ -0,0 +1,138 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.time_service import TimeService
+from app.utils.deadline import DeadlineMiddleware, check_deadline, request_deadline, time_left, deadline_stats
+from app.utils.exceptions import DeadlineExceededException
+
+
+def _make_app(timeout_seconds: float, events: list) -> FastAPI:
+    test_app = FastAPI()
+    test_app.add_middleware(DeadlineMiddleware, timeout_seconds=timeout_seconds)
+
+    @test_app.get("/slow")
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            events.append("cancelled")
+            raise
+        return {"done": True}
+
+    @test_app.get("/budget")
+    async def budget():
+        # الخيوط ترى نفس مهلة الطلب
+        return {"left": await asyncio.to_thread(time_left, 100.0)}
+
+    @test_app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                await asyncio.sleep(0.15)
+                yield f"{i}\n".encode()
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return test_app
+
+
+class TestDeadline:
+    """اختبارات مهلة الطلب والإلغاء"""
+
+    def test_time_left_is_bounded_by_request_deadline(self):
+        """اختبار أن المهلة الصادرة لا تتجاوز المتبقي من مهلة الطلب"""
+        assert time_left(10) == 10
+
+        with request_deadline(0.5):
+            assert 0 < time_left(10) <= 0.5
+            assert time_left(0.1) == 0.1
+
+        with request_deadline(0.5) as deadline:
+            deadline.cancel()
+            with pytest.raises(DeadlineExceededException):
+                check_deadline("geocode")
+
+    def test_request_is_cancelled_when_deadline_passes(self):
+        """اختبار إلغاء المعالجة والرد بـ 504 عند انتهاء المهلة"""
+        events = []
+        client = TestClient(_make_app(timeout_seconds=10, events=events))
+
+        started = time.monotonic()
+        response = client.get("/slow", headers={"X-Request-Timeout": "0.2"})
+
+        assert response.status_code == 504
+        assert response.json()["error"] == "deadline_exceeded"
+        assert time.monotonic() - started < 2
+        assert events == ["cancelled"]
+
+    def test_client_cannot_extend_deadline(self):
+        """اختبار أن ترويسة المهلة تقصّرها فقط"""
+        client = TestClient(_make_app(timeout_seconds=0.2, events=[]))
+
+        assert client.get("/slow", headers={"X-Request-Timeout": "60"}).status_code == 504
+        assert client.get("/budget", headers={"X-Request-Timeout": "60"}).json()["left"] <= 0.2
+
+    def test_streaming_response_is_not_cut_after_start(self):
+        """اختبار أن المهلة تتوقف بعد بدء الاستجابة المتدفقة"""
+        client = TestClient(_make_app(timeout_seconds=0.2, events=[]))
+
+        response = client.get("/stream")
+
+        assert response.status_code == 200
+        assert response.text == "0\n1\n2\n"
+
+    @pytest.mark.asyncio
+    async def test_client_disconnect_cancels_request(self):
+        """اختبار إلغاء المعالجة فور انقطاع اتصال العميل"""
+        events, sent = [], []
+        test_app = _make_app(timeout_seconds=10, events=events)
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.sleep(0.1)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/slow", "raw_path": b"/slow", "root_path": "", "query_string": b"",
+            "headers": [], "client": ("127.0.0.1", 1234), "server": ("testserver", 80)
+        }
+        disconnects = deadline_stats()["client_disconnects"]
+        started = time.monotonic()
+        await test_app(scope, receive, send)
+
+        assert time.monotonic() - started < 2
+        assert events == ["cancelled"]
+        assert sent == []
+        assert deadline_stats()["client_disconnects"] == disconnects + 1
+
+    def test_geocoding_is_skipped_when_deadline_expired(self):
+        """اختبار عدم إرسال طلب البحث الجغرافي بعد انتهاء مهلة الطلب"""
+        service = TimeService()
+
+        with request_deadline(0), patch.object(service.geolocator, "geocode") as geocode:
+            with pytest.raises(DeadlineExceededException):
+                service.get_city_timezone("Alexandria")
+
+        geocode.assert_not_called()
+
+    def test_api_returns_504_for_expired_deadline(self):
+        """اختبار أن انتهاء المهلة داخل الخدمة يُجاب بـ 504"""
+        client = TestClient(app)
+
+        with patch("app.services.time_service.time_service.calculate_time_difference",
+                   side_effect=DeadlineExceededException("geocode")):
+            response = client.get("/time/comparison?city1=Cairo&city2=London")
+
+        assert response.status_code == 504
+        assert response.json()["error"] == "deadline_exceeded"
+        assert "deadlines" in client.get("/metrics").json()
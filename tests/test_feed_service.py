@@ -0,0 +1,124 @@
+import asyncio
+import json
+import time
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.city_registry import city_registry
+from app.services.feed_service import FeedBroadcaster, Subscription, encode_event
+from app.services.weather_service import weather_service
+
+client = TestClient(app)
+
+
+def _decode(frame: bytes):
+    event_line, data_line = frame.decode("utf-8").strip().split("\n")
+    return event_line[len("event: "):], json.loads(data_line[len("data: "):])
+
+
+class TestFeedService:
+    """اختبارات البث المباشر للوقت والطقس"""
+    
+    def _stop(self, broadcaster):
+        if broadcaster._task is not None:
+            broadcaster._task.cancel()
+    
+    @pytest.mark.asyncio
+    async def test_frame_encoded_once_for_all_subscribers(self):
+        """اختبار أن حدث المدينة يُحسب مرة واحدة ويُرسل لكل المشتركين"""
+        broadcaster = FeedBroadcaster(tick_seconds=3600)
+        cairo, london = city_registry.lookup("Cairo"), city_registry.lookup("London")
+        subscribers = [broadcaster.subscribe([cairo]) for _ in range(10)]
+        both = broadcaster.subscribe([cairo, london])
+        self._stop(broadcaster)
+        broadcaster.frames_encoded = broadcaster.frames_sent = 0
+        
+        broadcaster.publish_time()
+        
+        assert broadcaster.frames_encoded == 2
+        assert broadcaster.frames_sent == 12
+        frames = [(await subscription.next_frames())[-1] for subscription in subscribers]
+        assert all(frame is frames[0] for frame in frames)
+        event, payload = _decode(frames[0])
+        assert event == "time"
+        assert payload["timezone"] == "Africa/Cairo"
+        assert {_decode(frame)[1]["city"] for frame in await both.next_frames()} == {"Cairo", "London"}
+    
+    @pytest.mark.asyncio
+    async def test_weather_published_for_cities_with_data(self):
+        """اختبار بث الطقس للمدن التي تتوفر لها بيانات فقط"""
+        broadcaster = FeedBroadcaster(tick_seconds=3600)
+        subscription = broadcaster.subscribe([city_registry.lookup("Riyadh"), city_registry.lookup("Tokyo")])
+        self._stop(broadcaster)
+        
+        await broadcaster.publish_weather()
+        
+        events = [_decode(frame) for frame in await subscription.next_frames()]
+        assert [(event, payload["city"]) for event, payload in events] == [("weather", "Riyadh")]
+    
+    @pytest.mark.asyncio
+    async def test_slow_weather_does_not_delay_time_ticks(self):
+        """اختبار أن خدمة طقس بطيئة لا توقف أحداث الوقت وأن المدن تُحدث بالتوازي"""
+        real_get_weather = weather_service.get_weather
+        
+        async def slow_get_weather(city):
+            await asyncio.sleep(0.4)
+            return await real_get_weather(city)
+        
+        broadcaster = FeedBroadcaster(tick_seconds=0.05)
+        with patch.object(weather_service, "get_weather", side_effect=slow_get_weather):
+            started = time.monotonic()
+            subscription = broadcaster.subscribe([city_registry.lookup("Riyadh"), city_registry.lookup("Cairo")])
+            try:
+                await asyncio.sleep(0.3)
+                early = [_decode(frame)[0] for frame in await subscription.next_frames()]
+                await asyncio.sleep(0.3)
+                late = [_decode(frame)[0] for frame in await subscription.next_frames()]
+            finally:
+                self._stop(broadcaster)
+        
+        assert "weather" not in early
+        assert early.count("time") >= 8
+        # المدينتان تُحدثان معاً خلال مدة طلب واحد تقريباً
+        assert late.count("weather") == 2
+        assert time.monotonic() - started < 0.8
+    
+    @pytest.mark.asyncio
+    async def test_new_subscriber_receives_latest_frames(self):
+        """اختبار أن المشترك الجديد يستلم آخر حالة فوراً ثم تُحذف عند مغادرة الجميع"""
+        broadcaster = FeedBroadcaster(tick_seconds=3600)
+        cairo = city_registry.lookup("Cairo")
+        first = broadcaster.subscribe([cairo])
+        self._stop(broadcaster)
+        broadcaster.publish_time()
+        
+        second = broadcaster.subscribe([cairo])
+        self._stop(broadcaster)
+        assert _decode((await second.next_frames())[0])[0] == "time"
+        
+        broadcaster.unsubscribe(first)
+        broadcaster.unsubscribe(second)
+        assert broadcaster.stats()["cities"] == 0
+        fresh = broadcaster.subscribe([cairo])
+        self._stop(broadcaster)
+        assert not fresh.frames
+    
+    def test_slow_subscriber_drops_oldest_frames(self):
+        """اختبار أن العميل البطيء لا يراكم أحداثاً بلا حد"""
+        subscription = Subscription(["cairo"], max_pending=2)
+        for frame in (b"1", b"2", b"3"):
+            subscription.push(frame)
+        
+        assert list(subscription.frames) == [b"2", b"3"]
+        assert subscription.dropped == 1
+    
+    def test_encode_event(self):
+        """اختبار صيغة حدث Server-Sent Events"""
+        assert encode_event("time", {"city": "القاهرة"}) == 'event: time\ndata: {"city": "القاهرة"}\n\n'.encode("utf-8")
+    
+    def test_stream_rejects_unknown_or_too_many_cities(self):
+        """اختبار رفض المدن غير المدعومة أو القائمة الفارغة"""
+        assert client.get("/feed/stream?cities=Cairo,Zzyzxopolis").status_code == 400
+        assert client.get("/feed/stream?cities=,").status_code == 422
+        assert client.get("/feed/stream?cities=" + ",".join(["Cairo"] * 21)).status_code == 422
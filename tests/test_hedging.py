@@ -0,0 +1,155 @@
+import asyncio
+import threading
+import time
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from app.services.time_service import TimeService
+from app.utils.deadline import current_deadline, request_deadline
+from app.utils.hedging import Hedger, LatencyTracker
+from app.utils.rate_limiter import RateLimitedQueue
+
+
+def _warm_hedger(budget_ratio: float = 1.0, samples: int = 5) -> Hedger:
+    """محوّط مفعّل بأزمنة مرصودة سابقاً (p95 = 10ms)"""
+    hedger = Hedger("test", budget_ratio=budget_ratio, min_samples=5)
+    for _ in range(samples):
+        hedger.latency.record(0.01)
+    return hedger
+
+
+class TestHedging:
+    """اختبارات تحوّط الطلبات الصادرة"""
+
+    def test_latency_percentile(self):
+        """اختبار حساب p95 من الأزمنة المرصودة"""
+        tracker = LatencyTracker()
+        assert tracker.percentile(0.95) is None
+
+        for i in range(1, 101):
+            tracker.record(i / 1000)
+
+        assert tracker.percentile(0.95) == pytest.approx(0.096)
+        assert tracker.percentile(0.5) == pytest.approx(0.051)
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        """اختبار إرسال محاولة ثانية عند تأخر الأولى وإلغاء الخاسرة"""
+        hedger = _warm_hedger()
+        attempts, cancelled = [], []
+
+        async def attempt():
+            attempts.append(len(attempts))
+            if len(attempts) == 1:
+                try:
+                    await asyncio.sleep(1)
+                except asyncio.CancelledError:
+                    cancelled.append(True)
+                    raise
+                return "slow"
+            return "fast"
+
+        started = time.monotonic()
+        assert await hedger.run(attempt) == "fast"
+        await asyncio.sleep(0)
+
+        assert time.monotonic() - started < 0.5
+        assert cancelled == [True]
+        assert hedger.stats()["hedged"] == 1
+        assert hedger.stats()["hedge_wins"] == 1
+
+    @pytest.mark.asyncio
+    async def test_no_hedging_before_enough_samples(self):
+        """اختبار عدم التحوّط قبل رصد أزمنة كافية"""
+        hedger = Hedger("test", budget_ratio=1.0, min_samples=5)
+        calls = []
+
+        async def attempt():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        assert await hedger.run(attempt) == "ok"
+        assert len(calls) == 1
+        assert hedger.hedge_delay() is None
+
+    @pytest.mark.asyncio
+    async def test_hedge_budget_caps_extra_load(self):
+        """اختبار أن المحاولات الإضافية لا تتجاوز نسبة الحصة"""
+        hedger = _warm_hedger(budget_ratio=0.1, samples=1000)
+        calls = []
+
+        async def attempt():
+            calls.append(1)
+            await asyncio.sleep(0.03)
+            return "ok"
+
+        for _ in range(20):
+            await hedger.run(attempt)
+
+        stats = hedger.stats()
+        assert stats["hedged"] == 2
+        assert len(calls) == 22
+        assert stats["skipped_budget"] == 18
+
+    @pytest.mark.asyncio
+    async def test_failed_attempt_falls_back_to_other(self):
+        """اختبار استخدام المحاولة الأخرى إذا فشلت إحداهما"""
+        hedger = _warm_hedger()
+
+        async def failing_primary():
+            await asyncio.sleep(0.05)
+            raise ConnectionError("reset")
+
+        async def hedge():
+            await asyncio.sleep(0.1)
+            return "hedge"
+
+        assert await hedger.run(failing_primary, hedge=hedge) == "hedge"
+
+        async def failing_hedge():
+            raise TimeoutError("hedge")
+
+        with pytest.raises(ConnectionError):
+            await hedger.run(failing_primary, hedge=failing_hedge)
+
+    def test_sync_hedge_keeps_request_deadline(self):
+        """اختبار التحوّط للمكتبات المتزامنة مع نقل مهلة الطلب للخيوط"""
+        hedger = _warm_hedger()
+        calls = []
+
+        def attempt():
+            calls.append(threading.current_thread().name)
+            if len(calls) == 1:
+                time.sleep(0.5)
+                return "slow"
+            return current_deadline()
+
+        with request_deadline(5) as deadline:
+            started = time.monotonic()
+            assert hedger.call(attempt) is deadline
+
+        assert time.monotonic() - started < 0.4
+        assert all(name.startswith("hedge-test") for name in calls)
+
+    def test_geocode_hedge_respects_rate_limit(self):
+        """اختبار أن المحاولة الثانية للبحث الجغرافي لا تتجاوز حد المعدل"""
+        location = SimpleNamespace(latitude=31.2001, longitude=29.9187)
+
+        def slow_geocode(city_name, timeout):
+            time.sleep(0.2)
+            return location
+
+        service = TimeService()
+        service.geocode_hedger = _warm_hedger()
+        with patch.object(service.geolocator, "geocode", side_effect=slow_geocode) as geocode:
+            assert service.get_city_timezone("Alexandria") == "Africa/Cairo"
+        # الرمز الوحيد أخذته المحاولة الأولى
+        assert geocode.call_count == 1
+
+        service = TimeService()
+        service.geocoder_limiter = RateLimitedQueue("nominatim", rate=10, burst=2)
+        service.geocode_hedger = _warm_hedger()
+        with patch.object(service.geolocator, "geocode", side_effect=slow_geocode) as geocode:
+            assert service.get_city_timezone("Alexandria") == "Africa/Cairo"
+        assert geocode.call_count == 2
@@ -0,0 +1,75 @@
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.http_cache import etag_matches, make_etag
+from app.utils.config import settings
+
+client = TestClient(app)
+
+
+class TestHttpCache:
+    """اختبارات ETag والطلبات الشرطية"""
+    
+    def test_etag_matching(self):
+        """اختبار مقارنة If-None-Match"""
+        etag = make_etag(b"body")
+        
+        assert etag.startswith('"') and etag.endswith('"')
+        assert etag == make_etag(b"body") != make_etag(b"other")
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"abc", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches(None, etag)
+        assert not etag_matches('"abc"', etag)
+    
+    def test_weather_not_modified_skips_service(self):
+        """اختبار أن 304 لا يستدعي خدمة الطقس"""
+        response = client.get("/weather/?city=London")
+        etag = response.headers["etag"]
+        max_age = int(response.headers["cache-control"].split("max-age=")[1])
+        
+        assert response.status_code == 200
+        assert 0 < max_age <= settings.weather_cache_ttl
+        
+        with patch("app.services.weather_service.weather_service.get_weather") as get_weather:
+            not_modified = client.get("/weather/?city=لندن", headers={"If-None-Match": etag})
+        
+        get_weather.assert_not_called()
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert not_modified.headers["etag"] == etag
+    
+    def test_weather_cached_entry_skips_service(self):
+        """اختبار أن الطلب العادي يُجاب من الاستجابة المخزنة دون استدعاء خدمة الطقس"""
+        response = client.get("/weather/?city=Cairo")
+        assert response.status_code == 200
+        
+        with patch("app.services.weather_service.weather_service.get_weather") as get_weather, \
+             patch("app.services.weather_service.weather_service.popularity.record") as record:
+            cached = client.get("/weather/?city=القاهرة")
+        
+        get_weather.assert_not_called()
+        record.assert_called_once_with("cairo")
+        assert cached.status_code == 200
+        assert cached.content == response.content
+        assert cached.headers["etag"] == response.headers["etag"]
+    
+    def test_weather_changed_etag_returns_body(self):
+        """اختبار أن ETag قديم يعيد الاستجابة الكاملة"""
+        response = client.get("/weather/?city=Riyadh", headers={"If-None-Match": '"stale"'})
+        
+        assert response.status_code == 200
+        assert response.json()["city"] == "Riyadh"
+        assert response.headers["etag"] != '"stale"'
+    
+    @pytest.mark.parametrize("path", ["/", "/weather/cities"])
+    def test_static_endpoints_support_conditional_requests(self, path):
+        """اختبار ETag و 304 للصفحة الرئيسية وقائمة المدن"""
+        response = client.get(path)
+        etag = response.headers["etag"]
+        
+        assert response.status_code == 200
+        assert response.headers["cache-control"].startswith("public, max-age=")
+        assert client.get(path).headers["etag"] == etag
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
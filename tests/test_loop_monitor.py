@@ -0,0 +1,64 @@
+import asyncio
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.loop_monitor import LoopLagMonitor
+
+
+def _hog_the_loop(seconds: float) -> None:
+    """كود متزامن يحجز حلقة الأحداث"""
+    time.sleep(seconds)
+
+
+class TestLoopMonitor:
+    """اختبارات مراقبة تأخر حلقة الأحداث"""
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_is_captured(self):
+        """اختبار قياس التأخر والتقاط موضع الكود الذي يحجز الحلقة"""
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.1)
+            _hog_the_loop(0.3)
+            await asyncio.sleep(0.05)
+        finally:
+            await monitor.stop()
+
+        stats = monitor.stats()
+        assert stats["stalls"] == 1
+        assert stats["max_lag_ms"] >= 250
+        assert stats["histogram_ms"][">2500"] == 0
+        assert sum(stats["histogram_ms"].values()) == stats["samples"]
+
+        offender = stats["offenders"][0]
+        assert "in _hog_the_loop" in offender["site"]
+        assert offender["site"].startswith("tests/test_loop_monitor.py")
+        assert any("in test_blocking_call_is_captured" in frame for frame in offender["stack"])
+
+    @pytest.mark.asyncio
+    async def test_idle_loop_has_no_stalls(self):
+        """اختبار عدم تسجيل تعطيل عندما لا يحجز أحد الحلقة"""
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.2)
+        finally:
+            await monitor.stop()
+
+        stats = monitor.stats()
+        assert stats["samples"] >= 5
+        assert stats["stalls"] == 0
+        assert stats["offenders"] == []
+        assert not stats["running"]
+
+    def test_metrics_include_event_loop(self):
+        """اختبار ظهور مقاييس حلقة الأحداث في /metrics أثناء تشغيل التطبيق"""
+        with TestClient(app) as client:
+            time.sleep(0.2)
+            event_loop = client.get("/metrics").json()["event_loop"]
+
+        assert event_loop["running"]
+        assert event_loop["samples"] > 0
+        assert "histogram_ms" in event_loop
@@ -0,0 +1,78 @@
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.config import settings
+from app.utils.memory_profiler import MemoryProfiler, rss_bytes
+
+client = TestClient(app)
+
+# أي تخصيصات تبقى حية بين اللقطتين تظهر في المقارنة
+_retained = []
+
+
+def _allocate_retained() -> None:
+    _retained.append([bytearray(1024) for _ in range(200)])
+
+
+class TestMemoryProfiler:
+    """اختبارات تشخيص الذاكرة"""
+
+    def test_diff_reports_growing_allocation_site(self):
+        """اختبار أن المقارنة تُظهر موضع الكود الذي زادت ذاكرته"""
+        profiler = MemoryProfiler(top_n=5)
+        assert profiler.diff() is None
+
+        profiler.snapshot()
+        try:
+            _allocate_retained()
+            report = profiler.diff()
+        finally:
+            profiler.stop()
+            _retained.clear()
+
+        assert report["growth_bytes"] >= 200 * 1024
+        top = report["top"][0]
+        assert top["site"].startswith("tests/test_memory_profiler.py:")
+        assert top["size_diff_bytes"] >= 200 * 1024
+        assert top["count_diff"] >= 200
+        assert not profiler.tracing
+
+    def test_rss_is_read_from_proc(self):
+        """اختبار قراءة الذاكرة المقيمة"""
+        assert rss_bytes() > 0
+
+    def test_endpoints_are_disabled_by_default(self):
+        """اختبار أن مسارات التشخيص غير متاحة بدون MEMORY_DEBUG"""
+        assert client.get("/debug/memory").status_code == 404
+        assert client.post("/debug/memory/snapshot").status_code == 404
+
+    def test_snapshot_and_diff_endpoints(self):
+        """اختبار لقطة الأساس والمقارنة وأحجام التخزين المؤقت الداخلي عبر HTTP"""
+        with patch.object(settings, "memory_debug", True):
+            assert client.get("/debug/memory/diff").status_code == 409
+
+            summary = client.get("/debug/memory").json()
+            assert summary["tracing"] is False
+            caches = summary["caches"]
+            assert "geocode_entries" in caches["cache_result"]
+            assert "recent_waits" in caches["metrics_buffers"]["geocoder_rate_limiter"]
+
+            try:
+                snapshot = client.post("/debug/memory/snapshot")
+                assert snapshot.status_code == 200
+                assert snapshot.json()["tracing"] is True
+                # التتبع بدأ للتو: اللقطة الأولى تكاد تكون فارغة
+                assert isinstance(snapshot.json()["top"], list)
+
+                client.get("/weather/?city=Cairo")
+                diff = client.get("/debug/memory/diff?group_by=traceback")
+                assert diff.status_code == 200
+                assert "traceback" in diff.json()["top"][0]
+
+                assert client.get("/debug/memory/diff?group_by=bogus").status_code == 422
+            finally:
+                stopped = client.delete("/debug/memory/snapshot").json()
+
+        assert stopped["tracing"] is False
+        assert stopped["has_baseline"] is False
@@ -0,0 +1,202 @@
+import array
+import random
+import pytest
+from unittest.mock import patch
+from merge_sorted_arrays import merge_sorted_arrays, merge_in_place, merge_sorted_buffers
+from parallel_merge import parallel_merge, co_rank
+from benchmark_merge import run_benchmarks, ALGORITHMS, DISTRIBUTIONS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+requires_numpy = pytest.mark.skipif(np is None, reason="numpy غير مثبت")
+
+
+class TestMergeSortedArrays:
+    """اختبارات خوارزمية دمج المصفوفات المرتبة"""
+
+    def test_merge_lists(self):
+        """اختبار دمج قوائم Python العادية"""
+        result = merge_sorted_arrays([1, 3, 5], [2, 4, 6, 8])
+
+        assert result == [1, 2, 3, 4, 5, 6, 8]
+        assert isinstance(result, list)
+
+    def test_merge_empty(self):
+        """اختبار الحالات الخاصة بالمصفوفات الفارغة"""
+        assert merge_sorted_arrays([], [42]) == [42]
+        assert merge_sorted_arrays([1, 2, 3], []) == [1, 2, 3]
+
+    def test_galloping_merge_is_stable(self):
+        """اختبار أن وضع القفز يحافظ على ترتيب العناصر المتساوية"""
+        a = [(value, "a") for value in [1, 1, 2, 2, 2, 9]]
+        b = [(value, "b") for value in [0, 1, 2] + [5] * 100]
+
+        class Item:
+            def __init__(self, item):
+                self.item = item
+
+            def __le__(self, other):
+                return self.item[0] <= other.item[0]
+
+            def __lt__(self, other):
+                return self.item[0] < other.item[0]
+
+            def __gt__(self, other):
+                return self.item[0] > other.item[0]
+
+        expected = sorted(a + b, key=lambda item: item[0])
+        merged = merge_sorted_arrays([Item(x) for x in a], [Item(x) for x in b])
+        assert [wrapped.item for wrapped in merged] == expected
+
+        data = [Item(x) for x in a] + [None] * len(b)
+        merge_in_place(data, len(a), [Item(x) for x in b], len(b))
+        assert [wrapped.item for wrapped in data] == expected
+
+    def test_galloping_reduces_comparisons_for_skewed_inputs(self):
+        """اختبار أن عدد المقارنات قريب من O(m log(n/m)) مع مدخلات غير متوازنة"""
+        comparisons = 0
+
+        class Counted(int):
+            def __le__(self, other):
+                nonlocal comparisons
+                comparisons += 1
+                return int(self) <= int(other)
+
+            def __lt__(self, other):
+                nonlocal comparisons
+                comparisons += 1
+                return int(self) < int(other)
+
+            def __gt__(self, other):
+                nonlocal comparisons
+                comparisons += 1
+                return int(self) > int(other)
+
+        big = [Counted(value) for value in range(0, 200000, 2)]
+        small = [Counted(value) for value in range(1, 200000, 20001)]
+        expected = sorted(int(value) for value in big + small)
+
+        result = merge_sorted_arrays(big, small)
+
+        assert comparisons < 2000
+        assert result == expected
+
+    @requires_numpy
+    def test_merge_numpy_preserves_dtype(self):
+        """اختبار أن الدمج المتجه يحافظ على نوع البيانات"""
+        a = np.array([1, 3, 5], dtype=np.int16)
+        b = np.array([2, 4], dtype=np.int16)
+        result = merge_sorted_arrays(a, b)
+
+        assert isinstance(result, np.ndarray)
+        assert result.dtype == np.int16
+        assert result.tolist() == [1, 2, 3, 4, 5]
+
+    @requires_numpy
+    def test_merge_numpy_matches_python(self):
+        """اختبار تطابق الدمج المتجه مع الدمج العادي مع وجود تكرارات"""
+        rng = random.Random(7)
+        for _ in range(20):
+            a = sorted(rng.randint(0, 20) for _ in range(rng.randint(0, 50)))
+            b = sorted(rng.randint(0, 20) for _ in range(rng.randint(0, 50)))
+            expected = merge_sorted_arrays(a, b)
+            result = merge_sorted_buffers(np.array(a, dtype=np.int64), np.array(b, dtype=np.int64))
+            assert result.tolist() == expected
+
+    @requires_numpy
+    def test_merge_array_and_memoryview(self):
+        """اختبار دمج array.array و memoryview"""
+        result = merge_sorted_arrays(array.array("d", [1.0, 3.0]), array.array("d", [2.0]))
+        assert isinstance(result, array.array)
+        assert result.typecode == "d"
+        assert result.tolist() == [1.0, 2.0, 3.0]
+
+        view = memoryview(array.array("i", [1, 4, 9]))
+        result = merge_sorted_arrays(view, array.array("i", [2, 5]))
+        assert isinstance(result, memoryview)
+        assert result.tolist() == [1, 2, 4, 5, 9]
+
+    @requires_numpy
+    def test_merge_arrays_of_different_typecodes(self):
+        """اختبار أن دمج أنواع مختلفة لا يعيد تفسير البايتات بنوع خاطئ"""
+        result = merge_sorted_arrays(array.array("l", [1, 3]), array.array("d", [2.5, 4.0]))
+        assert isinstance(result, array.array)
+        assert result.typecode == "d"
+        assert result.tolist() == [1.0, 2.5, 3.0, 4.0]
+
+        result = merge_sorted_arrays(array.array("i", [1, 3]), array.array("l", [2]))
+        assert np.dtype(result.typecode) == np.int64
+        assert result.tolist() == [1, 2, 3]
+
+        # لا يوجد نوع array.array يطابق float16: يُرجع ndarray
+        result = merge_sorted_arrays(array.array("b", [1, 3]), np.array([2.5], dtype=np.float16))
+        assert isinstance(result, np.ndarray)
+        assert result.tolist() == [1.0, 2.5, 3.0]
+
+    @requires_numpy
+    def test_merge_arrays_skips_text_typecodes(self):
+        """اختبار أن أنواع النصوص في array.typecodes (مثل 'w' في Python 3.13) لا توقف الدمج"""
+        with patch.object(array, "typecodes", "bBuhHiIlLqQwfd"):
+            result = merge_sorted_arrays(array.array("l", [1, 3]), array.array("d", [2.5, 4.0]))
+        assert result.typecode == "d"
+        assert result.tolist() == [1.0, 2.5, 3.0, 4.0]
+
+    @requires_numpy
+    def test_merge_rejects_multidimensional(self):
+        """اختبار رفض المصفوفات متعددة الأبعاد"""
+        with pytest.raises(ValueError):
+            merge_sorted_buffers(np.zeros((2, 2)), np.zeros(2))
+
+    def test_merge_in_place_list(self):
+        """اختبار الدمج في المكان للقوائم"""
+        data = [1, 2, 3, 0, 0, 0]
+        merge_in_place(data, 3, [2, 5, 6], 3)
+        assert data == [1, 2, 2, 3, 5, 6]
+
+    @requires_numpy
+    def test_merge_in_place_numpy(self):
+        """اختبار الدمج في المكان لمصفوفات NumPy"""
+        data_np = np.array([1, 2, 3, 0, 0, 0], dtype=np.int32)
+        merge_in_place(data_np, 3, np.array([2, 5, 6], dtype=np.int32), 3)
+        assert data_np.tolist() == [1, 2, 2, 3, 5, 6]
+        assert data_np.dtype == np.int32
+
+    def test_co_rank_partitions(self):
+        """اختبار أن co_rank يقسم الناتج عند الحدود الصحيحة مع التكرارات"""
+        a = [1, 2, 2, 2, 5, 7]
+        b = [2, 2, 3, 7, 8]
+        expected = merge_sorted_arrays(a, b)
+
+        for k in range(len(a) + len(b) + 1):
+            i = co_rank(k, a, b)
+            assert sorted(a[:i] + b[:k - i]) == expected[:k]
+
+    @requires_numpy
+    def test_parallel_merge(self):
+        """اختبار الدمج المتوازي عبر عدة عمليات وذاكرة مشتركة"""
+        rng = np.random.default_rng(5)
+        a = np.sort(rng.integers(0, 1000, size=5000))
+        b = np.sort(rng.integers(0, 1000, size=3000))
+
+        result = parallel_merge(a, b, workers=3, threshold=0)
+
+        assert result.dtype == a.dtype
+        assert result.tolist() == merge_sorted_arrays(a.tolist(), b.tolist())
+
+    def test_parallel_merge_falls_back_below_threshold(self):
+        """اختبار الرجوع للدمج العادي للمصفوفات الصغيرة"""
+        assert parallel_merge([1, 4], [2, 3], workers=4) == [1, 2, 3, 4]
+
+    def test_benchmark_harness_reports_results(self):
+        """اختبار أن أداة القياس ترجع نتيجة قابلة للتحليل لكل خوارزمية وتوزيع"""
+        results = list(run_benchmarks(sizes=[50], repeat=1))
+
+        assert len(results) == len(DISTRIBUTIONS) * len(ALGORITHMS)
+        for result in results:
+            assert result["size"] == 50
+            assert "skipped" in result or (
+                result["items_per_second"] > 0 and result["peak_memory_bytes"] >= 0
+            )
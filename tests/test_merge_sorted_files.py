@@ -0,0 +1,59 @@
+import random
+import sys
+import pytest
+from unittest.mock import patch
+from merge_sorted_arrays import merge_sorted_arrays
+from merge_sorted_files import merge_sorted_binary_files, merge_sorted_text_files, benchmark_binary_merge
+
+np = pytest.importorskip("numpy")
+
+
+class TestMergeSortedFiles:
+    """اختبارات دمج الملفات المرتبة الأكبر من الذاكرة"""
+
+    def test_merge_binary_files_small_chunks(self, tmp_path):
+        """اختبار دمج ملفين ثنائيين بدفعات أصغر من حجم الملفات"""
+        rng = random.Random(3)
+        a = sorted(rng.randint(0, 50) for _ in range(1000))
+        b = sorted(rng.randint(0, 50) for _ in range(700))
+        np.array(a, dtype="<i8").tofile(tmp_path / "a.bin")
+        np.array(b, dtype="<i8").tofile(tmp_path / "b.bin")
+
+        count = merge_sorted_binary_files(
+            tmp_path / "a.bin", tmp_path / "b.bin", tmp_path / "out.bin", chunk_items=64
+        )
+
+        result = np.fromfile(tmp_path / "out.bin", dtype="<i8")
+        assert count == 1700
+        assert result.tolist() == merge_sorted_arrays(a, b)
+
+    def test_merge_binary_files_empty_input(self, tmp_path):
+        """اختبار دمج ملف فارغ مع ملف غير فارغ"""
+        (tmp_path / "empty.bin").write_bytes(b"")
+        np.array([1.5, 2.5], dtype="<f4").tofile(tmp_path / "b.bin")
+
+        merge_sorted_binary_files(
+            tmp_path / "empty.bin", tmp_path / "b.bin", tmp_path / "out.bin", dtype="<f4"
+        )
+
+        assert np.fromfile(tmp_path / "out.bin", dtype="<f4").tolist() == [1.5, 2.5]
+
+    def test_merge_text_files(self, tmp_path):
+        """اختبار دمج ملفين نصيين مع مقارنة رقمية"""
+        (tmp_path / "a.txt").write_text("1\n9\n10\n")
+        (tmp_path / "b.txt").write_text("2\n11")
+
+        count = merge_sorted_text_files(
+            tmp_path / "a.txt", tmp_path / "b.txt", tmp_path / "out.txt", key=int
+        )
+
+        assert count == 5
+        assert (tmp_path / "out.txt").read_text() == "1\n2\n9\n10\n11\n"
+
+    def test_benchmark_without_resource_module(self, tmp_path):
+        """اختبار القياس حيث لا تتوفر وحدة resource (مثل Windows)"""
+        with patch.dict(sys.modules, {"resource": None}):
+            result = benchmark_binary_merge(0.0001, directory=tmp_path, chunk_items=1000)
+
+        assert result["items"] > 0
+        assert result["peak_rss_mb"] is None
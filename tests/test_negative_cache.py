@@ -0,0 +1,42 @@
+import pytest
+from unittest.mock import patch
+from app.utils.negative_cache import BloomFilter, NegativeCache
+
+
+class TestNegativeCache:
+    """اختبارات التخزين السلبي للمدن غير الموجودة"""
+    
+    def test_bloom_filter_has_no_false_negatives(self):
+        """اختبار أن Bloom filter لا ينفي وجود عنصر مضاف"""
+        bloom = BloomFilter(capacity=1000)
+        names = [f"city-{i}" for i in range(1000)]
+        for name in names:
+            bloom.add(name)
+        
+        assert all(name in bloom for name in names)
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        assert false_positives < 300  # نسبة الخطأ المتوقعة ~1%
+    
+    def test_entries_expire_after_ttl(self):
+        """اختبار انتهاء صلاحية المدخلات بعد المدة المحددة"""
+        cache = NegativeCache(ttl_seconds=60, max_entries=10)
+        
+        with patch("app.utils.negative_cache.time.monotonic", return_value=1000.0):
+            cache.add("Atlantisx")
+            assert cache.contains("atlantisx")
+            assert cache.contains("  ATLANTISX ")
+            assert not cache.contains("Cairo")
+        
+        with patch("app.utils.negative_cache.time.monotonic", return_value=1061.0):
+            assert not cache.contains("Atlantisx")
+        assert len(cache) == 0
+    
+    def test_cache_size_is_bounded(self):
+        """اختبار أن حجم التخزين السلبي محدود"""
+        cache = NegativeCache(ttl_seconds=60, max_entries=5)
+        for i in range(50):
+            cache.add(f"unknown-{i}")
+        
+        assert len(cache) == 5
+        assert cache.contains("unknown-49")
+        assert not cache.contains("unknown-0")
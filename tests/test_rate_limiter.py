@@ -0,0 +1,65 @@
+import threading
+import time
+import pytest
+from app.utils.rate_limiter import RateLimitedQueue, TokenBucket
+from app.utils.exceptions import RateLimitExceededException
+
+
+class TestRateLimiter:
+    """اختبارات محدد معدل الطلبات الصادرة"""
+    
+    def test_token_bucket_refills_at_rate(self):
+        """اختبار أن دلو الرموز يمتلئ بالمعدل المحدد"""
+        bucket = TokenBucket(rate=10, capacity=1)
+        now = time.monotonic()
+        
+        assert bucket.try_acquire(now) == 0
+        assert bucket.try_acquire(now) == pytest.approx(0.1, abs=0.01)
+        assert bucket.try_acquire(now + 0.1) == 0
+    
+    def test_requests_are_spaced_by_rate(self):
+        """اختبار أن الطلبات المتتالية تنتظر دورها حسب المعدل"""
+        limiter = RateLimitedQueue("test", rate=20, burst=1)
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.acquire()
+        
+        assert time.monotonic() - start >= 0.18
+        assert limiter.stats()["acquired"] == 5
+        assert limiter.depth == 0
+    
+    def test_deadline_aware_drop(self):
+        """اختبار الرفض الفوري عندما لن يأتي الدور قبل المهلة"""
+        limiter = RateLimitedQueue("test", rate=1, burst=1)
+        limiter.acquire()
+        
+        start = time.monotonic()
+        with pytest.raises(RateLimitExceededException):
+            limiter.acquire(deadline=time.monotonic() + 0.05)
+        
+        assert time.monotonic() - start < 0.2
+        assert limiter.stats()["dropped_deadline"] == 1
+    
+    def test_full_queue_evicts_lower_priority(self):
+        """اختبار أن امتلاء الطابور يطرد الطلب الأقل أولوية لصالح الأعلى"""
+        limiter = RateLimitedQueue("test", rate=5, burst=1, max_queue=1)
+        limiter.acquire()
+        results = {}
+        
+        def low_priority():
+            try:
+                limiter.acquire(priority=10)
+                results["low"] = "acquired"
+            except RateLimitExceededException:
+                results["low"] = "dropped"
+        
+        thread = threading.Thread(target=low_priority)
+        thread.start()
+        while limiter.depth == 0:
+            time.sleep(0.001)
+        
+        limiter.acquire(priority=0)
+        thread.join()
+        
+        assert results["low"] == "dropped"
+        assert limiter.stats()["dropped_queue_full"] == 1
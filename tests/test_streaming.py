@@ -0,0 +1,30 @@
+import pytest
+from app.utils.streaming import iter_line_batches
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+async def _collect(*parts, max_line_bytes=10):
+    return [batch async for batch in iter_line_batches(_chunks(*parts), max_line_bytes)]
+
+
+class TestStreaming:
+    """اختبارات تقسيم جسم الطلب المتدفق إلى أسطر"""
+    
+    @pytest.mark.asyncio
+    async def test_lines_split_across_chunks(self):
+        """اختبار الأسطر المقسمة بين أجزاء مختلفة"""
+        batches = await _collect(b"ab", b"c\nde", b"f\ngh\n", b"tail")
+        
+        assert batches == [[b"abc"], [b"def", b"gh"], [b"tail"]]
+    
+    @pytest.mark.asyncio
+    async def test_long_line_is_replaced_and_skipped(self):
+        """اختبار أن السطر الطويل لا يُخزن كاملاً في الذاكرة"""
+        batches = await _collect(b"ok\n0123456789", b"0123456789", b"xx\nnext\n")
+        
+        assert batches == [[b"ok"], [None], [b"next"]]
+        assert await _collect(b"01234567890123\nok\n") == [[None, b"ok"]]
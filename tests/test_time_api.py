@@ -1,6 +1,14 @@
+import json
+import threading
+import time
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.services.time_service import time_service
+from app.utils.bulkhead import Bulkhead
+from app.utils.config import settings
+from app.utils.exceptions import RateLimitExceededException, CityNotFoundException
+from unittest.mock import patch
 
 client = TestClient(app)
 
@@ -100,4 +108,134 @@ class TestTimeAPI:
         assert response.status_code == 200
         data = response.json()
         
-        assert data["time_difference_hours"] == 0.0
\ No newline at end of file
+        assert data["time_difference_hours"] == 0.0
+    
+    def test_compare_times_series_across_dst(self):
+        """اختبار سلسلة فروق التوقيت عبر تغيير التوقيت الصيفي في لندن"""
+        response = client.get(
+            "/time/comparison/series?city1=Tokyo&city2=London"
+            "&from=2024-03-24T00:00:00&to=2024-04-07T00:00:00&step=1w"
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert data["city1_timezone"] == "Asia/Tokyo"
+        assert data["city2_timezone"] == "Europe/London"
+        assert data["step_seconds"] == 604800
+        assert data["timestamps"] == [
+            "2024-03-24T00:00:00Z", "2024-03-31T00:00:00Z", "2024-04-07T00:00:00Z"
+        ]
+        # لندن تنتقل إلى التوقيت الصيفي في 31 مارس 2024 (01:00 UTC)
+        assert data["time_difference_hours"] == [9.0, 9.0, 8.0]
+        assert data["city2_offset_hours"] == [0.0, 0.0, 1.0]
+    
+    def test_compare_times_series_validation(self):
+        """اختبار التحقق من معاملات سلسلة فروق التوقيت"""
+        response = client.get("/time/comparison/series?city1=Cairo&city2=London&step=abc")
+        assert response.status_code == 422
+        
+        response = client.get(
+            "/time/comparison/series?city1=Cairo&city2=London"
+            "&from=2024-05-01T00:00:00&to=2024-01-01T00:00:00"
+        )
+        assert response.status_code == 422
+        
+        response = client.get("/time/comparison/series?city1=Cairo&city2=London&step=1m")
+        assert response.status_code == 422
+    
+    def test_compare_times_series_invalid_city(self):
+        """اختبار سلسلة فروق التوقيت مع مدينة غير موجودة"""
+        response = client.get("/time/comparison/series?city1=Cairo&city2=مدينة_غير_موجودة")
+        assert response.status_code == 400
+    
+    def test_compare_times_geocoder_rate_limited(self):
+        """اختبار الرفض السريع مع Retry-After عندما يكون طابور البحث الجغرافي ممتلئاً"""
+        with patch.object(
+            time_service.geocoder_limiter, "acquire",
+            side_effect=RateLimitExceededException("nominatim", retry_after=3.2)
+        ):
+            response = client.get("/time/comparison?city1=Cairo&city2=Zzyzxopolis")
+        
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "3"
+    
+    def test_time_at_location(self):
+        """اختبار الوقت عند إحداثيات جغرافية"""
+        response = client.get("/time/at?lat=30.0444&lng=31.2357")
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["timezone"] == "Africa/Cairo"
+        assert data["latitude"] == 30.0444
+        assert "current_time" in data
+    
+    def test_time_at_location_invalid_coordinates(self):
+        """اختبار رفض الإحداثيات خارج النطاق"""
+        assert client.get("/time/at?lat=91&lng=0").status_code == 422
+        assert client.get("/time/at?lat=0&lng=-181").status_code == 422
+        assert client.get("/time/at?lat=0").status_code == 422
+    
+    def test_compare_times_stream(self):
+        """اختبار مقارنة الأوقات المتدفقة عبر NDJSON"""
+        body = (
+            '{"city1": "Cairo", "city2": "London"}\n'
+            '\n'
+            'not json\n'
+            '{"city1": "Tokyo", "city2": "Zzyzxopolis"}\n'
+            '{"city1": "Riyadh", "city2": "Paris"}'
+        )
+        with patch.object(time_service, "_geocode_timezone", return_value="Europe/Berlin"):
+            response = client.post("/time/comparison/stream", content=body)
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        results = {item["line"]: item for item in map(json.loads, response.text.splitlines())}
+        
+        assert sorted(results) == [1, 3, 4, 5]
+        assert results[1]["city1_timezone"] == "Africa/Cairo"
+        assert results[1]["city2_timezone"] == "Europe/London"
+        assert results[3]["error"] == "invalid_request"
+        assert results[4]["city2_timezone"] == "Europe/Berlin"
+        assert results[5]["time_difference_hours"] in (1.0, 2.0)
+    
+    def test_compare_times_stream_reports_per_line_errors(self):
+        """اختبار أن أخطاء سطر واحد لا توقف باقي التدفق"""
+        long_line = '{"city1": "' + "x" * 5000 + '", "city2": "Cairo"}'
+        body = f'{long_line}\n{{"city1": "Cairo", "city2": "Atlantisx"}}\n{{"city1": "Tokyo", "city2": "Dubai"}}\n'
+        with patch.object(time_service, "_geocode_timezone", side_effect=CityNotFoundException("Atlantisx")):
+            response = client.post("/time/comparison/stream", content=body)
+        
+        results = {item["line"]: item for item in map(json.loads, response.text.splitlines())}
+        assert results[1]["error"] == "line_too_long"
+        assert results[2]["error"] == "city_not_found"
+        assert results[3]["time_difference_hours"] == 5.0
+    
+    def test_compare_times_stream_caps_in_flight_pairs(self):
+        """اختبار أن حد الأزواج قيد المعالجة يبقى صحيحاً عندما تصل كلها في دفعة واحدة"""
+        active = peak = 0
+        lock = threading.Lock()
+        
+        def slow_geocode(city):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+            return "Europe/Berlin"
+        
+        body = "".join(f'{{"city1": "Cairo", "city2": "Slowtown{i}"}}\n' for i in range(12))
+        # مكان لكل زوج مسموح به وبدون طابور: أي زوج زائد يُرفض بـ rate_limited
+        bulkhead = Bulkhead("geocoder", max_concurrent=3, max_queue=0)
+        with patch.object(settings, "stream_max_in_flight", 3), \
+             patch.object(time_service, "geocode_bulkhead", bulkhead), \
+             patch.object(time_service, "_geocode_timezone", side_effect=slow_geocode):
+            response = client.post("/time/comparison/stream", content=body)
+        
+        results = list(map(json.loads, response.text.splitlines()))
+        assert sorted(item["line"] for item in results) == list(range(1, 13))
+        assert all("error" not in item for item in results)
+        assert peak == 3
+        assert bulkhead.stats()["rejected_full"] == 0
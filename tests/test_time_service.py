@@ -1,6 +1,7 @@
 import pytest
 from datetime import datetime
 import pytz
+from unittest.mock import patch
 from app.services.time_service import TimeService
 from app.utils.exceptions import CityNotFoundException, TimezoneNotFoundException
 
@@ -65,4 +66,31 @@ class TestTimeService:
         timezone2 = self.time_service.get_city_timezone("cairo")
         timezone3 = self.time_service.get_city_timezone("Cairo")
         
-        assert timezone1 == timezone2 == timezone3 == "Africa/Cairo"
\ No newline at end of file
+        assert timezone1 == timezone2 == timezone3 == "Africa/Cairo"
+    
+    def test_fuzzy_city_names_resolve_locally(self):
+        """اختبار أن الأخطاء الإملائية واختلاف الكتابة العربية تُحل دون الحاجة للبحث الجغرافي"""
+        with patch.object(self.time_service.geolocator, "geocode") as mock_geocode:
+            assert self.time_service.get_city_timezone("Londn") == "Europe/London"
+            assert self.time_service.get_city_timezone("القاهره") == "Africa/Cairo"
+            assert self.time_service.get_city_timezone("إلرياض") == "Asia/Riyadh"
+            assert self.time_service.get_city_timezone("نيو-يورك") == "America/New_York"
+            mock_geocode.assert_not_called()
+    
+    def test_unknown_city_is_negatively_cached(self):
+        """اختبار أن المدينة غير الموجودة تُرفض مباشرة في الطلبات التالية دون البحث الجغرافي"""
+        with patch.object(self.time_service.geolocator, "geocode", return_value=None) as mock_geocode:
+            for _ in range(3):
+                with pytest.raises(CityNotFoundException):
+                    self.time_service.get_city_timezone("Qwertyville")
+            
+            assert mock_geocode.call_count == 1
+    
+    def test_geocoder_errors_are_not_negatively_cached(self):
+        """اختبار أن أخطاء الشبكة المؤقتة لا تُسجل في التخزين السلبي"""
+        with patch.object(self.time_service.geolocator, "geocode", side_effect=TimeoutError()) as mock_geocode:
+            for _ in range(2):
+                with pytest.raises(CityNotFoundException):
+                    self.time_service.get_city_timezone("Qwertyville")
+            
+            assert mock_geocode.call_count == 2
@@ -0,0 +1,145 @@
+import importlib.util
+import random
+import sys
+import numpy as np
+import pytest
+from unittest.mock import patch
+from app.utils import timezone_grid
+from app.utils.timezone_grid import QuantizedTimezoneCache
+
+
+class FakeHoles:
+    """مضلعات FakeFinder بدون ثقوب"""
+    
+    def ids_of(self, boundary_id):
+        return range(0)
+
+
+class FakeFinder:
+    """محاكاة TimezoneFinder: مضلعان يلتقيان عند خط الطول 10 وتحسب عدد الاستدعاءات"""
+    
+    nr_of_polygons = 2
+    holes = FakeHoles()
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def timezone_at(self, lat, lng):
+        self.calls += 1
+        return "Zone/West" if lng < 10 else "Zone/East"
+    
+    def unique_timezone_at(self, lng, lat):
+        return None
+    
+    def coords_of(self, boundary_id):
+        west, east = (-180, 10) if boundary_id == 0 else (10, 180)
+        return np.array([[west, east, east, west], [-90, -90, 90, 90]], dtype=np.int64) * 10 ** 7
+
+
+class PointOnlyFinder:
+    """محاكاة finder بدون بيانات مضلعات"""
+    
+    def timezone_at(self, lat, lng):
+        return "Zone/Only"
+
+
+class TestTimezoneGrid:
+    """اختبارات التخزين المؤقت لشبكة الإحداثيات"""
+    
+    def test_nearby_points_hit_memory(self):
+        """اختبار أن النقاط في نفس الخلية لا تستدعي البحث مرة أخرى"""
+        finder = FakeFinder()
+        cache = QuantizedTimezoneCache(finder, cell_degrees=0.01)
+        
+        assert cache.timezone_at(30.0441, 5.2351) == "Zone/West"
+        calls_after_first = finder.calls
+        for i in range(50):
+            assert cache.timezone_at(30.0441 + i * 0.0001, 5.2351) == "Zone/West"
+        
+        assert finder.calls == calls_after_first
+        assert cache.stats()["hits"] == 50
+        assert cache.stats()["border_lookups"] == 0
+    
+    def test_border_cell_falls_back_to_exact_lookup(self):
+        """اختبار أن الخلية التي تعبر الحدود تُحسب بدقة لكل نقطة"""
+        finder = FakeFinder()
+        cache = QuantizedTimezoneCache(finder, cell_degrees=0.01)
+        
+        assert cache.timezone_at(30.0, 9.9999) == "Zone/West"
+        assert cache.timezone_at(30.0, 9.99501) == "Zone/West"
+        # الخلية التالية تبدأ عند خط الحدود نفسه فهي حدودية أيضاً
+        assert cache.timezone_at(30.0, 10.0) == "Zone/East"
+        assert cache.stats()["border_lookups"] == 3
+    
+    def test_finder_without_polygons_uses_exact_lookups(self):
+        """اختبار أن الخلايا لا تُصنف بدون بيانات المضلعات"""
+        cache = QuantizedTimezoneCache(PointOnlyFinder(), cell_degrees=0.01)
+        
+        assert cache.timezone_at(30.0, 5.0) == "Zone/Only"
+        assert cache.timezone_at(30.0, 5.0) == "Zone/Only"
+        assert cache.stats()["border_lookups"] == 2
+        assert not cache.is_cached(30.0, 5.0)
+    
+    def test_cache_is_bounded(self):
+        """اختبار أن عدد الخلايا في الذاكرة محدود"""
+        cache = QuantizedTimezoneCache(FakeFinder(), cell_degrees=0.01, max_cells=10)
+        for i in range(100):
+            cache.timezone_at(i * 0.1, 0.5)
+        
+        assert len(cache) == 10
+    
+    def test_real_finder_matches_exact_lookup(self):
+        """اختبار أن النتائج المخزنة تطابق البحث الدقيق مع TimezoneFinder"""
+        from app.services.time_service import time_service
+        
+        for latitude, longitude in [(30.0444, 31.2357), (51.5074, -0.1278), (35.6762, 139.6503)]:
+            expected = time_service.tf.timezone_at(lat=latitude, lng=longitude)
+            assert time_service.timezone_grid.timezone_at(latitude, longitude) == expected
+    
+    def test_missing_timezonefinder_internals_fall_back_to_exact_lookups(self):
+        """اختبار أن اختفاء وحدات TimezoneFinder الداخلية لا يمنع تحميل الوحدة"""
+        # نسخة منفصلة من الوحدة حتى لا تتأثر الخلايا المخزنة في time_service
+        spec = importlib.util.spec_from_file_location("timezone_grid_without_internals", timezone_grid.__file__)
+        module = importlib.util.module_from_spec(spec)
+        with patch.dict(sys.modules, {"timezonefinder.configs": None}):
+            spec.loader.exec_module(module)
+        assert module.h3 is None
+        
+        cache = module.QuantizedTimezoneCache(FakeFinder(), cell_degrees=0.01)
+        assert cache.timezone_at(30.0441, 5.2351) == "Zone/West"
+        assert cache.timezone_at(30.0441, 5.2351) == "Zone/West"
+        assert cache.stats()["border_lookups"] == 2
+    
+    def test_changed_h3_api_falls_back_to_exact_lookups(self):
+        """اختبار أن خطأ في واجهة h3 يعيد البحث الدقيق بدلاً من فشل الطلب"""
+        finder = FakeFinder()
+        cache = QuantizedTimezoneCache(finder, cell_degrees=0.01)
+        
+        with patch.object(timezone_grid.h3, "h3shape_to_cells_experimental", side_effect=AttributeError("removed")):
+            assert cache.timezone_at(30.0441, 5.2351) == "Zone/West"
+            assert cache.timezone_at(30.5, 5.2351) == "Zone/West"
+        
+        assert cache.stats()["border_lookups"] == 2
+        assert not cache.is_cached(30.0441, 5.2351)
+    
+    def test_enclave_cells_match_exact_lookup(self):
+        """اختبار جيوب Baarle-Nassau/Baarle-Hertog: الحدود لا تمر بأركان الخلايا ولا بمراكزها"""
+        from app.services.time_service import time_service
+        
+        finder = time_service.tf
+        cache = QuantizedTimezoneCache(finder, cell_degrees=0.01)
+        
+        # جيب بلجيكي صغير داخل خلية واحدة: أركانها ومركزها كلها في هولندا
+        assert finder.timezone_at(lat=51.4351, lng=4.91921) == "Europe/Brussels"
+        assert {
+            finder.timezone_at(lat=latitude, lng=longitude)
+            for latitude, longitude in [(51.43, 4.91), (51.43, 4.92), (51.44, 4.91), (51.44, 4.92), (51.435, 4.915)]
+        } == {"Europe/Amsterdam"}
+        assert cache.timezone_at(51.4351, 4.91921) == "Europe/Brussels"
+        assert not cache.is_cached(51.4351, 4.91921)
+        
+        rng = random.Random(36)
+        for _ in range(5000):
+            latitude, longitude = rng.uniform(51.42, 51.48), rng.uniform(4.88, 4.98)
+            assert cache.timezone_at(latitude, longitude) == finder.timezone_at(lat=latitude, lng=longitude)
+        assert cache.stats()["hits"] > 0
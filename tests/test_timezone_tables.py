@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+import numpy as np
+import pytest
+import pytz
+from unittest.mock import patch
+from app.utils.timezone_tables import get_transition_table, utc_offsets_at
+
+
+def _timestamp(*args) -> int:
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+class TestTimezoneTables:
+    """اختبارات جداول انتقالات المناطق الزمنية"""
+
+    def test_pytz_still_exposes_transition_data(self):
+        """اختبار أن بيانات pytz الداخلية التي تُبنى منها الجداول ما زالت موجودة"""
+        london = pytz.timezone("Europe/London")
+        for name in ("_utc_transition_times", "_transition_info"):
+            assert getattr(london, name, None), f"pytz {pytz.__version__} لم يعد يوفر {name}: يجب تحديث timezone_tables"
+
+        transitions, offsets = get_transition_table("Europe/London")
+        assert len(transitions) == len(offsets) > 100
+
+    def test_offsets_follow_dst(self):
+        """اختبار الإزاحات قبل وبعد التوقيت الصيفي"""
+        timestamps = np.array([_timestamp(2024, 1, 15), _timestamp(2024, 7, 15)])
+
+        assert utc_offsets_at("Europe/London", timestamps).tolist() == [0, 3600]
+        assert utc_offsets_at("Asia/Tokyo", timestamps).tolist() == [32400, 32400]
+
+    def test_fixed_offset_zone(self):
+        """اختبار منطقة بإزاحة ثابتة"""
+        assert utc_offsets_at("UTC", np.array([0, _timestamp(2024, 7, 15)])).tolist() == [0, 0]
+        assert utc_offsets_at("Etc/GMT+3", np.array([0])).tolist() == [-3 * 3600]
+
+    def test_missing_transition_data_fails_loudly(self):
+        """اختبار الخطأ الواضح بدلاً من إزاحة ثابتة خاطئة إذا اختفت بيانات pytz"""
+        zone = pytz.timezone("Europe/Paris")
+        get_transition_table.cache_clear()
+        try:
+            with patch.object(type(zone), "_utc_transition_times", None):
+                with pytest.raises(RuntimeError):
+                    get_transition_table("Europe/Paris")
+        finally:
+            get_transition_table.cache_clear()
@@ -0,0 +1,101 @@
+import json
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.time_service import TimeService, time_service
+from app.services.weather_service import weather_service
+from app.services.warmup import StartupWarmup
+
+
+class TestStartupWarmup:
+    """اختبارات التهيئة المسبقة والجاهزية"""
+
+    @pytest.mark.asyncio
+    async def test_warmup_records_step_durations(self):
+        """اختبار تسجيل مدة كل خطوة وإعلان الجاهزية بعد اكتمالها"""
+        warmup = StartupWarmup()
+        calls = []
+
+        assert not warmup.ready
+        await warmup.run([("extra", lambda: calls.append("extra"))])
+
+        stats = warmup.stats()
+        assert warmup.ready
+        assert calls == ["extra"]
+        assert set(stats["steps_seconds"]) == {"timezones", "timezone_finder", "extra"}
+        assert stats["failed_steps"] == {}
+        assert stats["total_seconds"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_failed_step_does_not_block_readiness(self):
+        """اختبار أن فشل خطوة يُسجل دون منع الجاهزية"""
+        warmup = StartupWarmup()
+
+        def broken():
+            raise RuntimeError("boom")
+
+        await warmup.run([("broken", broken)])
+
+        assert warmup.ready
+        assert warmup.stats()["failed_steps"] == {"broken": "boom"}
+
+    @pytest.mark.asyncio
+    async def test_snapshot_round_trip(self, tmp_path):
+        """اختبار حفظ لقطة التخزين المؤقت ثم تعبئته منها عند بدء التشغيل"""
+        snapshot_path = tmp_path / "snapshot.json"
+        warmup = StartupWarmup(snapshot_path=str(snapshot_path))
+
+        time_service.prime_geocode("Alexandria", "Africa/Cairo")
+        await weather_service.get_weather("London")
+        assert warmup.save_snapshot()
+
+        snapshot = json.loads(snapshot_path.read_text(encoding="utf-8"))
+        assert snapshot["geocode"]["Alexandria"] == "Africa/Cairo"
+        assert "london" in snapshot["weather"]
+
+        # عامل جديد: النتائج تأتي من اللقطة دون طلب شبكة
+        snapshot["geocode"] = {"Giza": "Africa/Cairo"}
+        snapshot["weather"] = ["london", "atlantis"]
+        snapshot_path.write_text(json.dumps(snapshot), encoding="utf-8")
+        await warmup.run()
+
+        assert warmup.stats()["primed"] == {"geocode": 1, "weather": 1}
+        assert time_service.get_city_timezone("Giza") == "Africa/Cairo"
+        assert weather_service.cache_expires_in("london") > 0
+
+    @pytest.mark.asyncio
+    async def test_stale_snapshot_is_ignored(self, tmp_path):
+        """اختبار تجاهل نتائج البحث الجغرافي في اللقطات القديمة"""
+        snapshot_path = tmp_path / "snapshot.json"
+        snapshot_path.write_text(json.dumps({
+            "saved_at": time.time() - 10 * 86400,
+            "geocode": {"Atlantis": "UTC"},
+            "weather": []
+        }), encoding="utf-8")
+        warmup = StartupWarmup(snapshot_path=str(snapshot_path))
+
+        await warmup.run()
+
+        assert warmup.stats()["primed"]["geocode"] == 0
+        assert TimeService._geocode_timezone.expires_in(time_service, "Atlantis") is None
+
+    def test_ready_endpoint_flips_after_warmup(self):
+        """اختبار أن /ready يصبح جاهزاً بعد التهيئة بينما /health يستجيب دائماً"""
+        with TestClient(app) as client:
+            assert client.get("/health").status_code == 200
+
+            deadline = time.monotonic() + 30
+            response = client.get("/ready")
+            while response.status_code == 503 and time.monotonic() < deadline:
+                assert response.headers["retry-after"] == "1"
+                time.sleep(0.05)
+                response = client.get("/ready")
+
+            assert response.status_code == 200
+            data = response.json()
+            assert data["status"] == "ready"
+            assert {"timezones", "timezone_finder", "openapi", "static_responses"} <= set(data["warmup"]["steps_seconds"])
+
+            metrics = client.get("/metrics").json()
+            assert metrics["warmup"]["ready"] is True
@@ -4,6 +4,7 @@ from unittest.mock import AsyncMock, patch
 from app.main import app
 from app.models.weather_models import WeatherResponse
 from app.utils.exceptions import CityNotFoundException, WeatherServiceException
+from app.utils.http_cache import response_cache
 
 client = TestClient(app)
 
@@ -75,6 +76,8 @@ class TestWeatherAPI:
     @patch('app.services.weather_service.weather_service.get_weather')
     def test_get_weather_service_exception(self, mock_get_weather):
         """اختبار حالة خطأ في خدمة الطقس"""
+        # بدون استجابة مخزنة من اختبار سابق حتى يصل الطلب إلى الخدمة
+        response_cache.clear()
         mock_get_weather.side_effect = WeatherServiceException("خطأ في الاتصال بالخدمة")
         
         response = client.get("/weather/?city=القاهرة")
@@ -86,6 +89,8 @@ class TestWeatherAPI:
     @patch('app.services.weather_service.weather_service.get_weather')
     def test_get_weather_internal_error(self, mock_get_weather):
         """اختبار حالة خطأ داخلي غير متوقع"""
+        # بدون استجابة مخزنة من اختبار سابق حتى يصل الطلب إلى الخدمة
+        response_cache.clear()
         mock_get_weather.side_effect = Exception("خطأ غير متوقع")
         
         response = client.get("/weather/?city=القاهرة")
@@ -0,0 +1,101 @@
+import pytest
+from unittest.mock import patch
+from app.services.weather_service import WeatherService
+from app.services.weather_prefetcher import WeatherPrefetcher
+from app.utils.cache_backends import MemoryBackend, SQLiteBackend
+from app.utils.popularity import PopularityTracker
+
+
+class TestWeatherPrefetcher:
+    """اختبارات التحديث المسبق لبيانات الطقس"""
+    
+    def setup_method(self):
+        """إعداد الاختبارات"""
+        self.service = WeatherService(api_key="test_api_key")
+    
+    def test_popularity_decays_over_time(self):
+        """اختبار أن الشعبية تتناقص للنصف كل half_life"""
+        tracker = PopularityTracker(half_life_seconds=60)
+        for _ in range(4):
+            tracker.record("cairo", now=0.0)
+        tracker.record("london", now=0.0)
+        tracker.record("london", now=120.0)
+        
+        scores = dict(tracker.hottest(10, now=120.0))
+        assert scores["cairo"] == pytest.approx(1.0)
+        assert scores["london"] == pytest.approx(1.25)
+        assert [key for key, _ in tracker.hottest(1, now=120.0)] == ["london"]
+    
+    def test_popularity_tracker_is_bounded(self):
+        """اختبار أن عدد المدن المتتبعة محدود"""
+        tracker = PopularityTracker(max_keys=100)
+        for i in range(1000):
+            tracker.record(f"city-{i}")
+        
+        assert len(tracker) <= 100
+    
+    @pytest.mark.asyncio
+    async def test_weather_data_is_cached(self):
+        """اختبار أن بيانات الطقس تُخزن مؤقتاً لكل مدينة بغض النظر عن كتابة الاسم"""
+        assert self.service.cache_expires_in("cairo") is None
+        
+        await self.service.get_weather("Cairo")
+        with patch.dict(self.service.mock_weather_data, clear=True):
+            # من التخزين المؤقت دون الوصول للمصدر
+            result = await self.service._fetch_weather_data("cairo")
+        
+        assert result.name == "Cairo"
+        assert self.service.cache_expires_in("cairo") > 0
+        assert dict(self.service.popularity.hottest(1))["cairo"] == pytest.approx(1.0)
+    
+    @pytest.mark.asyncio
+    async def test_prefetch_refreshes_hot_cities_near_expiry(self):
+        """اختبار تحديث المدن الشائعة غير المخزنة أو القريبة من انتهاء الصلاحية فقط"""
+        prefetcher = WeatherPrefetcher(
+            self.service, top_k=5, refresh_ahead_seconds=90, budget_per_minute=60, backend=MemoryBackend()
+        )
+        for city in ("Cairo", "London", "القاهرة", "Riyadh"):
+            await self.service.get_weather(city)
+        
+        expires = {"cairo": 30.0, "london": 500.0, "riyadh": None}
+        with patch.object(self.service, "cache_expires_in", side_effect=expires.get), \
+             patch.object(self.service, "refresh_city") as refresh_city:
+            assert await prefetcher.run_once() == 2
+        
+        assert [call.args[0] for call in refresh_city.call_args_list] == ["cairo", "riyadh"]
+        assert prefetcher.stats()["refreshed"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_prefetch_respects_budget(self):
+        """اختبار أن التحديث المسبق لا يتجاوز حصة طلبات المصدر"""
+        prefetcher = WeatherPrefetcher(self.service, top_k=5, budget_per_minute=1, backend=MemoryBackend())
+        for city in ("Cairo", "London", "Riyadh"):
+            await self.service.get_weather(city)
+        
+        with patch.object(self.service, "cache_expires_in", return_value=None), \
+             patch.object(self.service, "refresh_city") as refresh_city:
+            assert await prefetcher.run_once() == 1
+            assert await prefetcher.run_once() == 0
+        
+        assert refresh_city.call_count == 1
+        assert prefetcher.stats()["skipped_budget"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_budget_and_city_locks_are_shared_between_workers(self, tmp_path):
+        """اختبار أن عاملين بمخزن مشترك لا يتجاوزان الحصة معاً ولا يحدّثان نفس المدينة"""
+        path = str(tmp_path / "shared.sqlite3")
+        workers = [
+            WeatherPrefetcher(self.service, top_k=5, budget_per_minute=2, backend=SQLiteBackend(path))
+            for _ in range(2)
+        ]
+        for city in ("Cairo", "London", "Riyadh"):
+            await self.service.get_weather(city)
+        
+        with patch.object(self.service, "cache_expires_in", return_value=None), \
+             patch.object(self.service, "refresh_city") as refresh_city:
+            refreshed = [await worker.run_once() for worker in workers + workers]
+        
+        refreshed_cities = [call.args[0] for call in refresh_city.call_args_list]
+        assert sum(refreshed) == 2
+        assert len(set(refreshed_cities)) == len(refreshed_cities) == 2
+        assert sum(worker.stats()["skipped_locked"] for worker in workers) >= 2